@@ -0,0 +1,71 @@
+"""
+Measures replay throughput of cassettes: records responses of many
+distinct requests, then replays them through Api.get, both with the
+player alone and through a whole client call.
+
+    $ python benchmarks/bench_cassette.py --requests 10000 --calls 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from byte_api.cassette import CassettePlayer, CassetteRecorder  # noqa: E402
+from byte_api.client import Client  # noqa: E402
+from payloads import make_account  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--requests', type=int, default=10000,
+                        help='distinct recorded requests')
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.cassette')
+    start = time.perf_counter()
+    with CassetteRecorder(path) as recorder:
+        for i in range(args.requests):
+            body = json.dumps(
+                {'data': make_account(i), 'success': 1}
+            ).encode('utf-8')
+            recorder.record('GET', 'account/id/ACCOUNT{}'.format(i), None,
+                            200, {}, body, 0.05)
+    print('recorded {} responses in {:.2f} s, {:.1f} KiB'.format(
+        args.requests, time.perf_counter() - start,
+        os.path.getsize(path) / 1024
+    ))
+
+    start = time.perf_counter()
+    player = CassettePlayer(path)
+    print('opened in {:.2f} ms'.format((time.perf_counter() - start) * 1000))
+
+    paths = ['account/id/ACCOUNT{}'.format(random.randrange(args.requests))
+             for _ in range(args.calls)]
+    start = time.perf_counter()
+    for path_ in paths:
+        player.play('GET', path_)
+    elapsed = time.perf_counter() - start
+    print('player.play  {:>12.0f} calls/s'.format(args.calls / elapsed))
+
+    with Client('token', cassette=player, coalesce=False) as client:
+        ids = [path_.rsplit('/', 1)[1] for path_ in paths]
+        start = time.perf_counter()
+        for id in ids:
+            client.get_user(id)
+        elapsed = time.perf_counter() - start
+    print('get_user     {:>12.0f} calls/s'.format(args.calls / elapsed))
+    player.close()
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
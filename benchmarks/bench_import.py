@@ -0,0 +1,88 @@
+"""
+Measures cold import time of the package in fresh interpreters and
+lists heavy modules that got imported. Exits with status 1 when the
+median time of ``import byte_api`` exceeds ``--max-ms`` or a module
+listed in ``--forbid`` is imported by it or by a star import, so CI can
+guard against regressions.
+
+    $ python benchmarks/bench_import.py --repeat 20 --max-ms 50
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+STATEMENTS = (
+    ('import byte_api', 'import byte_api'),
+    ('import byte_api.types', 'import byte_api.types'),
+    ('from byte_api import *', 'from byte_api import *'),
+    ('byte_api.Client', 'from byte_api import Client; Client("token")'),
+    ('import requests', 'import requests')
+)
+
+# Modules the package must not import until they are needed
+FORBIDDEN = ('requests', 'aiohttp', 'asyncio', 'sqlite3', 'numpy',
+             'concurrent.futures')
+
+SCRIPT = '''
+import sys, time
+before = set(sys.modules)
+start = time.perf_counter()
+{}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, sorted(set(sys.modules) - before)]))
+'''
+
+
+def run(statement):
+    output = subprocess.check_output(
+        [sys.executable, '-c', 'import json\n' + SCRIPT.format(statement)],
+        cwd=ROOT
+    )
+    elapsed, modules = json.loads(output.decode('utf-8'))
+    return elapsed, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--max-ms', type=float,
+                        help='fail when import byte_api takes longer')
+    parser.add_argument('--forbid', nargs='*', default=FORBIDDEN,
+                        help='modules import byte_api must not load')
+    args = parser.parse_args()
+
+    failed = False
+    for name, statement in STATEMENTS:
+        try:
+            results = [run(statement) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError:
+            print('{:<24} failed'.format(name))
+            continue
+        times = sorted(elapsed * 1000 for elapsed, _ in results)
+        median = statistics.median(times)
+        print('{:<24} median {:>7.1f} ms  min {:>7.1f} ms  {:>4} modules'
+              .format(name, median, times[0], len(results[0][1])))
+        if name not in ('import byte_api', 'from byte_api import *'):
+            continue
+        loaded = [module for module in args.forbid
+                  if module in results[0][1]]
+        if loaded:
+            print('  imported: {}'.format(', '.join(loaded)))
+            failed = True
+        if name == 'import byte_api' and args.max_ms is not None and \
+                median > args.max_ms:
+            print('  slower than {} ms'.format(args.max_ms))
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
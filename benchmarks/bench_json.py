@@ -0,0 +1,78 @@
+"""
+Compares decoding feed responses the way Api used to, through
+``requests.Response.text`` and ``json.loads``, with decoding the raw
+response bytes by every installed decoder of byte_api.decoders.
+
+    $ python benchmarks/bench_json.py --posts 10 100 1000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from byte_api.decoders import DECODERS, get_decoder  # noqa: E402
+from payloads import make_feed  # noqa: E402
+
+
+def make_response(content):
+    # Byte answers with application/json without a charset, so .text
+    # has to guess the encoding of the body
+    response = requests.Response()
+    response._content = content
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    return response
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--posts', type=int, nargs='+',
+                        default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    decoders = []
+    for name in DECODERS:
+        try:
+            decoders.append((name, get_decoder(name)))
+        except ImportError:
+            pass
+
+    header = '{:>8} {:>10} {:>14}'.format('posts', 'size, KiB', '.text, ms')
+    for name, _ in decoders:
+        header += ' {:>14}'.format(name + ', ms')
+    print(header)
+    for posts in args.posts:
+        content = json.dumps(make_feed(posts)).encode('utf-8')
+        row = '{:>8} {:>10.1f}'.format(posts, len(content) / 1024)
+
+        def text():
+            json.loads(make_response(content).text)
+        row += ' {:>14.2f}'.format(best_of(text, args.repeat) * 1000)
+        for _, loads in decoders:
+            def raw():
+                loads(make_response(content).content)
+            row += ' {:>14.2f}'.format(best_of(raw, args.repeat) * 1000)
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
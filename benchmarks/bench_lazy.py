@@ -0,0 +1,56 @@
+"""
+Compares eager and lazy decoding of large feeds when only a couple of
+fields of every post are read.
+
+    $ python benchmarks/bench_lazy.py --posts 1000 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from byte_api.types import Feed  # noqa: E402
+from payloads import make_feed  # noqa: E402
+
+
+def run(payload, lazy, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        feed = Feed.de_json(payload, lazy).data
+        total = 0
+        for post in feed.posts:
+            if post.id:
+                total += post.like_count
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--posts', type=int, nargs='+',
+                        default=[100, 1000, 10000])
+    parser.add_argument('--comments', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print('{:>8} {:>12} {:>12} {:>8}'.format(
+        'posts', 'eager, ms', 'lazy, ms', 'speedup'
+    ))
+    for posts in args.posts:
+        payload = make_feed(posts, args.comments)
+        eager = run(payload, False, args.repeat)
+        lazy = run(payload, True, args.repeat)
+        print('{:>8} {:>12.2f} {:>12.2f} {:>7.1f}x'.format(
+            posts, eager * 1000, lazy * 1000, eager / lazy
+        ))
+
+
+if __name__ == '__main__':
+    main()
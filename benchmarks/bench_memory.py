@@ -0,0 +1,84 @@
+"""
+Measures memory per decoded object. Reports the size of the slotted
+instances next to the same attributes stored in a per-instance __dict__,
+plus the total traced allocations of decoding a whole feed.
+
+    $ python benchmarks/bench_memory.py --posts 10000
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from byte_api.types import Account, Feed, Mention, Post, Range  # noqa: E402
+from payloads import (  # noqa: E402
+    make_account, make_feed, make_mention, make_post
+)
+
+
+class DictObject(object):
+    pass
+
+
+def slots_of(cls):
+    slots = []
+    for klass in cls.__mro__:
+        # __weakref__ and __dict__ are not attributes of the data
+        slots.extend(name for name in getattr(klass, '__slots__', ())
+                     if not name.startswith('__'))
+    return slots
+
+
+def dict_equivalent(obj):
+    copy = DictObject()
+    for name in slots_of(type(obj)):
+        setattr(copy, name, getattr(obj, name, None))
+    return copy
+
+
+def instance_size(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def traced(func):
+    tracemalloc.start()
+    result = func()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--posts', type=int, default=10000)
+    args = parser.parse_args()
+
+    samples = [
+        ('Range', Range.de_json({'start': 0, 'stop': 6})),
+        ('Mention', Mention.de_json(make_mention(1))),
+        ('Account', Account.de_json(make_account(1))),
+        ('Post', Post.de_json(make_post(1))),
+    ]
+    print('{:>10} {:>12} {:>12}'.format('type', 'slots, B', '__dict__, B'))
+    for name, obj in samples:
+        print('{:>10} {:>12} {:>12}'.format(
+            name, instance_size(obj), instance_size(dict_equivalent(obj))
+        ))
+
+    payload = make_feed(args.posts)
+    feed, size = traced(lambda: Feed.de_json(payload).data)
+    print('\nFeed of {} posts: {:.1f} MiB decoded, {:.0f} B per post'.format(
+        args.posts, size / 2 ** 20, size / args.posts
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares decoding of many raw feed responses in the calling process
+with BulkDecoder on a pool of processes, for objects and tuples.
+
+    $ python benchmarks/bench_parallel.py --feeds 2000 --posts 50
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from byte_api.parallel import BulkDecoder  # noqa: E402
+from byte_api.types import Feed  # noqa: E402
+from payloads import make_feed  # noqa: E402
+
+
+def measure(name, func, posts):
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    assert count == posts, (name, count)
+    print('{:<24} {:>8.2f} s {:>12.0f} posts/s'.format(
+        name, elapsed, posts / elapsed
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--feeds', type=int, default=1000)
+    parser.add_argument('--posts', type=int, default=50,
+                        help='posts per feed')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    payloads = [json.dumps(make_feed(args.posts)).encode('utf-8')
+                for _ in range(args.feeds)]
+    posts = args.feeds * args.posts
+    print('{} feeds, {:.1f} MiB, {} workers'.format(
+        args.feeds, sum(map(len, payloads)) / 1024 / 1024, args.workers
+    ))
+
+    measure('Feed.de_json', lambda: sum(
+        len(Feed.de_json(payload).data.posts) for payload in payloads
+    ), posts)
+    for workers in (0, args.workers):
+        with BulkDecoder(workers) as decoder:
+            for output in ('objects', 'tuples'):
+                measure(
+                    'workers={} {}'.format(workers, output),
+                    lambda: sum(1 for _ in decoder.posts(payloads, output)),
+                    posts
+                )
+
+
+if __name__ == '__main__':
+    main()
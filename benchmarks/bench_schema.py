@@ -0,0 +1,154 @@
+"""
+Compares the decoders generated from the field schemas of byte_api.types
+with the hand-written de_json methods they replaced, on eager decoding
+of accounts, posts and whole feeds.
+
+    $ python benchmarks/bench_schema.py --posts 100 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from byte_api.types import (Account, AccountMap, Comment, Feed,  # noqa: E402
+                            Mention, Post, Range, Response)
+from payloads import make_account, make_feed, make_post  # noqa: E402
+
+
+# Hand-written decoders as they were before the schemas, without the
+# lazy branches which are benchmarked by bench_lazy.py
+
+def range_de_json(obj):
+    return Range(obj['start'], obj['stop'])
+
+
+def mention_de_json(obj):
+    return Mention(obj['accountID'], obj['username'], obj['text'],
+                   range_de_json(obj['range']),
+                   range_de_json(obj['byteRange']))
+
+
+def account_de_json(obj, account_map=None):
+    options = {}
+    if 'avatarURL' in obj:
+        options['avatar_url'] = obj['avatarURL']
+    if 'isDeactivated' in obj:
+        options['is_deactivated'] = obj['isDeactivated']
+    if 'isRegistered' in obj:
+        options['is_registered'] = obj['isRegistered']
+    if 'isBlocked' in obj:
+        options['is_blocked'] = obj['isBlocked']
+    if 'bio' in obj:
+        options['bio'] = obj['bio']
+    if 'isFollowing' in obj:
+        options['is_following'] = obj['isFollowing']
+    if 'isFollowed' in obj:
+        options['is_followed'] = obj['isFollowed']
+    if 'isSuspended' in obj:
+        options['is_suspended'] = obj['isSuspended']
+    if 'displayName' in obj:
+        options['display_name'] = obj['displayName']
+    account = Account(obj['backgroundColor'], obj['followerCount'],
+                      obj['followingCount'], obj['foregroundColor'],
+                      obj['id'], obj['isChannel'], obj['loopCount'],
+                      obj['loopsConsumedCount'], obj['registrationDate'],
+                      obj['username'], options)
+    if account_map is not None:
+        account = account_map.resolve(account)
+    return account
+
+
+def comment_de_json(obj, account_map=None):
+    mentions = [mention_de_json(mention) for mention in obj['mentions']]
+    options = {}
+    if 'accounts' in obj:
+        options['accounts'] = {
+            account: account_de_json(obj['accounts'][account], account_map)
+            for account in obj['accounts'].keys()
+        }
+    return Comment(obj['id'], obj['postID'], obj['authorID'], obj['body'],
+                   mentions, obj['date'], options)
+
+
+def post_de_json(obj, account_map=None):
+    mentions = [mention_de_json(mention) for mention in obj['mentions']]
+    options = {}
+    if 'category' in obj:
+        options['category'] = obj['category']
+    if 'comments' in obj:
+        options['comments'] = [
+            comment_de_json(comment, account_map)
+            for comment in obj['comments']
+        ]
+    return Post(obj['id'], obj['type'], obj['authorID'], obj['caption'],
+                obj['allowCuration'], obj['allowRemix'], mentions,
+                obj['date'], obj['videoSrc'], obj['thumbSrc'],
+                obj['commentCount'], obj['likeCount'], obj['likedByMe'],
+                obj['loopCount'], obj['rebytedByMe'], options)
+
+
+def feed_de_json(obj, account_map=None):
+    data = obj['data']
+    posts = [post_de_json(post, account_map) for post in data['posts']]
+    options = {}
+    if 'cursor' in data:
+        options['cursor'] = data['cursor']
+    if 'accounts' in data:
+        options['accounts'] = {
+            account: account_de_json(data['accounts'][account],
+                                     account_map)
+            for account in data['accounts'].keys()
+        }
+    return Response(obj['success'], Feed(posts, options))
+
+
+def run(decode, payloads, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for payload in payloads:
+            decode(payload)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--posts', type=int, nargs='+',
+                        default=[100, 1000, 10000])
+    parser.add_argument('--comments', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print('{:>8} {:>10} {:>14} {:>14} {:>8}'.format(
+        'posts', 'payload', 'hand-written', 'generated', 'speedup'
+    ))
+    for posts in args.posts:
+        feed = make_feed(posts, args.comments)
+        cases = [
+            ('account', [make_account(i) for i in range(posts)],
+             account_de_json, Account.de_json),
+            ('post', [make_post(i, args.comments) for i in range(posts)],
+             post_de_json, Post.de_json),
+            ('feed', [feed], feed_de_json, Feed.de_json),
+            ('feed+map', [feed],
+             lambda obj: feed_de_json(obj, AccountMap()),
+             lambda obj: Feed.de_json(obj, False, AccountMap()))
+        ]
+        for name, payloads, old, new in cases:
+            old_time = run(old, payloads, args.repeat)
+            new_time = run(new, payloads, args.repeat)
+            print('{:>8} {:>10} {:>11.2f} ms {:>11.2f} ms {:>7.2f}x'.format(
+                posts, name, old_time * 1000, new_time * 1000,
+                old_time / new_time
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Performance baselines of deserialization and transport hot paths.
+
+Measures Post/Feed/Account/Comment.de_json over synthetic payloads and
+end-to-end Client calls against byte_api.stub.StubServer, then stores the
+results as JSON. A previous results file can be passed with --compare
+to print the change of every metric.
+
+    $ python benchmarks/bench_suite.py --output baseline.json
+    $ python benchmarks/bench_suite.py --compare baseline.json
+    $ python benchmarks/bench_suite.py --posts 1 100 100000 --skip-client
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import byte_api  # noqa: E402
+from byte_api import decoders  # noqa: E402
+from byte_api.client import Client  # noqa: E402
+from byte_api.stub import StubServer  # noqa: E402
+from byte_api.types import Account, Comment, Feed, Post  # noqa: E402
+from payloads import make_account, make_feed  # noqa: E402
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def percentile(values, fraction):
+    # Nearest-rank percentile of sorted values
+    index = max(0, int(round(fraction * len(values) + 0.5)) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+def bench_decode(sizes, comments, repeat):
+    results = {}
+    for posts in sizes:
+        payload = make_feed(posts, comments)
+        items = {
+            'Feed.de_json': (posts, lambda: Feed.de_json(payload)),
+        }
+        raw_posts = payload['data']['posts']
+        raw_comments = [
+            comment for post in raw_posts for comment in post['comments']
+        ]
+        raw_accounts = [make_account(i) for i in range(posts)]
+        items['Post.de_json'] = (len(raw_posts), lambda: [
+            Post.de_json(post) for post in raw_posts
+        ])
+        items['Comment.de_json'] = (len(raw_comments), lambda: [
+            Comment.de_json(comment) for comment in raw_comments
+        ])
+        items['Account.de_json'] = (len(raw_accounts), lambda: [
+            Account.de_json(account) for account in raw_accounts
+        ])
+        for name, (count, func) in items.items():
+            elapsed = best_of(func, repeat)
+            results.setdefault(name, {})[str(posts)] = {
+                'items': count,
+                'seconds': elapsed,
+                'us_per_item': elapsed / max(count, 1) * 1e6
+            }
+            print('{:>16} {:>8} {:>12.2f} ms {:>10.2f} us/item'.format(
+                name, posts, elapsed * 1000, elapsed / max(count, 1) * 1e6
+            ))
+        del payload, raw_posts, raw_comments, raw_accounts, items
+    return results
+
+
+def bench_client(calls, concurrency, feed_posts, latency):
+    results = {}
+    with StubServer(page_size=feed_posts, pages=calls,
+                    latency=latency) as server:
+        with Client('token', pool_maxsize=concurrency,
+                    base_url=server.url) as client:
+            endpoints = {
+                'get_user': lambda i: client.get_user('ACCOUNT{}'.format(i)),
+                'follow': lambda i: client.follow('ACCOUNT{}'.format(i)),
+                'get_timeline': lambda i: client.get_timeline(str(i))
+            }
+            for name, call in endpoints.items():
+                # Warms up the connection pool
+                for i in range(concurrency):
+                    call(i)
+                latencies = []
+
+                def timed(i):
+                    start = time.perf_counter()
+                    call(i)
+                    latencies.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    list(executor.map(timed, range(calls)))
+                elapsed = time.perf_counter() - start
+                latencies.sort()
+                results[name] = {
+                    'calls': calls,
+                    'concurrency': concurrency,
+                    'seconds': elapsed,
+                    'throughput': calls / elapsed,
+                    'p50_ms': percentile(latencies, 0.5) * 1000,
+                    'p90_ms': percentile(latencies, 0.9) * 1000,
+                    'p99_ms': percentile(latencies, 0.99) * 1000,
+                    'max_ms': latencies[-1] * 1000
+                }
+                print('{:>16} {:>10.0f} calls/s   p50 {:.2f} ms   '
+                      'p90 {:.2f} ms   p99 {:.2f} ms'.format(
+                          name, results[name]['throughput'],
+                          results[name]['p50_ms'], results[name]['p90_ms'],
+                          results[name]['p99_ms']))
+    return results
+
+
+def flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, prefix + key + '/'))
+        elif isinstance(value, (int, float)) and \
+                not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(results, baseline):
+    old = flatten({'decode': baseline.get('decode', {}),
+                   'client': baseline.get('client', {})})
+    new = flatten({'decode': results.get('decode', {}),
+                   'client': results.get('client', {})})
+    print('\n{:<56} {:>12} {:>12} {:>8}'.format(
+        'metric', 'baseline', 'current', 'change'
+    ))
+    for key in sorted(new):
+        if key not in old or not old[key] or \
+                key.endswith(('/items', '/calls', '/concurrency')):
+            continue
+        print('{:<56} {:>12.4g} {:>12.4g} {:>+7.1f}%'.format(
+            key, old[key], new[key], (new[key] / old[key] - 1) * 100
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--posts', type=int, nargs='+',
+                        default=[1, 10, 100, 1000, 10000, 100000])
+    parser.add_argument('--comments', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--feed-posts', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='seconds the stub server adds to responses')
+    parser.add_argument('--skip-decode', action='store_true')
+    parser.add_argument('--skip-client', action='store_true')
+    parser.add_argument('--output', help='file to store results in')
+    parser.add_argument('--compare', help='results file to compare with')
+    args = parser.parse_args()
+
+    results = {
+        'meta': {
+            'version': byte_api.__version__,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'decoder': getattr(decoders.loads, '__module__', None),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        }
+    }
+    if not args.skip_decode:
+        results['decode'] = bench_decode(args.posts, args.comments,
+                                         args.repeat)
+    if not args.skip_client:
+        results['client'] = bench_client(args.calls, args.concurrency,
+                                         args.feed_posts, args.latency)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+
+
+if __name__ == '__main__':
+    main()
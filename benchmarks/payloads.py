@@ -0,0 +1,103 @@
+"""
+Synthetic API payloads shaped like real Byte responses
+"""
+
+
+def make_range(start, stop):
+    return {
+        'start': start,
+        'stop': stop
+    }
+
+
+def make_mention(i):
+    return {
+        'accountID': 'ACCOUNT{}'.format(i),
+        'username': 'user{}'.format(i),
+        'text': '@user{}'.format(i),
+        'range': make_range(0, 6),
+        'byteRange': make_range(0, 6)
+    }
+
+
+def make_account(i):
+    return {
+        'avatarURL': 'https://e.byte.co/avatar/{}.jpg'.format(i),
+        'backgroundColor': '#000000',
+        'bio': 'bio of user {}'.format(i),
+        'displayName': 'User {}'.format(i),
+        'followerCount': i * 7,
+        'followingCount': i * 3,
+        'foregroundColor': '#CCD6E9',
+        'id': 'ACCOUNT{}'.format(i),
+        'isBlocked': False,
+        'isChannel': False,
+        'isFollowed': False,
+        'isFollowing': i % 2 == 0,
+        'loopCount': i * 1000,
+        'loopsConsumedCount': i * 10,
+        'registrationDate': 1580228662 + i,
+        'username': 'user{}'.format(i)
+    }
+
+
+def make_comment(post, i, authors):
+    author = i % authors
+    return {
+        'id': 'POST{}-{}'.format(post, i),
+        'postID': 'POST{}'.format(post),
+        'authorID': 'ACCOUNT{}'.format(author),
+        'body': 'comment {} on post {} @user{}'.format(i, post, author),
+        'mentions': [make_mention(author)],
+        'date': 1580089742 + i,
+        'accounts': {
+            'ACCOUNT{}'.format(author): make_account(author)
+        }
+    }
+
+
+def make_post(i, comments=2, authors=100):
+    author = i % authors
+    return {
+        'id': 'POST{}'.format(i),
+        'type': 0,
+        'authorID': 'ACCOUNT{}'.format(author),
+        'caption': 'caption of post {} @user{}'.format(i, author),
+        'allowCuration': True,
+        'allowRemix': i % 3 == 0,
+        'category': 'comedy',
+        'mentions': [make_mention(author)],
+        'date': 1580089743 + i,
+        'videoSrc': 'https://e.byte.co/video/{}.mp4'.format(i),
+        'thumbSrc': 'https://e.byte.co/thumb/{}.jpg'.format(i),
+        'commentCount': comments,
+        'comments': [
+            make_comment(i, c, authors) for c in range(comments)
+        ],
+        'likeCount': i * 13 % 1000,
+        'likedByMe': False,
+        'loopCount': i * 101 % 100000,
+        'rebytedByMe': False
+    }
+
+
+def make_feed(posts, comments=2, authors=100, cursor='NEXT'):
+    """
+    Feed response with ``posts`` posts, ``comments`` comments per post
+    and the accounts of up to ``authors`` distinct authors
+    """
+    data = {
+        'posts': [
+            make_post(i, comments, authors) for i in range(posts)
+        ],
+        'accounts': {
+            'ACCOUNT{}'.format(i): make_account(i)
+            for i in range(min(posts, authors))
+        }
+    }
+    if cursor:
+        data['cursor'] = cursor
+    return {
+        'data': data,
+        'success': 1
+    }
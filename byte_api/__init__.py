@@ -1,6 +1,41 @@
-from .client import Client
+import sys
+import types as _types
+
 from .types import *
 
 
 __author__ = 'bixnel'
 __version__ = '1.1'
+
+# Clients are imported on first access, so importing the package for
+# its types does not load the HTTP stack. Module __getattr__ (PEP 562)
+# needs Python 3.7, replacing the module class works since 3.5
+_LAZY = {
+    'Client': 'client',
+    'AsyncClient': 'async_client'
+}
+
+__all__ = [
+    'Client', 'AsyncClient', 'Error', 'Response', 'Range', 'Mention',
+    'Comment', 'Post', 'Feed', 'Color', 'Colors', 'Account', 'LoopCounter',
+    'Rebyte', 'AccountMap'
+]
+
+
+class _LazyModule(_types.ModuleType):
+    def __getattr__(self, name):
+        module = _LAZY.get(name)
+        if module is None:
+            raise AttributeError("module '{}' has no attribute '{}'".format(
+                self.__name__, name
+            ))
+        value = getattr(__import__(self.__name__ + '.' + module,
+                                   fromlist=[name]), name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(_LAZY))
+
+
+sys.modules[__name__].__class__ = _LazyModule
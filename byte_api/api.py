@@ -1,53 +1,333 @@
-import json
-import requests
+import threading
+import time
+
+from .cache import BaseCache
+from .coalesce import SingleFlight
+from .decoders import get_decoder
+from .hooks import Hooks, RequestEvent, body_size
+from .ratelimit import RateLimitError, parse_retry_after
+
+
+API_URL = 'https://api.byte.co/'
+
+
+class AuthError(ValueError):
+    """
+    Raised when the API answers with an empty body, which it does for
+    requests with an invalid token
+    """
+
+
+def build_headers(token, headers=None, keep_alive=True):
+    if headers:
+        headers = dict(headers)
+        headers['Authorization'] = token
+    else:
+        headers = {
+            'User-Agent': 'byte/0.2 (co.byte.video; build:145; '
+                          'iOS 13.3.0) Alamofire/4.9.1',
+            'Authorization': token
+        }
+    if not keep_alive:
+        headers['Connection'] = 'close'
+    return headers
+
+
+def normalize_url(base_url=None):
+    if not base_url:
+        return API_URL
+    return base_url.rstrip('/') + '/'
+
+
+def network_errors():
+    """
+    Exceptions of failed connections and timeouts. requests is imported
+    with the first session or error, so importing the package stays cheap
+    """
+    import requests
+    return requests.ConnectionError, requests.Timeout
 
 
 class Api(object):
-    def __init__(self, token, headers=None):
+    def __init__(self, token, headers=None, pool_connections=10,
+                 pool_maxsize=10, pool_block=False, keep_alive=True,
+                 cache=None, rate_limiter=None, throttle_retries=3,
+                 retry_policy=None, decoder=None, coalesce=True,
+                 base_url=None, cassette=None):
         self.token = token
-        self.API_URL = 'https://api.byte.co/'
-        if headers:
-            self.headers = headers + {'Authorization': token}
-        else:
-            self.headers = {
-                'User-Agent': 'byte/0.2 (co.byte.video; build:145; '
-                              'iOS 13.3.0) Alamofire/4.9.1',
-                'Authorization': token
-            }
+        self.API_URL = normalize_url(base_url)
+        self.headers = build_headers(token, headers, keep_alive)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.throttle_retries = throttle_retries
+        self.retry_policy = retry_policy
+        self.loads = get_decoder(decoder)
+        self.single_flight = SingleFlight() if coalesce else None
+        self.hooks = Hooks()
+        self.cassette = cassette
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        Shared :class:`requests.Session` with a pooled keep-alive adapter,
+        created on first use
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update(self.headers)
+        return session
+
+    def close(self):
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     @staticmethod
     def check_response(response):
         if not response:
-            raise ValueError('empty response from API, check your token')
+            raise AuthError('empty response from API, check your token')
 
-    def get(self, url, params=None, check_response=True):
-        response = requests.get(self.API_URL + url,
-                                params,
-                                headers=self.headers).text
+    def _decode(self, response, check_response):
         if check_response:
             self.check_response(response)
-        return json.loads(response)
+        return self.loads(response)
 
-    def post(self, url, data=None, json_data=None, check_response=True):
-        response = requests.post(self.API_URL + url,
-                                 data,
-                                 json_data,
-                                 headers=self.headers).text
-        if check_response:
-            self.check_response(response)
-        return json.loads(response)
+    def _complete(self, event, body=None, check_response=True):
+        """
+        Decodes the body of the final attempt of a request, timing the
+        decoding for hooks when they are set
+        """
+        if event is None:
+            return self._decode(body, check_response)
+        data = None
+        if body is not None:
+            started = time.perf_counter()
+            try:
+                data = self._decode(body, check_response)
+            except ValueError as e:
+                event.error = e
+                self.hooks.fire('on_error', event)
+                raise
+            event.decode_time = time.perf_counter() - started
+        self.hooks.fire('after_response', event)
+        return data
+
+    def _fetch(self, method, url, kwargs):
+        cassette = self.cassette
+        if cassette is None:
+            return self.session.request(method, self.API_URL + url,
+                                        **kwargs)
+        if cassette.replaying:
+            response, delay = cassette.play(method, url,
+                                            kwargs.get('params'))
+            if delay > 0:
+                time.sleep(delay)
+            return response
+        sent = time.perf_counter()
+        response = self.session.request(method, self.API_URL + url,
+                                        **kwargs)
+        cassette.record(method, url, kwargs.get('params'),
+                        response.status_code, response.headers,
+                        response.content, time.perf_counter() - sent)
+        return response
+
+    def _send(self, method, url, idempotent=None, **kwargs):
+        """
+        Sends a request with rate limiting and retries, returns the
+        response and the :class:`RequestEvent` of the final attempt,
+        which is None without hooks
+        """
+        limiter = self.rate_limiter
+        retry = self.retry_policy
+        hooks = self.hooks if self.hooks else None
+        size = 0
+        if hooks is not None:
+            size = body_size(kwargs.get('data'), kwargs.get('json'))
+        budget = retry.total_timeout if retry is not None else None
+        started = time.monotonic()
+        attempt = throttled = 0
+        while True:
+            attempt += 1
+            if limiter is not None:
+                limiter.acquire(url)
+            if budget is not None:
+                # A hung attempt must not outlast the time budget of the
+                # call, so it gets what is left of it as its timeout
+                remaining = budget - (time.monotonic() - started)
+                if remaining <= 0:
+                    raise network_errors()[1](
+                        'time budget of {} s exhausted'.format(budget)
+                    )
+                kwargs['timeout'] = remaining
+            event = None
+            if hooks is not None:
+                event = RequestEvent(method, url, attempt, size)
+                hooks.fire('before_request', event)
+            try:
+                response = self._fetch(method, url, kwargs)
+            except network_errors() as e:
+                delay = None
+                if retry is not None:
+                    delay = retry.delay(method, attempt, started,
+                                        idempotent, error=e)
+                if event is not None:
+                    event.error = e
+                    event.retry = delay is not None
+                    hooks.fire('on_error', event)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            status = response.status_code
+            if event is not None:
+                event.received(status, 0 if kwargs.get('stream') else
+                               len(response.content))
+            retry_after = None
+            if status == 429:
+                retry_after = parse_retry_after(
+                    response.headers.get('Retry-After')
+                )
+            if status == 429 and limiter is not None:
+                # A throttled request was not processed, so it is safe to
+                # send it again once the limiter lets it through
+                limiter.throttled(retry_after)
+                throttled += 1
+                if throttled > self.throttle_retries:
+                    error = RateLimitError(
+                        'too many requests to {}'.format(url), retry_after
+                    )
+                    if event is not None:
+                        event.error = error
+                        hooks.fire('on_error', event)
+                    response.close()
+                    raise error
+                if event is not None:
+                    event.retry = True
+                    hooks.fire('after_response', event)
+                # Streamed responses hold their pooled connection until
+                # they are closed
+                response.close()
+                continue
+            if retry is not None:
+                delay = retry.delay(method, attempt, started, idempotent,
+                                    status=status, retry_after=retry_after)
+                if delay is not None:
+                    if event is not None:
+                        event.retry = True
+                        hooks.fire('after_response', event)
+                    response.close()
+                    time.sleep(delay)
+                    continue
+            if limiter is not None and status != 429:
+                limiter.succeeded()
+            return response, event
+
+    def _write(self, url, event, body, check_response):
+        """
+        Decodes the response of a write and drops cached reads it may
+        have changed, also when the response is an error
+        """
+        data = None
+        try:
+            data = self._complete(event, body, check_response)
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate_write(url, data)
+        return data
+
+    def _flight_key(self, url, params, check_response):
+        return BaseCache.make_key(url, params) + (check_response,)
+
+    def get(self, url, params=None, check_response=True):
+        """
+        Sends a GET request, concurrent identical requests share one
+        response when coalescing is enabled
+        """
+        if self.single_flight is None:
+            return self._get(url, params, check_response)
+        return self.single_flight.do(
+            self._flight_key(url, params, check_response),
+            self._get, url, params, check_response
+        )
+
+    def _get(self, url, params=None, check_response=True):
+        key = entry = headers = None
+        if self.cache is not None:
+            key, entry = self.cache.lookup(url, params)
+            if entry is not None:
+                if entry.fresh:
+                    return entry.data
+                if entry.etag:
+                    headers = {'If-None-Match': entry.etag}
+        response, event = self._send('GET', url, params=params,
+                                     headers=headers)
+        if entry is not None and response.status_code == 304:
+            if event is not None:
+                self._complete(event)
+            self.cache.revalidated(key, entry)
+            return entry.data
+        data = self._complete(event, response.content, check_response)
+        if key is not None and response.ok:
+            self.cache.store(key, url, data, response.headers.get('ETag'))
+        return data
+
+    def stream(self, url, params=None, chunk_size=65536,
+               check_response=True):
+        """
+        Yields chunks of the body of a GET response as they arrive
+        """
+        response, event = self._send('GET', url, params=params,
+                                     stream=True)
+        size = 0
+        try:
+            for chunk in response.iter_content(chunk_size):
+                if chunk:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            response.close()
+        if event is not None:
+            event.received(response.status_code, size)
+        if not size and check_response:
+            self._complete(event, b'', check_response)
+        elif event is not None:
+            self._complete(event)
+
+    def post(self, url, data=None, json_data=None, check_response=True,
+             idempotent=False):
+        response, event = self._send('POST', url, idempotent,
+                                     data=data, json=json_data)
+        return self._write(url, event, response.content, check_response)
 
     def put(self, url, data=None, check_response=True):
-        response = requests.put(self.API_URL + url,
-                                data,
-                                headers=self.headers).text
-        if check_response:
-            self.check_response(response)
-        return json.loads(response)
+        response, event = self._send('PUT', url, data=data)
+        return self._write(url, event, response.content, check_response)
 
     def delete(self, url, check_response=True):
-        response = requests.delete(self.API_URL + url,
-                                   headers=self.headers).text
-        if check_response:
-            self.check_response(response)
-        return json.loads(response)
+        response, event = self._send('DELETE', url)
+        return self._write(url, event, response.content, check_response)
@@ -0,0 +1,225 @@
+import time
+
+from .api import Api, build_headers, normalize_url
+from .coalesce import AsyncSingleFlight
+from .decoders import get_decoder
+from .hooks import Hooks, RequestEvent, body_size
+from .ratelimit import RateLimitError, parse_retry_after
+
+
+class AsyncApi(object):
+    def __init__(self, token, headers=None, pool_size=100, pool_maxsize=0,
+                 keep_alive=True, keepalive_timeout=15, cache=None,
+                 rate_limiter=None, throttle_retries=3, retry_policy=None,
+                 decoder=None, coalesce=True, base_url=None,
+                 cassette=None):
+        self.token = token
+        self.API_URL = normalize_url(base_url)
+        self.headers = build_headers(token, headers, keep_alive)
+        self.pool_size = pool_size
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.keepalive_timeout = keepalive_timeout
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.throttle_retries = throttle_retries
+        self.retry_policy = retry_policy
+        self.loads = get_decoder(decoder)
+        self.single_flight = AsyncSingleFlight() if coalesce else None
+        self.hooks = Hooks()
+        self.cassette = cassette
+        self._session = None
+
+    @property
+    def session(self):
+        """
+        Shared :class:`aiohttp.ClientSession` created on first use
+        inside the running event loop
+        """
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        import aiohttp
+
+        if self.keep_alive:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_maxsize,
+                keepalive_timeout=self.keepalive_timeout
+            )
+        else:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_maxsize,
+                force_close=True
+            )
+        return aiohttp.ClientSession(headers=self.headers,
+                                     connector=connector)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    check_response = staticmethod(Api.check_response)
+
+    _decode = Api._decode
+    _complete = Api._complete
+    _write = Api._write
+    _flight_key = Api._flight_key
+
+    async def _fetch(self, method, url, kwargs):
+        cassette = self.cassette
+        if cassette is not None and cassette.replaying:
+            response, delay = cassette.play(method, url,
+                                            kwargs.get('params'))
+            if delay > 0:
+                import asyncio
+                await asyncio.sleep(delay)
+            return response, response.content
+        sent = time.perf_counter()
+        async with self.session.request(method, self.API_URL + url,
+                                        **kwargs) as response:
+            body = await response.read()
+        if cassette is not None:
+            cassette.record(method, url, kwargs.get('params'),
+                            response.status, response.headers, body,
+                            time.perf_counter() - sent)
+        return response, body
+
+    async def _send(self, method, url, idempotent=None, **kwargs):
+        import asyncio
+
+        import aiohttp
+
+        limiter = self.rate_limiter
+        retry = self.retry_policy
+        hooks = self.hooks if self.hooks else None
+        size = 0
+        if hooks is not None:
+            size = body_size(kwargs.get('data'), kwargs.get('json'))
+        budget = retry.total_timeout if retry is not None else None
+        started = time.monotonic()
+        attempt = throttled = 0
+        while True:
+            attempt += 1
+            if limiter is not None:
+                await limiter.acquire_async(url)
+            if budget is not None:
+                remaining = budget - (time.monotonic() - started)
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(
+                        'time budget of {} s exhausted'.format(budget)
+                    )
+                kwargs['timeout'] = aiohttp.ClientTimeout(total=remaining)
+            event = None
+            if hooks is not None:
+                event = RequestEvent(method, url, attempt, size)
+                hooks.fire('before_request', event)
+            try:
+                response, body = await self._fetch(method, url, kwargs)
+            except (aiohttp.ClientConnectionError,
+                    asyncio.TimeoutError) as e:
+                delay = None
+                if retry is not None:
+                    delay = retry.delay(method, attempt, started,
+                                        idempotent, error=e)
+                if event is not None:
+                    event.error = e
+                    event.retry = delay is not None
+                    hooks.fire('on_error', event)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            status = response.status
+            if event is not None:
+                event.received(status, len(body))
+            retry_after = None
+            if status == 429:
+                retry_after = parse_retry_after(
+                    response.headers.get('Retry-After')
+                )
+            if status == 429 and limiter is not None:
+                limiter.throttled(retry_after)
+                throttled += 1
+                if throttled > self.throttle_retries:
+                    error = RateLimitError(
+                        'too many requests to {}'.format(url), retry_after
+                    )
+                    if event is not None:
+                        event.error = error
+                        hooks.fire('on_error', event)
+                    raise error
+                if event is not None:
+                    event.retry = True
+                    hooks.fire('after_response', event)
+                continue
+            if retry is not None:
+                delay = retry.delay(method, attempt, started, idempotent,
+                                    status=status, retry_after=retry_after)
+                if delay is not None:
+                    if event is not None:
+                        event.retry = True
+                        hooks.fire('after_response', event)
+                    await asyncio.sleep(delay)
+                    continue
+            if limiter is not None and status != 429:
+                limiter.succeeded()
+            return response, body, event
+
+    async def _request(self, method, url, check_response=True,
+                       idempotent=None, **kwargs):
+        _, body, event = await self._send(method, url, idempotent,
+                                          **kwargs)
+        if method != 'GET':
+            return self._write(url, event, body, check_response)
+        return self._complete(event, body, check_response)
+
+    async def get(self, url, params=None, check_response=True):
+        if self.single_flight is None:
+            return await self._get(url, params, check_response)
+        return await self.single_flight.do(
+            self._flight_key(url, params, check_response),
+            self._get, url, params, check_response
+        )
+
+    async def _get(self, url, params=None, check_response=True):
+        key = entry = headers = None
+        if self.cache is not None:
+            key, entry = self.cache.lookup(url, params)
+            if entry is not None:
+                if entry.fresh:
+                    return entry.data
+                if entry.etag:
+                    headers = {'If-None-Match': entry.etag}
+        response, body, event = await self._send('GET', url, params=params,
+                                                 headers=headers)
+        if entry is not None and response.status == 304:
+            if event is not None:
+                self._complete(event)
+            self.cache.revalidated(key, entry)
+            return entry.data
+        data = self._complete(event, body, check_response)
+        if key is not None and response.status < 400:
+            self.cache.store(key, url, data, response.headers.get('ETag'))
+        return data
+
+    async def post(self, url, data=None, json_data=None,
+                   check_response=True, idempotent=False):
+        return await self._request('POST', url, check_response, idempotent,
+                                   data=data, json=json_data)
+
+    async def put(self, url, data=None, check_response=True):
+        return await self._request('PUT', url, check_response, data=data)
+
+    async def delete(self, url, check_response=True):
+        return await self._request('DELETE', url, check_response)
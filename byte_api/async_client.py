@@ -0,0 +1,544 @@
+from .async_api import AsyncApi
+from .cache import MemoryCache
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .types import *
+
+
+class AsyncClient(object):
+    """
+    Initializes the asyncio API for the client.
+    Requires `aiohttp <https://docs.aiohttp.org>`_
+
+    :param token: Authorization token
+    :type token: str
+
+    :param headers: Additional headers **except Authorization**
+    :type headers: dict
+
+    :param pool_size: Maximum number of simultaneous connections
+    :type pool_size: int
+
+    :param pool_maxsize: Maximum number of simultaneous connections per
+        host, 0 means no per-host limit
+    :type pool_maxsize: int
+
+    :param keep_alive: Reuse connections between requests
+    :type keep_alive: bool
+
+    :param keepalive_timeout: Seconds an idle connection is kept open
+    :type keepalive_timeout: float
+
+    :param lazy: Decode fields of returned posts, accounts and comments
+        on first access instead of upfront
+    :type lazy: bool
+
+    :param account_map: Identity map resolving decoded accounts to shared
+        instances, True creates one for this client
+    :type account_map: :class:`AccountMap` or bool
+
+    :param cache: Response cache for read endpoints, True creates
+        a :class:`MemoryCache` with default TTLs
+    :type cache: :class:`BaseCache` or bool
+
+    :param rate_limiter: Limiter pacing every call of the client, a number
+        creates a :class:`RateLimiter` allowing that many calls per second,
+        True creates one with default rates
+    :type rate_limiter: :class:`RateLimiter`, float or bool
+
+    :param retry_policy: Policy retrying failed idempotent calls, True
+        creates a :class:`RetryPolicy` with default settings
+    :type retry_policy: :class:`RetryPolicy` or bool
+
+    :param decoder: JSON decoder, ``'orjson'``, ``'ujson'``, ``'json'`` or
+        a callable taking bytes. Defaults to the fastest one installed
+    :type decoder: str or callable
+
+    :param coalesce: Share one in-flight request between concurrent
+        identical GET calls
+    :type coalesce: bool
+
+    :param base_url: Base url of the API, e.g. of a local
+        :class:`byte_api.stub.StubServer`. Defaults to https://api.byte.co/
+    :type base_url: str
+
+    :param hooks: Callbacks of request events by event name,
+        ``before_request``, ``after_response`` or ``on_error``, each
+        a callable or a list of them taking a :class:`RequestEvent`
+    :type hooks: dict
+
+    :param metrics: Collector of per-endpoint request metrics, True
+        creates a :class:`MetricsCollector`
+    :type metrics: :class:`MetricsCollector` or bool
+
+    :param cassette: :class:`CassetteRecorder` recording responses or
+        :class:`CassettePlayer` replaying them instead of sending requests
+    """
+
+    def __init__(self, token: str, headers=None, pool_size: int = 100,
+                 pool_maxsize: int = 0, keep_alive: bool = True,
+                 keepalive_timeout: float = 15, lazy: bool = False,
+                 account_map=None, cache=None,
+                 rate_limiter=None, retry_policy=None, decoder=None,
+                 coalesce: bool = True, base_url: str = None,
+                 hooks: dict = None, metrics=None, cassette=None):
+        """
+        Initializes the asyncio API for the client
+
+        :param token: Authorization token
+        :type token: str
+        """
+        if cache is True:
+            cache = MemoryCache()
+        elif cache is False:
+            cache = None
+        if rate_limiter is True:
+            rate_limiter = RateLimiter()
+        elif isinstance(rate_limiter, (int, float)) and rate_limiter:
+            rate_limiter = RateLimiter(rate_limiter)
+        elif not rate_limiter:
+            rate_limiter = None
+        if retry_policy is True:
+            retry_policy = RetryPolicy()
+        elif retry_policy is False:
+            retry_policy = None
+        self.api = AsyncApi(token, headers,
+                            pool_size=pool_size,
+                            pool_maxsize=pool_maxsize,
+                            keep_alive=keep_alive,
+                            keepalive_timeout=keepalive_timeout,
+                            cache=cache,
+                            rate_limiter=rate_limiter,
+                            retry_policy=retry_policy,
+                            decoder=decoder,
+                            coalesce=coalesce,
+                            base_url=base_url,
+                            cassette=cassette)
+        for event, funcs in (hooks or {}).items():
+            if callable(funcs):
+                funcs = [funcs]
+            for func in funcs:
+                self.api.hooks.add(event, func)
+        if metrics is True:
+            from .metrics import MetricsCollector
+            metrics = MetricsCollector()
+        elif metrics is False:
+            metrics = None
+        if metrics is not None:
+            metrics.install(self.api)
+        self.metrics = metrics
+        self.lazy = lazy
+        if account_map is True:
+            account_map = AccountMap()
+        elif account_map is False:
+            account_map = None
+        self.account_map = account_map
+
+    async def close(self):
+        """
+        Closes pooled connections of the client
+        """
+        await self.api.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def follow(self, id: str) -> Response:
+        """
+        Subscribes to a user
+
+        :param id: User id
+        :type id: str
+
+
+        :rtype: :class:`Response`
+        """
+        response = await self.api.put('account/id/{}/follow'.format(id))
+        return Response.de_json(response)
+
+    async def unfollow(self, id: str) -> Response:
+        """
+        Unsubscribes to a user
+
+        :param id: User id
+        :type id: str
+
+
+        :rtype: :class:`Response`
+        """
+        response = await self.api.delete('account/id/{}/follow'.format(id))
+        return Response.de_json(response)
+
+    async def get_user(self, id: str) -> Response:
+        """
+        Gets a user profile
+
+        :param id: User id
+        :type id: str
+
+
+        :rtype: :class:`Response`, :class:`Account`
+        """
+        response = await self.api.get('account/id/{}'.format(id))
+        response = Response.de_json(response)
+        data = None
+        error = None
+        if response.data is not None:
+            data = Account.de_json(response.data, self.lazy,
+                                   self.account_map)
+        if response.error is not None:
+            error = response.error
+        return Response(response.success, data=data, error=error)
+
+    async def like(self, id: str) -> Response:
+        """
+        Likes a byte
+
+        :param id: Byte (post) id
+        :type id: str
+
+
+        :rtype: :class:`Response`
+        """
+        response = await self.api.put('post/id/{}/feedback/like'.format(id))
+        return Response.de_json(response)
+
+    async def dislike(self, id: str) -> Response:
+        """
+        Removes like from a byte
+
+        :param id: Byte (post) id
+        :type id: str
+
+
+        :rtype: :class:`Response`
+        """
+        response = await self.api.delete(
+            'post/id/{}/feedback/like'.format(id)
+        )
+        return Response.de_json(response)
+
+    async def comment(self, id: str, text: str) -> Response:
+        """
+        Comments a byte
+
+        :param id: Byte (post) id
+        :type id: str
+
+        :param text: Comment text
+        :type id: str
+
+
+        :rtype: :class:`Response`, :class:`Comment`
+        """
+        response = await self.api.post(
+            'post/id/{}/feedback/comment'.format(id),
+            json_data={
+                'postID': id,
+                'body': text
+            }
+        )
+        response = Response.de_json(response)
+        data = None
+        error = None
+        if response.data is not None:
+            data = Comment.de_json(response.data, self.lazy,
+                                   self.account_map)
+        if response.error is not None:
+            error = response.error
+        return Response(response.success, data=data, error=error)
+
+    async def delete_comment(self, id: str) -> Response:
+        """
+        Deletes a comment
+
+        :param id: Comment id patterned by **{post id}-{comment id}**
+        :type id: str
+
+
+        :rtype: :class:`Response`
+        """
+        response = await self.api.post('feedback/comment/id/{}'.format(id),
+                                       json_data={
+                                           'commentID': id
+                                       },
+                                       idempotent=True)
+        return Response.de_json(response)
+
+    async def loop(self, id: str) -> Response:
+        """
+        Increments loop counter
+
+        :param id: Byte (post) id
+        :type id: str
+
+
+        :rtype: :class:`Response`
+        """
+        response = await self.api.post('post/id/{}/loop'.format(id))
+        response = Response.de_json(response)
+        data = None
+        error = None
+        if response.data is not None:
+            data = LoopCounter.de_json(response.data)
+        if response.error is not None:
+            error = response.error
+        return Response(response.success, data=data, error=error)
+
+    async def rebyte(self, id: str) -> Response:
+        """
+        Rebytes a byte
+
+        :param id: Byte (post) id
+        :type id: str
+
+
+        :rtype: :class:`Response`
+        """
+        response = await self.api.post('rebyte',
+                                       json_data={
+                                           'postID': id
+                                       })
+        response = Response.de_json(response)
+        data = None
+        error = None
+        if response.data is not None:
+            data = Rebyte.de_json(response.data, self.lazy,
+                                  self.account_map)
+        if response.error is not None:
+            error = response.error
+        return Response(response.success, data=data, error=error)
+
+    async def get_colors(self) -> Response:
+        """
+        Gets available color schemes
+
+
+        :rtype: :class:`Response`
+        """
+        response = await self.api.get('account/me/colors')
+        response = Response.de_json(response)
+        data = None
+        error = None
+        if response.data is not None:
+            data = Colors.de_json(response.data)
+        if response.error is not None:
+            error = response.error
+        return Response(response.success, data=data, error=error)
+
+    async def set_info(self, bio: str = None, display_name: str = None,
+                       username: str = None,
+                       color_scheme: int = None) -> Response:
+        """
+        Sets profile info
+
+        :param bio: New bio
+        :type bio: str
+
+        :param display_name: New name to display
+        :type display_name: str
+
+        :param username: New username
+        :type username: str
+
+        :param color_scheme: Id of new color scheme
+        :type color_scheme: int
+
+
+        :rtype: :class:`Response`
+        """
+        data = {}
+        if bio:
+            data['bio'] = bio
+        if display_name:
+            data['displayName'] = display_name
+        if username:
+            data['username'] = username
+        if color_scheme:
+            data['colorScheme'] = color_scheme
+        response = await self.api.put('account/me',
+                                      data=data)
+        return Response.de_json(response)
+
+    async def set_username(self, username: str) -> Response:
+        """
+        Sets username
+
+        :param username: New username
+        :type username: str
+
+
+        :rtype: :class:`Response`
+        """
+        return await self.set_info(username=username)
+
+    async def set_bio(self, bio: str) -> Response:
+        """
+        Sets bio
+
+        :param bio: New bio
+        :type bio: str
+
+
+        :rtype: :class:`Response`
+        """
+        return await self.set_info(bio=bio)
+
+    async def set_display_name(self, display_name: str) -> Response:
+        """
+        Sets name to display
+
+        :param display_name: New name to display
+        :type display_name: str
+
+
+        :rtype: :class:`Response`
+        """
+        return await self.set_info(display_name=display_name)
+
+    async def set_color_scheme(self, color_scheme: int) -> Response:
+        """
+        Sets color scheme
+
+        :param color_scheme: Id of new color scheme
+        :type color_scheme: str
+
+
+        :rtype: :class:`Response`
+        """
+        return await self.set_info(color_scheme=color_scheme)
+
+    async def _get_feed(self, url, cursor=None):
+        params = None
+        if cursor:
+            params = {'cursor': cursor}
+        response = await self.api.get(url, params)
+        if 'data' not in response:
+            return Response.de_json(response)
+        return Feed.de_json(response, self.lazy, self.account_map)
+
+    def _paginate(self, url, cursor, prefetch, max_pages):
+        from .feed import AsyncFeedPaginator
+
+        async def fetch(cursor):
+            response = await self._get_feed(url, cursor)
+            if response.error is not None:
+                raise ValueError(response.error.message)
+            return response.data
+        return AsyncFeedPaginator(fetch, cursor=cursor, prefetch=prefetch,
+                                  max_pages=max_pages)
+
+    async def get_timeline(self, cursor: str = None) -> Response:
+        """
+        Gets a page of the timeline
+
+        :param cursor: Cursor of the page, None for the first one
+        :type cursor: str
+
+
+        :rtype: :class:`Response`, :class:`Feed`
+        """
+        return await self._get_feed('timeline', cursor)
+
+    async def get_user_posts(self, id: str, cursor: str = None) -> Response:
+        """
+        Gets a page of user posts
+
+        :param id: User id
+        :type id: str
+
+        :param cursor: Cursor of the page, None for the first one
+        :type cursor: str
+
+
+        :rtype: :class:`Response`, :class:`Feed`
+        """
+        return await self._get_feed('account/id/{}/posts'.format(id), cursor)
+
+    async def get_category(self, name: str, cursor: str = None) -> Response:
+        """
+        Gets a page of a category feed
+
+        :param name: Category name
+        :type name: str
+
+        :param cursor: Cursor of the page, None for the first one
+        :type cursor: str
+
+
+        :rtype: :class:`Response`, :class:`Feed`
+        """
+        return await self._get_feed('categories/{}/feed'.format(name), cursor)
+
+    def iter_timeline(self, cursor: str = None, prefetch: bool = True,
+                      max_pages: int = None) -> 'AsyncFeedPaginator':
+        """
+        Iterates over timeline posts, following cursors
+
+        :param cursor: Cursor to resume from
+        :type cursor: str
+
+        :param prefetch: Fetch the next page while the current one
+            is consumed
+        :type prefetch: bool
+
+        :param max_pages: Stop after this many pages
+        :type max_pages: int
+
+
+        :rtype: :class:`AsyncFeedPaginator` of :class:`Post`
+        """
+        return self._paginate('timeline', cursor, prefetch, max_pages)
+
+    def iter_user_posts(self, id: str, cursor: str = None,
+                        prefetch: bool = True,
+                        max_pages: int = None) -> 'AsyncFeedPaginator':
+        """
+        Iterates over user posts, following cursors
+
+        :param id: User id
+        :type id: str
+
+        :param cursor: Cursor to resume from
+        :type cursor: str
+
+        :param prefetch: Fetch the next page while the current one
+            is consumed
+        :type prefetch: bool
+
+        :param max_pages: Stop after this many pages
+        :type max_pages: int
+
+
+        :rtype: :class:`AsyncFeedPaginator` of :class:`Post`
+        """
+        return self._paginate('account/id/{}/posts'.format(id),
+                              cursor, prefetch, max_pages)
+
+    def iter_category(self, name: str, cursor: str = None,
+                      prefetch: bool = True,
+                      max_pages: int = None) -> 'AsyncFeedPaginator':
+        """
+        Iterates over category feed posts, following cursors
+
+        :param name: Category name
+        :type name: str
+
+        :param cursor: Cursor to resume from
+        :type cursor: str
+
+        :param prefetch: Fetch the next page while the current one
+            is consumed
+        :type prefetch: bool
+
+        :param max_pages: Stop after this many pages
+        :type max_pages: int
+
+
+        :rtype: :class:`AsyncFeedPaginator` of :class:`Post`
+        """
+        return self._paginate('categories/{}/feed'.format(name),
+                              cursor, prefetch, max_pages)
@@ -0,0 +1,138 @@
+import collections
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class BulkResult(object):
+    """
+    Outcome of a single call of a bulk operation
+
+    :param id: Id the call was made for
+    :type id: str
+
+    :param response: Call result, None if the call raised
+    :type response: :class:`Response`
+
+    :param error: Exception raised by the call, None on success
+    :type error: Exception
+    """
+
+    def __init__(self, id: str, response=None, error=None):
+        self.id = id
+        self.response = response
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BulkStats(object):
+    """
+    Aggregate counters of a bulk operation, updated while it runs
+    """
+
+    def __init__(self):
+        self.succeeded = 0
+        self.failed = 0
+        self.started = None
+        self.finished = None
+
+    @property
+    def total(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """
+        Completed calls per second
+        """
+        elapsed = self.elapsed
+        if not elapsed:
+            return 0.0
+        return self.total / elapsed
+
+
+class BulkOperation(object):
+    """
+    Runs ``func`` for every id on a bounded pool of worker threads.
+    Iterating yields a :class:`BulkResult` per id; errors of single calls
+    are stored in results instead of aborting the batch
+
+    :param func: Callable taking one id
+    :param ids: Iterable of ids, consumed lazily
+
+    :param workers: Number of worker threads
+    :type workers: int
+
+    :param ordered: Yield results in input order instead of completion order
+    :type ordered: bool
+    """
+
+    def __init__(self, func, ids, workers: int = 8, ordered: bool = False):
+        if workers < 1:
+            raise ValueError('workers must be a positive number')
+        self.func = func
+        self.ids = ids
+        self.workers = workers
+        self.ordered = ordered
+        self.stats = BulkStats()
+        self._lock = threading.Lock()
+
+    def _call(self, id):
+        try:
+            result = BulkResult(id, response=self.func(id))
+        except Exception as e:
+            result = BulkResult(id, error=e)
+        with self._lock:
+            if result.ok:
+                self.stats.succeeded += 1
+            else:
+                self.stats.failed += 1
+        return result
+
+    def __iter__(self):
+        ids = iter(self.ids)
+        # Keeps at most two calls per worker queued, so huge id lists
+        # are never materialized as futures all at once
+        limit = self.workers * 2
+        self.stats.started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            if self.ordered:
+                pending = collections.deque()
+                for id in ids:
+                    pending.append(executor.submit(self._call, id))
+                    if len(pending) >= limit:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            else:
+                pending = set()
+                for id in ids:
+                    pending.add(executor.submit(self._call, id))
+                    if len(pending) >= limit:
+                        done, pending = wait(pending,
+                                             return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield future.result()
+                while pending:
+                    done, pending = wait(pending,
+                                         return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+        self.stats.finished = time.monotonic()
+
+    def results(self) -> list:
+        """
+        Runs the operation to the end
+
+        :rtype: list of :class:`BulkResult`
+        """
+        return list(self)
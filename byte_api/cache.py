@@ -0,0 +1,247 @@
+import collections
+import re
+import threading
+import time
+
+
+DEFAULT_TTLS = {
+    'account/me/colors': 3600,
+    'account/id/{}': 60
+}
+
+# Cached reads a write changes besides its own path and parents, by the
+# path of the write, as (endpoint template, key of the response data
+# filling its {}). Profile writes through account/me answer with the
+# account of the caller, whose profile is cached by id
+WRITE_INVALIDATES = {
+    'account/me': (('account/id/{}', 'id'),)
+}
+
+
+def compile_path(template: str):
+    """
+    Compiles an endpoint template like ``post/id/{}/loop``, where ``{}``
+    matches one path segment, into a regular expression
+    """
+    parts = template.strip('/').split('{}')
+    return re.compile('^{}$'.format('[^/]+'.join(map(re.escape, parts))))
+
+
+class CacheEntry(object):
+    """
+    Decoded response stored in a cache
+
+    :param data: Decoded JSON response, shared between hits and
+        not meant to be modified
+    :param etag: ETag header of the response, used for revalidation
+    :type etag: str
+
+    :param expires: Monotonic time the entry stops being fresh at
+    :type expires: float
+    """
+
+    __slots__ = ('path', 'data', 'etag', 'expires')
+
+    def __init__(self, path: str, data, etag: str, expires: float):
+        self.path = path
+        self.data = data
+        self.etag = etag
+        self.expires = expires
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires
+
+
+class BaseCache(object):
+    """
+    Interface of response caches used by :class:`Api` for GET requests.
+    Paths are API urls without the base url, e.g. ``account/id/{id}``
+    """
+
+    def ttl_for(self, path: str) -> float:
+        """
+        Seconds a response of ``path`` stays fresh, 0 disables caching
+        """
+        raise NotImplementedError
+
+    def get(self, key):
+        """
+        Returns the stored :class:`CacheEntry`, fresh or stale, or None
+        """
+        raise NotImplementedError
+
+    def set(self, key, entry: CacheEntry):
+        raise NotImplementedError
+
+    def invalidate(self, path: str):
+        """
+        Drops every entry of ``path`` regardless of request params
+        """
+        raise NotImplementedError
+
+    def invalidate_matching(self, template: str):
+        """
+        Drops every entry of paths matching an endpoint template, see
+        :func:`compile_path`. Caches that cannot match paths drop all
+        entries
+        """
+        self.clear()
+
+    def clear(self):
+        raise NotImplementedError
+
+    @staticmethod
+    def make_key(path: str, params=None):
+        if not params:
+            return path, ()
+        return path, tuple(sorted(params.items()))
+
+    def lookup(self, path: str, params=None):
+        """
+        Returns the cache key and the stored entry of a GET request,
+        the key is None when ``path`` is not cached at all
+        """
+        if self.ttl_for(path) <= 0:
+            return None, None
+        key = self.make_key(path, params)
+        return key, self.get(key)
+
+    def store(self, key, path: str, data, etag: str = None):
+        self.set(key, CacheEntry(path, data, etag,
+                                 time.monotonic() + self.ttl_for(path)))
+
+    def revalidated(self, key, entry: CacheEntry):
+        """
+        Marks a stale entry fresh again after a 304 response
+        """
+        self.store(key, entry.path, entry.data, entry.etag)
+
+    def invalidate_write(self, path: str, response=None):
+        """
+        Drops entries a write to ``path`` may have changed: the path
+        itself and all of its parents, so a write to
+        ``account/id/{id}/follow`` invalidates ``account/id/{id}``,
+        and the reads listed in :data:`WRITE_INVALIDATES`
+
+        :param response: Decoded JSON response of the write, None if it
+            failed. Reads of :data:`WRITE_INVALIDATES` whose path cannot
+            be filled from its data are dropped for every value
+        """
+        parts = path.strip('/').split('/')
+        for i in range(len(parts), 0, -1):
+            self.invalidate('/'.join(parts[:i]))
+        data = response.get('data') if isinstance(response, dict) else None
+        for template, key in WRITE_INVALIDATES.get('/'.join(parts), ()):
+            value = data.get(key) if isinstance(data, dict) else None
+            if value is not None:
+                self.invalidate(template.format(value))
+            else:
+                self.invalidate_matching(template)
+
+
+class MemoryCache(BaseCache):
+    """
+    Thread-safe in-memory LRU cache with per-endpoint TTLs
+
+    :param maxsize: Maximum number of stored responses
+    :type maxsize: int
+
+    :param ttls: Seconds responses stay fresh by endpoint template, where
+        ``{}`` matches one path segment. Defaults to :data:`DEFAULT_TTLS`
+    :type ttls: dict
+
+    :param default_ttl: TTL of paths matching no template, 0 disables
+        caching of them
+    :type default_ttl: float
+    """
+
+    def __init__(self, maxsize: int = 1024, ttls: dict = None,
+                 default_ttl: float = 0):
+        if maxsize < 1:
+            raise ValueError('maxsize must be a positive number')
+        self.maxsize = maxsize
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self._patterns = [
+            (compile_path(template), ttl)
+            for template, ttl in self.ttls.items()
+        ]
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._paths = {}
+        self._lock = threading.Lock()
+
+    def ttl_for(self, path):
+        for pattern, ttl in self._patterns:
+            if pattern.match(path):
+                return ttl
+        return self.default_ttl
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry.fresh:
+                    self.hits += 1
+                    return entry
+            self.misses += 1
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = entry
+            self._paths.setdefault(entry.path, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                old_key, old = self._entries.popitem(last=False)
+                self._forget(old_key, old.path)
+                self.evictions += 1
+
+    def revalidated(self, key, entry):
+        with self._lock:
+            self.revalidations += 1
+        super().revalidated(key, entry)
+
+    def _forget(self, key, path):
+        keys = self._paths.get(path)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._paths[path]
+
+    def invalidate(self, path):
+        with self._lock:
+            for key in self._paths.pop(path, ()):
+                self._entries.pop(key, None)
+
+    def invalidate_matching(self, template):
+        pattern = compile_path(template)
+        with self._lock:
+            for path in [path for path in self._paths
+                         if pattern.match(path)]:
+                for key in self._paths.pop(path):
+                    self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._paths.clear()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'evictions': self.evictions
+        }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,286 @@
+import array
+import collections
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from urllib.parse import urlencode
+
+
+MAGIC = b'BYTECAS1'
+INDEX_MAGIC = b'BYTEIDX1'
+
+# Record header: flags, key size, status, headers size, body size and
+# network time of the original response in seconds
+RECORD = struct.Struct('<BHHHId')
+# Index entry header: key size and number of its records
+INDEX_ENTRY = struct.Struct('<HI')
+# Trailer: offset of the index and its magic
+TRAILER = struct.Struct('<Q8s')
+
+COMPRESSED = 1
+
+# Response headers worth keeping, the rest is dropped to stay compact
+HEADERS = ('ETag', 'Retry-After')
+
+
+class CassetteError(ValueError):
+    """
+    Raised when a replayed request was never recorded, or a cassette
+    file is damaged
+    """
+
+
+def request_key(method: str, path: str, params=None) -> bytes:
+    key = method + ' ' + path.strip('/')
+    if params:
+        key += '?' + urlencode(sorted(params.items()))
+    return key.encode('utf-8')
+
+
+class ReplayResponse(object):
+    """
+    Recorded response exposing the parts of :class:`requests.Response`
+    and :class:`aiohttp.ClientResponse` used by the API
+    """
+
+    __slots__ = ('status_code', 'headers', 'content')
+
+    def __init__(self, status: int, headers: dict, content: bytes):
+        self.status_code = status
+        self.headers = headers
+        self.content = content
+
+    @property
+    def status(self) -> int:
+        return self.status_code
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def iter_content(self, chunk_size: int = 1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class CassetteRecorder(object):
+    """
+    Records responses of an API to a cassette file. Every record keeps
+    the request method, path and params, the response status, ETag and
+    Retry-After headers, the body and the original network time
+
+    :param path: File to write, replaced if it exists
+    :type path: str
+
+    :param compress: Compress bodies with zlib when it saves space
+    :type compress: bool
+    """
+
+    replaying = False
+
+    def __init__(self, path: str, compress: bool = True):
+        self.path = path
+        self.compress = compress
+        self.count = 0
+        self._index = collections.OrderedDict()
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._lock = threading.Lock()
+
+    def record(self, method: str, path: str, params, status: int,
+               headers, body: bytes, elapsed: float):
+        key = request_key(method, path, params)
+        kept = {
+            name: headers[name] for name in HEADERS
+            if headers.get(name) is not None
+        }
+        encoded_headers = json.dumps(kept).encode('utf-8') if kept else b''
+        flags = 0
+        if self.compress and len(body) > 64:
+            compressed = zlib.compress(body, 6)
+            if len(compressed) < len(body):
+                body = compressed
+                flags |= COMPRESSED
+        header = RECORD.pack(flags, len(key), status, len(encoded_headers),
+                             len(body), elapsed)
+        with self._lock:
+            if self._file is None:
+                raise CassetteError('cassette is closed')
+            offset = self._file.tell()
+            self._file.write(header)
+            self._file.write(key)
+            self._file.write(encoded_headers)
+            self._file.write(body)
+            self._index.setdefault(key, []).append(offset)
+            self.count += 1
+
+    def close(self):
+        """
+        Writes the index and closes the file
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            index_offset = self._file.tell()
+            for key, offsets in self._index.items():
+                self._file.write(INDEX_ENTRY.pack(len(key), len(offsets)))
+                self._file.write(key)
+                self._file.write(array.array('Q', offsets).tobytes())
+            self._file.write(TRAILER.pack(index_offset, INDEX_MAGIC))
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CassettePlayer(object):
+    """
+    Serves responses recorded by :class:`CassetteRecorder` instead of
+    sending requests. The file is memory-mapped and looked up through
+    its index, so bodies are read only when replayed. Responses recorded
+    for the same request are replayed in the recorded order; once they
+    run out the player starts over, or keeps returning the last one
+    if ``cycle`` is False
+
+    :param path: Cassette file
+    :type path: str
+
+    :param timing: Wait for the original network time of every response
+    :type timing: bool
+
+    :param speed: Divides waits of ``timing``, 2 replays twice as fast
+    :type speed: float
+
+    :param cycle: Start over when recorded responses of a request run out
+    :type cycle: bool
+    """
+
+    replaying = True
+
+    def __init__(self, path: str, timing: bool = False, speed: float = 1.0,
+                 cycle: bool = True):
+        self.path = path
+        self.timing = timing
+        self.speed = speed
+        self.cycle = cycle
+        self.played = 0
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC):
+            self._file.close()
+            raise CassetteError('{} is not a cassette'.format(path))
+        self._map = mmap.mmap(self._file.fileno(), 0,
+                              access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise CassetteError('{} is not a cassette'.format(path))
+        self._index = self._read_index(size)
+        self._positions = dict.fromkeys(self._index, 0)
+        self._lock = threading.Lock()
+
+    def _read_index(self, size):
+        data = self._map
+        index = {}
+        if size >= len(MAGIC) + TRAILER.size:
+            index_offset, magic = TRAILER.unpack_from(data,
+                                                      size - TRAILER.size)
+            if magic == INDEX_MAGIC:
+                pos = index_offset
+                end = size - TRAILER.size
+                while pos < end:
+                    key_size, count = INDEX_ENTRY.unpack_from(data, pos)
+                    pos += INDEX_ENTRY.size
+                    key = data[pos:pos + key_size]
+                    pos += key_size
+                    offsets = array.array('Q')
+                    offsets.frombytes(data[pos:pos + count * 8])
+                    pos += count * 8
+                    index[key] = offsets
+                return index
+        # Not closed properly, rebuilds the index from record headers
+        # and ignores a partially written last record
+        pos = len(MAGIC)
+        while pos + RECORD.size <= size:
+            _, key_size, _, headers_size, body_size, _ = \
+                RECORD.unpack_from(data, pos)
+            end = pos + RECORD.size + key_size + headers_size + body_size
+            if end > size:
+                break
+            key = data[pos + RECORD.size:pos + RECORD.size + key_size]
+            index.setdefault(key, array.array('Q')).append(pos)
+            pos = end
+        return index
+
+    def __len__(self):
+        return sum(map(len, self._index.values()))
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def play(self, method: str, path: str, params=None):
+        """
+        Returns the next recorded response of a request and seconds to
+        wait before using it
+
+        :raises CassetteError: If the request was not recorded
+        """
+        key = request_key(method, path, params)
+        offsets = self._index.get(key)
+        if offsets is None:
+            raise CassetteError('{} was not recorded'.format(
+                key.decode('utf-8')
+            ))
+        with self._lock:
+            position = self._positions[key]
+            if position < len(offsets) - 1 or self.cycle:
+                self._positions[key] = (position + 1) % len(offsets)
+            self.played += 1
+        return self.read(offsets[position])
+
+    def read(self, offset: int):
+        data = self._map
+        flags, key_size, status, headers_size, body_size, elapsed = \
+            RECORD.unpack_from(data, offset)
+        pos = offset + RECORD.size + key_size
+        headers = {}
+        if headers_size:
+            headers = json.loads(data[pos:pos + headers_size].decode('utf-8'))
+        pos += headers_size
+        body = data[pos:pos + body_size]
+        if flags & COMPRESSED:
+            body = zlib.decompress(body)
+        delay = elapsed / self.speed if self.timing else 0.0
+        return ReplayResponse(status, headers, body), delay
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_cassette(path: str, mode: str = 'replay', **kwargs):
+    """
+    Opens a cassette for ``'record'`` or ``'replay'``
+    """
+    if mode == 'record':
+        return CassetteRecorder(path, **kwargs)
+    if mode == 'replay':
+        return CassettePlayer(path, **kwargs)
+    raise ValueError('unknown cassette mode {!r}'.format(mode))
@@ -1,4 +1,7 @@
 from .api import Api
+from .cache import MemoryCache
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
 from .types import *
 
 
@@ -11,16 +14,154 @@ class Client(object):
 
     :param headers: Additional headers **except Authorization**
     :type headers: dict
+
+    :param pool_connections: Number of per-host connection pools to cache
+    :type pool_connections: int
+
+    :param pool_maxsize: Maximum number of kept-alive connections per host
+    :type pool_maxsize: int
+
+    :param pool_block: Block when the pool is exhausted instead of opening
+        extra throwaway connections
+    :type pool_block: bool
+
+    :param keep_alive: Reuse connections between requests
+    :type keep_alive: bool
+
+    :param lazy: Decode fields of returned posts, accounts and comments
+        on first access instead of upfront
+    :type lazy: bool
+
+    :param account_map: Identity map resolving decoded accounts to shared
+        instances, True creates one for this client
+    :type account_map: :class:`AccountMap` or bool
+
+    :param cache: Response cache for read endpoints, True creates
+        a :class:`MemoryCache` with default TTLs
+    :type cache: :class:`BaseCache` or bool
+
+    :param rate_limiter: Limiter pacing every call of the client, a number
+        creates a :class:`RateLimiter` allowing that many calls per second,
+        True creates one with default rates
+    :type rate_limiter: :class:`RateLimiter`, float or bool
+
+    :param retry_policy: Policy retrying failed idempotent calls, True
+        creates a :class:`RetryPolicy` with default settings
+    :type retry_policy: :class:`RetryPolicy` or bool
+
+    :param decoder: JSON decoder, ``'orjson'``, ``'ujson'``, ``'json'`` or
+        a callable taking bytes. Defaults to the fastest one installed
+    :type decoder: str or callable
+
+    :param coalesce: Share one in-flight request between concurrent
+        identical GET calls
+    :type coalesce: bool
+
+    :param base_url: Base url of the API, e.g. of a local
+        :class:`byte_api.stub.StubServer`. Defaults to https://api.byte.co/
+    :type base_url: str
+
+    :param hooks: Callbacks of request events by event name,
+        ``before_request``, ``after_response`` or ``on_error``, each
+        a callable or a list of them taking a :class:`RequestEvent`
+    :type hooks: dict
+
+    :param metrics: Collector of per-endpoint request metrics, True
+        creates a :class:`MetricsCollector`
+    :type metrics: :class:`MetricsCollector` or bool
+
+    :param cassette: :class:`CassetteRecorder` recording responses or
+        :class:`CassettePlayer` replaying them instead of sending requests
+
+    :param store: Persistent store of accounts, posts and comments, read
+        before sending requests for accounts. A path opens a
+        :class:`RecordStore` in that file, closed with the client
+    :type store: :class:`RecordStore` or str
     """
 
-    def __init__(self, token: str, headers=None):
+    def __init__(self, token: str, headers=None, pool_connections: int = 10,
+                 pool_maxsize: int = 10, pool_block: bool = False,
+                 keep_alive: bool = True, lazy: bool = False,
+                 account_map=None, cache=None,
+                 rate_limiter=None, retry_policy=None, decoder=None,
+                 coalesce: bool = True, base_url: str = None,
+                 hooks: dict = None, metrics=None, cassette=None,
+                 store=None):
         """
         Initializes the API for the client
 
         :param token: Authorization token
         :type token: str
         """
-        self.api = Api(token, headers)
+        if cache is True:
+            cache = MemoryCache()
+        elif cache is False:
+            cache = None
+        if rate_limiter is True:
+            rate_limiter = RateLimiter()
+        elif isinstance(rate_limiter, (int, float)) and rate_limiter:
+            rate_limiter = RateLimiter(rate_limiter)
+        elif not rate_limiter:
+            rate_limiter = None
+        if retry_policy is True:
+            retry_policy = RetryPolicy()
+        elif retry_policy is False:
+            retry_policy = None
+        self.api = Api(token, headers,
+                       pool_connections=pool_connections,
+                       pool_maxsize=pool_maxsize,
+                       pool_block=pool_block,
+                       keep_alive=keep_alive,
+                       cache=cache,
+                       rate_limiter=rate_limiter,
+                       retry_policy=retry_policy,
+                       decoder=decoder,
+                       coalesce=coalesce,
+                       base_url=base_url,
+                       cassette=cassette)
+        for event, funcs in (hooks or {}).items():
+            if callable(funcs):
+                funcs = [funcs]
+            for func in funcs:
+                self.api.hooks.add(event, func)
+        if metrics is True:
+            from .metrics import MetricsCollector
+            metrics = MetricsCollector()
+        elif metrics is False:
+            metrics = None
+        if metrics is not None:
+            metrics.install(self.api)
+        self.metrics = metrics
+        self.lazy = lazy
+        if account_map is True:
+            account_map = AccountMap()
+        elif account_map is False:
+            account_map = None
+        self.account_map = account_map
+        self._owns_store = isinstance(store, str) or store is True
+        if self._owns_store:
+            from .store import RecordStore
+            store = RecordStore() if store is True else RecordStore(store)
+        elif store is False:
+            store = None
+        self.store = store
+        self._loop_aggregators = []
+
+    def close(self):
+        """
+        Flushes loop aggregators and closes pooled connections of the client
+        """
+        while self._loop_aggregators:
+            self._loop_aggregators.pop().close()
+        if self._owns_store:
+            self.store.close()
+        self.api.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def follow(self, id: str) -> Response:
         """
@@ -58,14 +199,25 @@ class Client(object):
 
         :rtype: :class:`Response`, :class:`Account`
         """
+        if self.store is not None:
+            account = self.store.get('account', id, lazy=self.lazy,
+                                     account_map=self.account_map)
+            if account is not None:
+                return Response(1, data=account)
+        return self._fetch_user(id)
+
+    def _fetch_user(self, id):
         response = self.api.get('account/id/{}'.format(id))
         response = Response.de_json(response)
         data = None
         error = None
-        if hasattr(response, 'data'):
-            data = Account.de_json(response.data)
-        if hasattr(response, 'error'):
-            error = Error.de_json(response.error)
+        if response.data is not None:
+            data = Account.de_json(response.data, self.lazy,
+                                   self.account_map)
+            if self.store is not None:
+                self.store.put('account', response.data)
+        if response.error is not None:
+            error = response.error
         return Response(response.success, data=data, error=error)
 
     def like(self, id: str) -> Response:
@@ -115,10 +267,13 @@ class Client(object):
         response = Response.de_json(response)
         data = None
         error = None
-        if hasattr(response, 'data'):
-            data = Comment.de_json(response.data)
-        if hasattr(response, 'error'):
-            error = Error.de_json(response.error)
+        if response.data is not None:
+            data = Comment.de_json(response.data, self.lazy,
+                                   self.account_map)
+            if self.store is not None:
+                self.store.put('comment', response.data)
+        if response.error is not None:
+            error = response.error
         return Response(response.success, data=data, error=error)
 
     def delete_comment(self, id: str) -> Response:
@@ -134,8 +289,8 @@ class Client(object):
         response = self.api.post('feedback/comment/id/{}'.format(id),
                                  json_data={
                                      'commentID': id
-                                 })
-        response = Response.de_json(response)
+                                 },
+                                 idempotent=True)
         return Response.de_json(response)
 
     def loop(self, id: str) -> Response:
@@ -152,15 +307,49 @@ class Client(object):
         response = Response.de_json(response)
         data = None
         error = None
-        if hasattr(response, 'data'):
+        if response.data is not None:
             data = LoopCounter.de_json(response.data)
-        if hasattr(response, 'error'):
-            error = Error.de_json(response.error)
+        if response.error is not None:
+            error = response.error
         return Response(response.success, data=data, error=error)
 
+    def loop_aggregator(self, interval: float = 1.0, batch_size: int = 100,
+                        max_posts: int = 10000, workers: int = None,
+                        on_flush=None) -> 'LoopAggregator':
+        """
+        Creates a background aggregator of loop increments, flushed when
+        the client is closed
+
+        :param interval: Seconds between flushes
+        :type interval: float
+
+        :param batch_size: Pending increments triggering an early flush
+        :type batch_size: int
+
+        :param max_posts: Maximum number of distinct pending posts
+        :type max_posts: int
+
+        :param workers: Number of concurrent calls of a flush, defaults to
+            the connection pool size
+        :type workers: int
+
+        :param on_flush: Called with every received :class:`LoopCounter`
+
+        :rtype: :class:`LoopAggregator`
+        """
+        if workers is None:
+            workers = self.api.pool_maxsize
+        from .loops import LoopAggregator
+        aggregator = LoopAggregator(self.loop, interval=interval,
+                                    batch_size=batch_size,
+                                    max_posts=max_posts, workers=workers,
+                                    on_flush=on_flush)
+        self._loop_aggregators.append(aggregator)
+        return aggregator
+
     def rebyte(self, id: str) -> Response:
         """
-        Increments loop counter
+        Rebytes a byte
 
         :param id: Byte (post) id
         :type id: str
@@ -175,9 +364,10 @@ class Client(object):
         response = Response.de_json(response)
         data = None
         error = None
-        if hasattr(response, 'data'):
-            data = Rebyte.de_json(response.data)
-        if hasattr(response, 'error'):
+        if response.data is not None:
+            data = Rebyte.de_json(response.data, self.lazy,
+                                  self.account_map)
+        if response.error is not None:
             error = response.error
         return Response(response.success, data=data, error=error)
 
@@ -192,9 +382,9 @@ class Client(object):
         response = Response.de_json(response)
         data = None
         error = None
-        if hasattr(response, 'data'):
+        if response.data is not None:
             data = Colors.de_json(response.data)
-        if hasattr(response, 'error'):
+        if response.error is not None:
             error = response.error
         return Response(response.success, data=data, error=error)
 
@@ -278,3 +468,424 @@ class Client(object):
         :rtype: :class:`Response`
         """
         return self.set_info(color_scheme=color_scheme)
+
+    def _get_feed(self, url, cursor=None):
+        params = None
+        if cursor:
+            params = {'cursor': cursor}
+        response = self.api.get(url, params)
+        if 'data' not in response:
+            return Response.de_json(response)
+        feed = Feed.de_json(response, self.lazy, self.account_map)
+        if self.store is not None:
+            self._store_feed(response['data'])
+        return feed
+
+    def _store_feed(self, data):
+        posts = data['posts']
+        self.store.put_batch({
+            'post': posts,
+            'comment': [comment for post in posts
+                        for comment in post.get('comments') or ()],
+            'account': list((data.get('accounts') or {}).values())
+        })
+
+    def _feed_fetcher(self, url):
+        def fetch(cursor):
+            response = self._get_feed(url, cursor)
+            if response.error is not None:
+                raise ValueError(response.error.message)
+            return response.data
+        return fetch
+
+    def _paginate(self, url, cursor, prefetch, max_pages):
+        from .feed import FeedPaginator
+        return FeedPaginator(self._feed_fetcher(url), cursor=cursor,
+                             prefetch=prefetch, max_pages=max_pages)
+
+    def get_timeline(self, cursor: str = None) -> Response:
+        """
+        Gets a page of the timeline
+
+        :param cursor: Cursor of the page, None for the first one
+        :type cursor: str
+
+
+        :rtype: :class:`Response`, :class:`Feed`
+        """
+        return self._get_feed('timeline', cursor)
+
+    def get_user_posts(self, id: str, cursor: str = None) -> Response:
+        """
+        Gets a page of user posts
+
+        :param id: User id
+        :type id: str
+
+        :param cursor: Cursor of the page, None for the first one
+        :type cursor: str
+
+
+        :rtype: :class:`Response`, :class:`Feed`
+        """
+        return self._get_feed('account/id/{}/posts'.format(id), cursor)
+
+    def get_category(self, name: str, cursor: str = None) -> Response:
+        """
+        Gets a page of a category feed
+
+        :param name: Category name
+        :type name: str
+
+        :param cursor: Cursor of the page, None for the first one
+        :type cursor: str
+
+
+        :rtype: :class:`Response`, :class:`Feed`
+        """
+        return self._get_feed('categories/{}/feed'.format(name), cursor)
+
+    def iter_timeline(self, cursor: str = None, prefetch: bool = True,
+                      max_pages: int = None) -> 'FeedPaginator':
+        """
+        Iterates over timeline posts, following cursors
+
+        :param cursor: Cursor to resume from
+        :type cursor: str
+
+        :param prefetch: Fetch the next page while the current one
+            is consumed
+        :type prefetch: bool
+
+        :param max_pages: Stop after this many pages
+        :type max_pages: int
+
+
+        :rtype: :class:`FeedPaginator` of :class:`Post`
+        """
+        return self._paginate('timeline', cursor, prefetch, max_pages)
+
+    def iter_user_posts(self, id: str, cursor: str = None,
+                        prefetch: bool = True,
+                        max_pages: int = None) -> 'FeedPaginator':
+        """
+        Iterates over user posts, following cursors
+
+        :param id: User id
+        :type id: str
+
+        :param cursor: Cursor to resume from
+        :type cursor: str
+
+        :param prefetch: Fetch the next page while the current one
+            is consumed
+        :type prefetch: bool
+
+        :param max_pages: Stop after this many pages
+        :type max_pages: int
+
+
+        :rtype: :class:`FeedPaginator` of :class:`Post`
+        """
+        return self._paginate('account/id/{}/posts'.format(id),
+                              cursor, prefetch, max_pages)
+
+    def iter_category(self, name: str, cursor: str = None,
+                      prefetch: bool = True,
+                      max_pages: int = None) -> 'FeedPaginator':
+        """
+        Iterates over category feed posts, following cursors
+
+        :param name: Category name
+        :type name: str
+
+        :param cursor: Cursor to resume from
+        :type cursor: str
+
+        :param prefetch: Fetch the next page while the current one
+            is consumed
+        :type prefetch: bool
+
+        :param max_pages: Stop after this many pages
+        :type max_pages: int
+
+
+        :rtype: :class:`FeedPaginator` of :class:`Post`
+        """
+        return self._paginate('categories/{}/feed'.format(name),
+                              cursor, prefetch, max_pages)
+
+    def _stream_feed(self, url, cursor):
+        params = None
+        if cursor:
+            params = {'cursor': cursor}
+        from .streaming import FeedStream
+        return FeedStream(self.api.stream(url, params), self.lazy,
+                          self.account_map, self.api.loads)
+
+    def stream_timeline(self, cursor: str = None) -> 'FeedStream':
+        """
+        Streams a page of the timeline, yielding posts while
+        the response is still being received
+
+        :param cursor: Cursor of the page, None for the first one
+        :type cursor: str
+
+
+        :rtype: :class:`FeedStream` of :class:`Post`
+        """
+        return self._stream_feed('timeline', cursor)
+
+    def stream_user_posts(self, id: str, cursor: str = None) -> 'FeedStream':
+        """
+        Streams a page of user posts, yielding posts while
+        the response is still being received
+
+        :param id: User id
+        :type id: str
+
+        :param cursor: Cursor of the page, None for the first one
+        :type cursor: str
+
+
+        :rtype: :class:`FeedStream` of :class:`Post`
+        """
+        return self._stream_feed('account/id/{}/posts'.format(id), cursor)
+
+    def stream_category(self, name: str, cursor: str = None) -> 'FeedStream':
+        """
+        Streams a page of a category feed, yielding posts while
+        the response is still being received
+
+        :param name: Category name
+        :type name: str
+
+        :param cursor: Cursor of the page, None for the first one
+        :type cursor: str
+
+
+        :rtype: :class:`FeedStream` of :class:`Post`
+        """
+        return self._stream_feed('categories/{}/feed'.format(name), cursor)
+
+    def _sync(self, url, path, kwargs):
+        from .sync import FeedSync
+        return FeedSync(self._feed_fetcher(url), path, **kwargs)
+
+    def sync_timeline(self, path: str = None, **kwargs) -> 'FeedSync':
+        """
+        Creates an incremental sync of the timeline, iterating over it
+        yields posts that are new or changed since the previous run
+
+        :param path: File the sync state is saved to and resumed from
+        :type path: str
+
+        :param kwargs: Options of :class:`FeedSync`
+
+
+        :rtype: :class:`FeedSync`
+        """
+        return self._sync('timeline', path, kwargs)
+
+    def sync_user_posts(self, id: str, path: str = None,
+                        **kwargs) -> 'FeedSync':
+        """
+        Creates an incremental sync of user posts, iterating over it
+        yields posts that are new or changed since the previous run
+
+        :param id: User id
+        :type id: str
+
+        :param path: File the sync state is saved to and resumed from
+        :type path: str
+
+        :param kwargs: Options of :class:`FeedSync`
+
+
+        :rtype: :class:`FeedSync`
+        """
+        return self._sync('account/id/{}/posts'.format(id), path, kwargs)
+
+    def sync_category(self, name: str, path: str = None,
+                      **kwargs) -> 'FeedSync':
+        """
+        Creates an incremental sync of a category feed, iterating over it
+        yields posts that are new or changed since the previous run
+
+        :param name: Category name
+        :type name: str
+
+        :param path: File the sync state is saved to and resumed from
+        :type path: str
+
+        :param kwargs: Options of :class:`FeedSync`
+
+
+        :rtype: :class:`FeedSync`
+        """
+        return self._sync('categories/{}/feed'.format(name), path,
+                          kwargs)
+
+    def _columns(self, url, cursor, max_pages, columns):
+        if columns is None:
+            from .columnar import FeedColumns
+            columns = FeedColumns()
+        pages = 0
+        while max_pages is None or pages < max_pages:
+            params = None
+            if cursor:
+                params = {'cursor': cursor}
+            added = columns.append(self.api.get(url, params))
+            pages += 1
+            if not added or not columns.cursor or columns.cursor == cursor:
+                break
+            cursor = columns.cursor
+        return columns
+
+    def timeline_columns(self, cursor: str = None, max_pages: int = None,
+                         columns: 'FeedColumns' = None) -> 'FeedColumns':
+        """
+        Reads timeline posts into columns, following cursors
+
+        :param cursor: Cursor to resume from
+        :type cursor: str
+
+        :param max_pages: Stop after this many pages
+        :type max_pages: int
+
+        :param columns: Columns to append to, new ones by default
+        :type columns: :class:`FeedColumns`
+
+
+        :rtype: :class:`FeedColumns`
+        """
+        return self._columns('timeline', cursor, max_pages, columns)
+
+    def user_posts_columns(self, id: str, cursor: str = None,
+                           max_pages: int = None,
+                           columns: 'FeedColumns' = None) -> 'FeedColumns':
+        """
+        Reads user posts into columns, following cursors
+
+        :param id: User id
+        :type id: str
+
+        :param cursor: Cursor to resume from
+        :type cursor: str
+
+        :param max_pages: Stop after this many pages
+        :type max_pages: int
+
+        :param columns: Columns to append to, new ones by default
+        :type columns: :class:`FeedColumns`
+
+
+        :rtype: :class:`FeedColumns`
+        """
+        return self._columns('account/id/{}/posts'.format(id), cursor,
+                             max_pages, columns)
+
+    def category_columns(self, name: str, cursor: str = None,
+                         max_pages: int = None,
+                         columns: 'FeedColumns' = None) -> 'FeedColumns':
+        """
+        Reads category feed posts into columns, following cursors
+
+        :param name: Category name
+        :type name: str
+
+        :param cursor: Cursor to resume from
+        :type cursor: str
+
+        :param max_pages: Stop after this many pages
+        :type max_pages: int
+
+        :param columns: Columns to append to, new ones by default
+        :type columns: :class:`FeedColumns`
+
+
+        :rtype: :class:`FeedColumns`
+        """
+        return self._columns('categories/{}/feed'.format(name), cursor,
+                             max_pages, columns)
+
+    def _bulk(self, func, ids, workers, ordered):
+        if workers is None:
+            workers = self.api.pool_maxsize
+        from .bulk import BulkOperation
+        return BulkOperation(func, ids, workers=workers, ordered=ordered)
+
+    def like_many(self, ids, workers: int = None,
+                  ordered: bool = False) -> 'BulkOperation':
+        """
+        Likes many bytes concurrently
+
+        :param ids: Byte (post) ids
+        :type ids: iterable of str
+
+        :param workers: Number of concurrent calls, defaults to
+            the connection pool size
+        :type workers: int
+
+        :param ordered: Yield results in input order instead of
+            completion order
+        :type ordered: bool
+
+
+        :rtype: :class:`BulkOperation` of :class:`BulkResult`
+        """
+        return self._bulk(self.like, ids, workers, ordered)
+
+    def follow_many(self, ids, workers: int = None,
+                    ordered: bool = False) -> 'BulkOperation':
+        """
+        Subscribes to many users concurrently
+
+        :param ids: User ids
+        :type ids: iterable of str
+
+        :param workers: Number of concurrent calls, defaults to
+            the connection pool size
+        :type workers: int
+
+        :param ordered: Yield results in input order instead of
+            completion order
+        :type ordered: bool
+
+
+        :rtype: :class:`BulkOperation` of :class:`BulkResult`
+        """
+        return self._bulk(self.follow, ids, workers, ordered)
+
+    def get_users(self, ids, workers: int = None,
+                  ordered: bool = False) -> 'BulkOperation':
+        """
+        Gets many user profiles concurrently, stored profiles are looked
+        up at once before sending requests for the rest
+
+        :param ids: User ids
+        :type ids: iterable of str
+
+        :param workers: Number of concurrent calls, defaults to
+            the connection pool size
+        :type workers: int
+
+        :param ordered: Yield results in input order instead of
+            completion order
+        :type ordered: bool
+
+
+        :rtype: :class:`BulkOperation` of :class:`BulkResult`
+        """
+        if self.store is None:
+            return self._bulk(self.get_user, ids, workers, ordered)
+        ids = list(ids)
+        stored = self.store.get_many('account', ids, lazy=self.lazy,
+                                     account_map=self.account_map)
+
+        def get_user(id):
+            account = stored.get(id)
+            if account is not None:
+                return Response(1, data=account)
+            return self._fetch_user(id)
+        return self._bulk(get_user, ids, workers, ordered)
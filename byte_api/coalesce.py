@@ -0,0 +1,106 @@
+import threading
+
+
+class _Call(object):
+    __slots__ = ('event', 'result', 'error', 'waiters')
+
+    def __init__(self, event):
+        self.event = event
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent identical calls: while a call for a key is in
+    flight, other threads asking for the same key wait for it and share
+    its result or exception instead of issuing their own request.
+    Nothing is kept once the call finishes, repeated calls go out again
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Calls ``func`` unless a call for ``key`` is already in flight,
+        in which case waits for that call and returns its result
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                self.calls += 1
+                call = self._calls[key] = _Call(threading.Event())
+            else:
+                self.coalesced += 1
+                call.waiters += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    @property
+    def stats(self) -> dict:
+        """
+        Counters for monitoring: calls actually performed and calls
+        served by joining one already in flight
+        """
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls)
+            }
+
+
+class AsyncSingleFlight(SingleFlight):
+    """
+    :class:`SingleFlight` for coroutines of one event loop. The call runs
+    as a task every caller awaits, so cancelling one caller, the first
+    one included, leaves the others waiting; the task is cancelled once
+    every caller is gone
+    """
+
+    async def do(self, key, func, *args, **kwargs):
+        import asyncio
+        call = self._calls.get(key)
+        if call is None:
+            self.calls += 1
+            # get_running_loop needs Python 3.7, get_event_loop returns
+            # the running loop inside coroutines before that
+            loop = getattr(asyncio, 'get_running_loop',
+                           asyncio.get_event_loop)()
+            task = loop.create_task(func(*args, **kwargs))
+            call = self._calls[key] = _Call(task)
+            task.add_done_callback(lambda _: self._finished(key, call))
+        else:
+            self.coalesced += 1
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.event)
+        except asyncio.CancelledError:
+            if not call.event.done():
+                call.waiters -= 1
+                if not call.waiters:
+                    call.event.cancel()
+            raise
+
+    def _finished(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -0,0 +1,201 @@
+import array
+import heapq
+
+from . import decoders
+
+
+# Integer columns and the post keys they are read from
+COLUMNS = (
+    ('like_count', 'likeCount'),
+    ('loop_count', 'loopCount'),
+    ('comment_count', 'commentCount'),
+    ('date', 'date')
+)
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class FeedColumns(object):
+    """
+    Builds columns of post counters straight from raw feed pages,
+    without creating :class:`Post` objects. Counters and dates are kept
+    in compact 64-bit integer arrays and authors as codes into
+    :attr:`authors`, so millions of posts take a few dozen bytes each.
+    Aggregations use NumPy when it is installed and plain Python
+    otherwise
+
+    :param use_numpy: Use NumPy for exports and aggregations, None uses
+        it when it is installed
+    :type use_numpy: bool
+    """
+
+    def __init__(self, use_numpy: bool = None):
+        numpy = _numpy() if use_numpy is not False else None
+        if use_numpy and numpy is None:
+            raise ImportError('numpy is required for use_numpy=True')
+        self.numpy = numpy
+        self.ids = []
+        self.authors = []
+        self.author_codes = array.array('q')
+        self.counters = {name: array.array('q') for name, _ in COLUMNS}
+        self.cursor = None
+        self.pages = 0
+        self._author_index = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, page) -> int:
+        """
+        Appends posts of a feed page and remembers its cursor
+
+        :param page: Raw response, its ``data`` object, or their JSON
+        :type page: dict, str or bytes
+
+
+        :return: Number of appended posts
+        :rtype: int
+        """
+        if type(page) is not dict:
+            page = decoders.loads(page)
+        if 'posts' not in page:
+            if 'data' not in page:
+                error = page.get('error') or {}
+                raise ValueError(error.get('message', 'not a feed page'))
+            page = page['data']
+        posts = page['posts']
+        ids = self.ids
+        codes = self.author_codes
+        index = self._author_index
+        authors = self.authors
+        start = len(ids)
+        try:
+            for post in posts:
+                ids.append(post['id'])
+                author = post['authorID']
+                code = index.get(author)
+                if code is None:
+                    code = index[author] = len(authors)
+                    authors.append(author)
+                codes.append(code)
+            for name, key in COLUMNS:
+                self.counters[name].extend([post[key] for post in posts])
+        except (KeyError, TypeError, OverflowError):
+            # Keeps columns aligned when a page is malformed
+            del ids[start:]
+            del codes[start:]
+            for column in self.counters.values():
+                del column[start:]
+            raise
+        self.cursor = page.get('cursor')
+        self.pages += 1
+        return len(posts)
+
+    def _column(self, name):
+        if name not in self.counters:
+            raise ValueError('unknown column {!r}'.format(name))
+        return self.counters[name]
+
+    def to_dict(self) -> dict:
+        """
+        Columns as a dict of :class:`array.array`, plus lists of ids
+        and author ids
+
+        :rtype: dict
+        """
+        columns = {
+            'id': list(self.ids),
+            'author_id': [self.authors[code] for code in self.author_codes],
+            'author_code': array.array('q', self.author_codes)
+        }
+        for name, column in self.counters.items():
+            columns[name] = array.array('q', column)
+        return columns
+
+    def to_numpy(self) -> dict:
+        """
+        Columns as a dict of NumPy arrays: ``int64`` counters, dates
+        and author codes, and object arrays of ids and author ids
+
+        :rtype: dict of :class:`numpy.ndarray`
+        """
+        numpy = self.numpy
+        if numpy is None:
+            raise ImportError('numpy is required for to_numpy()')
+        # Copies, arrays cannot grow while a view of their buffer exists
+        codes = numpy.frombuffer(self.author_codes, numpy.int64).copy()
+        columns = {
+            'id': numpy.array(self.ids, dtype=object),
+            'author_id': numpy.array(self.authors, dtype=object)[codes],
+            'author_code': codes
+        }
+        for name, column in self.counters.items():
+            columns[name] = numpy.frombuffer(column, numpy.int64).copy()
+        return columns
+
+    def columns(self) -> dict:
+        """
+        :meth:`to_numpy` when NumPy is used, :meth:`to_dict` otherwise
+        """
+        if self.numpy is None:
+            return self.to_dict()
+        return self.to_numpy()
+
+    def top(self, n: int = 10, by: str = 'loop_count') -> list:
+        """
+        Posts with the highest values of a column
+
+        :param n: Number of posts
+        :type n: int
+
+        :param by: Column name
+        :type by: str
+
+
+        :return: ``(id, value)`` pairs, highest first
+        :rtype: list
+        """
+        column = self._column(by)
+        n = min(n, len(column))
+        if n <= 0:
+            return []
+        if self.numpy is None:
+            rows = heapq.nlargest(n, range(len(column)),
+                                  key=column.__getitem__)
+            return [(self.ids[row], column[row]) for row in rows]
+        numpy = self.numpy
+        values = numpy.frombuffer(column, numpy.int64).copy()
+        rows = numpy.argpartition(-values, n - 1)[:n]
+        rows = rows[numpy.argsort(-values[rows], kind='stable')]
+        return [(self.ids[row], value)
+                for row, value in zip(rows.tolist(), values[rows].tolist())]
+
+    def sum_by_author(self, by: str = 'loop_count') -> dict:
+        """
+        Sums of a column by author id
+
+        :param by: Column name
+        :type by: str
+
+
+        :rtype: dict
+        """
+        column = self._column(by)
+        if self.numpy is None:
+            totals = [0] * len(self.authors)
+            for code, value in zip(self.author_codes, column):
+                totals[code] += value
+        else:
+            numpy = self.numpy
+            totals = numpy.zeros(len(self.authors), numpy.int64)
+            numpy.add.at(totals,
+                         numpy.frombuffer(self.author_codes, numpy.int64),
+                         numpy.frombuffer(column, numpy.int64))
+            totals = totals.tolist()
+        return dict(zip(self.authors, totals))
@@ -0,0 +1,55 @@
+import json
+
+
+def stdlib_loads(data):
+    """
+    Decodes JSON with the standard library. Bytes are decoded as UTF-8
+    directly, skipping charset detection
+    """
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+def _orjson_loads():
+    import orjson
+    return orjson.loads
+
+
+def _ujson_loads():
+    import ujson
+    return ujson.loads
+
+
+DECODERS = {
+    'orjson': _orjson_loads,
+    'ujson': _ujson_loads,
+    'json': lambda: stdlib_loads
+}
+
+# Preference order of decoders picked when none is requested
+PREFERRED = ('orjson', 'ujson', 'json')
+
+
+def get_decoder(name: str = None):
+    """
+    Returns a function decoding JSON from ``bytes`` or ``str``.
+    ``name`` is one of ``'orjson'``, ``'ujson'`` or ``'json'``; by default
+    the fastest installed one is used. A callable is returned as is
+
+    :raises ImportError: If the requested decoder is not installed
+    """
+    if callable(name):
+        return name
+    if name is not None:
+        if name not in DECODERS:
+            raise ValueError('unknown JSON decoder {!r}'.format(name))
+        return DECODERS[name]()
+    for name in PREFERRED:
+        try:
+            return DECODERS[name]()
+        except ImportError:
+            pass
+
+
+loads = get_decoder()
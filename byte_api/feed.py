@@ -0,0 +1,141 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FeedPaginator(object):
+    """
+    Walks feed cursors and yields :class:`Post` objects one at a time.
+    While the caller consumes a page the next one is fetched in the
+    background, so at most two pages are held in memory
+
+    :param fetch: Callable taking a cursor (None for the first page)
+        and returning a :class:`Feed`
+    :param cursor: Cursor to resume from
+
+    :param prefetch: Fetch the next page in the background
+    :type prefetch: bool
+
+    :param max_pages: Stop after this many pages
+    :type max_pages: int
+    """
+
+    def __init__(self, fetch, cursor: str = None, prefetch: bool = True,
+                 max_pages: int = None):
+        self.fetch = fetch
+        self.cursor = cursor
+        self.prefetch = prefetch
+        self.max_pages = max_pages
+        self.pages_fetched = 0
+
+    def _has_next(self, feed, cursor):
+        if not feed.posts or not feed.cursor or feed.cursor == cursor:
+            return False
+        if self.max_pages is not None:
+            return self.pages_fetched < self.max_pages
+        return True
+
+    def pages(self):
+        """
+        Yields every :class:`Feed` page
+
+        :rtype: generator of :class:`Feed`
+        """
+        if self.max_pages is not None and self.max_pages < 1:
+            return
+        executor = None
+        if self.prefetch:
+            executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            feed = self.fetch(self.cursor)
+            self.pages_fetched += 1
+            while True:
+                cursor = self.cursor
+                has_next = self._has_next(feed, cursor)
+                next_page = None
+                if has_next:
+                    self.cursor = feed.cursor
+                    if executor is not None:
+                        next_page = executor.submit(self.fetch, self.cursor)
+                yield feed
+                if not has_next:
+                    break
+                if next_page is not None:
+                    feed = next_page.result()
+                else:
+                    feed = self.fetch(self.cursor)
+                self.pages_fetched += 1
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def __iter__(self):
+        for feed in self.pages():
+            for post in feed.posts:
+                yield post
+
+
+class AsyncFeedPaginator(object):
+    """
+    Asyncio counterpart of :class:`FeedPaginator`, used with ``async for``
+
+    :param fetch: Coroutine function taking a cursor and returning
+        a :class:`Feed`
+    :param cursor: Cursor to resume from
+
+    :param prefetch: Fetch the next page in a background task
+    :type prefetch: bool
+
+    :param max_pages: Stop after this many pages
+    :type max_pages: int
+    """
+
+    def __init__(self, fetch, cursor: str = None, prefetch: bool = True,
+                 max_pages: int = None):
+        self.fetch = fetch
+        self.cursor = cursor
+        self.prefetch = prefetch
+        self.max_pages = max_pages
+        self.pages_fetched = 0
+        self._posts = iter(())
+        self._next_page = None
+        self._done = max_pages is not None and max_pages < 1
+
+    _has_next = FeedPaginator._has_next
+
+    def __aiter__(self):
+        return self
+
+    async def _fetch_next(self):
+        if self._next_page is not None:
+            feed = await self._next_page
+            self._next_page = None
+        else:
+            feed = await self.fetch(self.cursor)
+        self.pages_fetched += 1
+        if self._has_next(feed, self.cursor):
+            self.cursor = feed.cursor
+            if self.prefetch:
+                import asyncio
+                self._next_page = asyncio.ensure_future(
+                    self.fetch(self.cursor)
+                )
+        else:
+            self._done = True
+        return feed
+
+    async def __anext__(self):
+        while True:
+            for post in self._posts:
+                return post
+            if self._done:
+                raise StopAsyncIteration
+            feed = await self._fetch_next()
+            self._posts = iter(feed.posts)
+
+    def close(self):
+        """
+        Cancels the page being prefetched
+        """
+        self._done = True
+        if self._next_page is not None:
+            self._next_page.cancel()
+            self._next_page = None
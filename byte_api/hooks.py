@@ -0,0 +1,144 @@
+import json
+import threading
+import time
+from urllib.parse import urlencode
+
+from .cache import compile_path
+
+
+# Endpoint templates requests are grouped by in hooks and metrics
+ENDPOINTS = (
+    'account/me/colors',
+    'account/me',
+    'account/id/{}/posts',
+    'account/id/{}/follow',
+    'account/id/{}',
+    'post/id/{}/feedback/like',
+    'post/id/{}/feedback/comment',
+    'post/id/{}/loop',
+    'feedback/comment/id/{}',
+    'rebyte',
+    'timeline',
+    'categories/{}/feed'
+)
+
+_ENDPOINTS = [(compile_path(template), template) for template in ENDPOINTS]
+
+EVENTS = ('before_request', 'after_response', 'on_error')
+
+
+def endpoint_of(path: str) -> str:
+    """
+    Returns the endpoint template of an API path, e.g. ``account/id/{}``
+    for ``account/id/1234``, or ``'other'`` for unknown paths
+    """
+    for pattern, template in _ENDPOINTS:
+        if pattern.match(path):
+            return template
+    return 'other'
+
+
+def body_size(data=None, json_data=None) -> int:
+    """
+    Size of a request body sent with ``data`` or ``json`` arguments
+    """
+    if json_data is not None:
+        return len(json.dumps(json_data).encode('utf-8'))
+    if isinstance(data, dict):
+        return len(urlencode(data).encode('utf-8'))
+    if isinstance(data, str):
+        return len(data.encode('utf-8'))
+    if data:
+        return len(data)
+    return 0
+
+
+class RequestEvent(object):
+    """
+    Attempt of an API request passed to hooks. Network time covers
+    sending the request and receiving the whole response, decode time
+    covers JSON decoding of the final attempt only
+
+    :param method: HTTP method
+    :param path: API path without the base url
+    :param endpoint: Endpoint template of ``path``
+    :param attempt: Number of the attempt, starting from 1
+    :param status: Response status, None if no response was received
+    :param request_bytes: Size of the request body
+    :param response_bytes: Size of the response body
+    :param network_time: Seconds spent waiting for the response
+    :param decode_time: Seconds spent decoding the response
+    :param error: Exception of a failed attempt
+    :param retry: Whether the attempt is going to be retried
+    """
+
+    __slots__ = ('method', 'path', 'endpoint', 'attempt', 'status',
+                 'request_bytes', 'response_bytes', 'started',
+                 'network_time', 'decode_time', 'error', 'retry')
+
+    def __init__(self, method: str, path: str, attempt: int = 1,
+                 request_bytes: int = 0):
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint_of(path)
+        self.attempt = attempt
+        self.status = None
+        self.request_bytes = request_bytes
+        self.response_bytes = 0
+        self.started = time.perf_counter()
+        self.network_time = None
+        self.decode_time = None
+        self.error = None
+        self.retry = False
+
+    def received(self, status: int, size: int):
+        self.network_time = time.perf_counter() - self.started
+        self.status = status
+        self.response_bytes = size
+
+    def __repr__(self):
+        return '<RequestEvent {} {} attempt={} status={}>'.format(
+            self.method, self.path, self.attempt, self.status
+        )
+
+
+class Hooks(object):
+    """
+    Callbacks of request events, each called with a
+    :class:`RequestEvent`:
+
+    * ``before_request`` before every attempt is sent
+    * ``after_response`` after a response is received; for the final
+      attempt after its body is decoded
+    * ``on_error`` after an attempt raises, or its response is rejected
+      by the empty response check
+
+    Exceptions raised by callbacks propagate to the caller
+    """
+
+    def __init__(self):
+        self.before_request = []
+        self.after_response = []
+        self.on_error = []
+        self._lock = threading.Lock()
+
+    def add(self, event: str, func):
+        if event not in EVENTS:
+            raise ValueError('unknown hook event {!r}'.format(event))
+        with self._lock:
+            # Copied on write, so firing needs no lock
+            setattr(self, event, getattr(self, event) + [func])
+
+    def remove(self, event: str, func):
+        with self._lock:
+            callbacks = list(getattr(self, event))
+            callbacks.remove(func)
+            setattr(self, event, callbacks)
+
+    def fire(self, event: str, request_event: RequestEvent):
+        for func in getattr(self, event):
+            func(request_event)
+
+    def __bool__(self):
+        return bool(self.before_request or self.after_response or
+                    self.on_error)
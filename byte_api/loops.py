@@ -0,0 +1,192 @@
+import collections
+import threading
+import time
+
+from .bulk import BulkOperation
+
+
+class LoopAggregator(object):
+    """
+    Buffers loop (view) increments per post in memory and sends them from
+    a background thread every ``interval`` seconds or as soon as
+    ``batch_size`` increments are pending. The API increments a counter
+    by one per call, so a flush still sends one call per increment, but
+    playback never blocks on the network and distinct posts are flushed
+    concurrently. Pending increments are flushed on :meth:`close`
+
+    :param loop: Callable taking a post id and returning a
+        :class:`Response` with a :class:`LoopCounter`, like
+        :meth:`Client.loop`
+
+    :param interval: Seconds between flushes
+    :type interval: float
+
+    :param batch_size: Pending increments triggering an early flush
+    :type batch_size: int
+
+    :param max_posts: Maximum number of distinct pending posts and of
+        kept counters; adding a new post when it is reached waits
+        for a flush
+    :type max_posts: int
+
+    :param workers: Number of concurrent calls of a flush
+    :type workers: int
+
+    :param on_flush: Called with every :class:`LoopCounter` received.
+        Its errors are raised by :meth:`flush` after the whole flush and
+        kept in ``last_error`` by the background thread
+    """
+
+    def __init__(self, loop, interval: float = 1.0, batch_size: int = 100,
+                 max_posts: int = 10000, workers: int = 4, on_flush=None):
+        if max_posts < 1:
+            raise ValueError('max_posts must be a positive number')
+        self.loop = loop
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_posts = max_posts
+        self.workers = workers
+        self.on_flush = on_flush
+        self.counters = collections.OrderedDict()
+        self.sent = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_error = None
+        self._pending = {}
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='LoopAggregator')
+        self._thread.start()
+
+    def add(self, id: str, count: int = 1):
+        """
+        Records ``count`` loops of the post ``id``
+        """
+        with self._cond:
+            if self._closed:
+                raise ValueError('loop aggregator is closed')
+            while id not in self._pending and \
+                    len(self._pending) >= self.max_posts:
+                self._cond.notify_all()
+                self._cond.wait()
+                if self._closed:
+                    raise ValueError('loop aggregator is closed')
+            self._pending[id] = self._pending.get(id, 0) + count
+            self._size += count
+            if self._size >= self.batch_size:
+                self._cond.notify_all()
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of increments not sent yet
+        """
+        return self._size
+
+    def _full(self):
+        return self._size >= self.batch_size or \
+            len(self._pending) >= self.max_posts
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.interval
+                while not self._closed and not self._full():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                closed = self._closed
+            try:
+                self.flush()
+            except Exception as e:
+                # The thread has to keep draining, or add blocks forever
+                # once max_posts is reached
+                self.last_error = e
+            if closed:
+                return
+
+    def _send(self, item):
+        # Returns the number of increments sent, the last response and
+        # the error that stopped the rest
+        id, count = item
+        response = None
+        for sent in range(count):
+            try:
+                response = self.loop(id)
+            except Exception as e:
+                return sent, response, e
+        return count, response, None
+
+    def flush(self):
+        """
+        Sends all pending increments and waits for them
+        """
+        with self._flush_lock:
+            with self._cond:
+                pending, self._pending = self._pending, {}
+                self._size = 0
+                # Wakes producers waiting for room
+                self._cond.notify_all()
+            if not pending:
+                return
+            operation = BulkOperation(self._send, pending.items(),
+                                      workers=self.workers)
+            callback_error = None
+            for result in operation:
+                id, count = result.id
+                if not result.ok:
+                    self.failed += count
+                    self.last_error = result.error
+                    continue
+                sent, response, error = result.response
+                self.sent += sent
+                if error is not None:
+                    self.failed += count - sent
+                    self.last_error = error
+                counter = response.data if response is not None else None
+                if counter is None:
+                    continue
+                self.counters[id] = counter
+                self.counters.move_to_end(id)
+                while len(self.counters) > self.max_posts:
+                    self.counters.popitem(last=False)
+                if self.on_flush is not None:
+                    try:
+                        self.on_flush(counter)
+                    except Exception as e:
+                        # Raised once the results are accounted for
+                        if callback_error is None:
+                            callback_error = e
+            self.flushes += 1
+            if callback_error is not None:
+                raise callback_error
+
+    def close(self):
+        """
+        Stops the background thread after flushing pending increments
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'pending': self._size,
+            'sent': self.sent,
+            'failed': self.failed,
+            'flushes': self.flushes
+        }
@@ -0,0 +1,255 @@
+import bisect
+import collections
+import threading
+
+
+# Upper bounds in seconds of network time histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0)
+# Upper bounds in seconds of decode time histogram buckets
+DECODE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                  0.025, 0.05, 0.1)
+
+
+class Histogram(object):
+    """
+    Counts of observed values by bucket, with their sum and count
+
+    :param buckets: Sorted upper bounds of buckets, an implicit ``+Inf``
+        bucket follows the last one
+    :type buckets: tuple of float
+    """
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        """
+        ``(upper bound, count of values <= bound)`` pairs ending with
+        ``+Inf``
+        """
+        pairs = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),),
+                                self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile as the upper bound of the bucket it falls in
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return float('inf')
+
+
+class EndpointMetrics(object):
+    """
+    Metrics of one endpoint and HTTP method
+    """
+
+    __slots__ = ('latency', 'decode', 'statuses', 'errors', 'retries',
+                 'request_bytes', 'response_bytes')
+
+    def __init__(self, latency_buckets, decode_buckets):
+        self.latency = Histogram(latency_buckets)
+        self.decode = Histogram(decode_buckets)
+        self.statuses = collections.Counter()
+        self.errors = collections.Counter()
+        self.retries = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+
+def _labels(*labels):
+    # Pairs instead of keywords, keyword order is not kept before 3.6
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\')
+                         .replace('"', '\\"'))
+        for name, value in labels
+    ) + '}'
+
+
+def _number(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsCollector(object):
+    """
+    Collects per-endpoint metrics of API requests through hooks: network
+    time and decode time histograms, request and response bytes, status
+    codes, retries and errors. Attach it to a client with
+    ``Client(token, metrics=True)`` or :meth:`install`
+
+    :param latency_buckets: Bucket bounds of network time in seconds
+    :type latency_buckets: tuple of float
+
+    :param decode_buckets: Bucket bounds of decode time in seconds
+    :type decode_buckets: tuple of float
+
+    :param prefix: Prefix of exported metric names
+    :type prefix: str
+    """
+
+    def __init__(self, latency_buckets=LATENCY_BUCKETS,
+                 decode_buckets=DECODE_BUCKETS, prefix: str = 'byte_api'):
+        self.latency_buckets = tuple(latency_buckets)
+        self.decode_buckets = tuple(decode_buckets)
+        self.prefix = prefix
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def install(self, api):
+        """
+        Registers the collector in hooks of an :class:`Api` or
+        :class:`AsyncApi`
+        """
+        api.hooks.add('after_response', self.after_response)
+        api.hooks.add('on_error', self.on_error)
+        return self
+
+    def uninstall(self, api):
+        api.hooks.remove('after_response', self.after_response)
+        api.hooks.remove('on_error', self.on_error)
+
+    def _metrics(self, event):
+        key = (event.endpoint, event.method)
+        metrics = self.endpoints.get(key)
+        if metrics is None:
+            metrics = self.endpoints[key] = EndpointMetrics(
+                self.latency_buckets, self.decode_buckets
+            )
+        return metrics
+
+    def after_response(self, event):
+        with self._lock:
+            metrics = self._metrics(event)
+            metrics.latency.observe(event.network_time)
+            if event.decode_time is not None:
+                metrics.decode.observe(event.decode_time)
+            metrics.statuses[event.status] += 1
+            metrics.request_bytes += event.request_bytes
+            metrics.response_bytes += event.response_bytes
+            if event.retry:
+                metrics.retries += 1
+
+    def on_error(self, event):
+        with self._lock:
+            metrics = self._metrics(event)
+            if event.status is not None:
+                # Response rejected by the check or throttled for too long
+                metrics.latency.observe(event.network_time)
+                metrics.statuses[event.status] += 1
+                metrics.response_bytes += event.response_bytes
+            metrics.request_bytes += event.request_bytes
+            metrics.errors[type(event.error).__name__] += 1
+            if event.retry:
+                metrics.retries += 1
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
+
+    def summary(self) -> dict:
+        """
+        Plain dict of metrics keyed by ``'METHOD endpoint'``, with
+        approximate latency percentiles in seconds
+        """
+        with self._lock:
+            return {
+                '{} {}'.format(method, endpoint): {
+                    'requests': metrics.latency.count,
+                    'statuses': dict(metrics.statuses),
+                    'errors': dict(metrics.errors),
+                    'retries': metrics.retries,
+                    'request_bytes': metrics.request_bytes,
+                    'response_bytes': metrics.response_bytes,
+                    'network_time': metrics.latency.sum,
+                    'decode_time': metrics.decode.sum,
+                    'p50': metrics.latency.quantile(0.5),
+                    'p99': metrics.latency.quantile(0.99)
+                }
+                for (endpoint, method), metrics in self.endpoints.items()
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Renders metrics in the Prometheus text exposition format
+        """
+        prefix = self.prefix
+        lines = []
+
+        def header(name, kind, help):
+            lines.append('# HELP {}_{} {}'.format(prefix, name, help))
+            lines.append('# TYPE {}_{} {}'.format(prefix, name, kind))
+
+        with self._lock:
+            items = sorted(
+                ((('endpoint', endpoint), ('method', method)), metrics)
+                for (endpoint, method), metrics in self.endpoints.items()
+            )
+            for name, attr, help in (
+                    ('request_duration_seconds', 'latency',
+                     'Network time of API requests'),
+                    ('decode_duration_seconds', 'decode',
+                     'JSON decoding time of API responses')):
+                header(name, 'histogram', help)
+                for base, metrics in items:
+                    histogram = getattr(metrics, attr)
+                    for bound, total in histogram.cumulative():
+                        lines.append('{}_{}_bucket{} {}'.format(
+                            prefix, name,
+                            _labels(*base, ('le', _number(bound))),
+                            total
+                        ))
+                    labels = _labels(*base)
+                    lines.append('{}_{}_sum{} {}'.format(
+                        prefix, name, labels, _number(histogram.sum)
+                    ))
+                    lines.append('{}_{}_count{} {}'.format(
+                        prefix, name, labels, histogram.count
+                    ))
+            header('responses_total', 'counter',
+                   'API responses by status code')
+            for base, metrics in items:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append('{}_responses_total{} {}'.format(
+                        prefix, _labels(*base, ('status', status)), count
+                    ))
+            header('errors_total', 'counter',
+                   'Failed API request attempts by exception')
+            for base, metrics in items:
+                for error, count in sorted(metrics.errors.items()):
+                    lines.append('{}_errors_total{} {}'.format(
+                        prefix, _labels(*base, ('error', error)), count
+                    ))
+            for name, attr, help in (
+                    ('retries_total', 'retries', 'Retried API requests'),
+                    ('request_bytes_total', 'request_bytes',
+                     'Bytes of API request bodies'),
+                    ('response_bytes_total', 'response_bytes',
+                     'Bytes of API response bodies')):
+                header(name, 'counter', help)
+                for base, metrics in items:
+                    lines.append('{}_{}{} {}'.format(
+                        prefix, name, _labels(*base), getattr(metrics, attr)
+                    ))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,242 @@
+"""
+Bulk decoding of archived API responses on a pool of processes.
+Payloads are sent to workers as raw JSON, packed into one bytes object
+with an offset array per chunk, so a chunk of thousands of responses is
+pickled as two buffers instead of thousands of strings
+"""
+import array
+import collections
+import gc
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from . import decoders
+from .types import Account, Feed, Post
+
+
+# Attributes of posts and accounts in compact tuples, in tuple order
+POST_FIELDS = ('id', 'author_id', 'date', 'like_count', 'loop_count',
+               'comment_count', 'caption', 'category')
+ACCOUNT_FIELDS = ('id', 'username', 'follower_count', 'following_count',
+                  'loop_count', 'registration_date')
+
+KINDS = ('feed', 'post', 'account')
+OUTPUTS = ('objects', 'tuples')
+
+
+def _keys(cls, names):
+    schema = {field.name: field for field in cls._schema}
+    return tuple((schema[name].key, schema[name].optional) for name in names)
+
+
+_POST_KEYS = _keys(Post, POST_FIELDS)
+_ACCOUNT_KEYS = _keys(Account, ACCOUNT_FIELDS)
+
+
+def _row(obj, keys):
+    if type(obj) is not dict:
+        raise ValueError('expected a JSON object')
+    return tuple(obj.get(key) if optional else obj[key]
+                 for key, optional in keys)
+
+
+def _data(obj):
+    # Archived responses wrap objects, dumps of bare objects do not
+    if 'data' in obj and 'id' not in obj:
+        return obj['data']
+    return obj
+
+
+def decode_payload(payload, kind: str = 'feed', output: str = 'objects'):
+    """
+    Decodes one raw response
+
+    * ``feed`` payloads decode to a :class:`Response` with a
+      :class:`Feed`, or to ``(cursor, [post tuple, ...])``
+    * ``post`` payloads decode to a :class:`Post` or a post tuple
+    * ``account`` payloads decode to an :class:`Account` or an account
+      tuple
+
+    Tuples hold the attributes listed in :data:`POST_FIELDS` and
+    :data:`ACCOUNT_FIELDS` and are read straight from the JSON objects
+    """
+    obj = decoders.loads(payload)
+    if kind == 'feed':
+        if output == 'objects':
+            return Feed.de_json(obj)
+        data = obj['data']
+        return data.get('cursor'), [_row(post, _POST_KEYS)
+                                    for post in data['posts']]
+    obj = _data(obj)
+    if kind == 'post':
+        if output == 'objects':
+            return Post.de_json(obj)
+        return _row(obj, _POST_KEYS)
+    if output == 'objects':
+        return Account.de_json(obj)
+    return _row(obj, _ACCOUNT_KEYS)
+
+
+def _decode_chunk(kind, output, blob, offsets):
+    ends = array.array('Q')
+    ends.frombytes(offsets)
+    results = []
+    start = 0
+    view = memoryview(blob)
+    for end in ends:
+        results.append(decode_payload(view[start:end].tobytes(), kind,
+                                      output))
+        start = end
+    return results
+
+
+def _decode_packed(kind, output, blob, offsets):
+    # Results go back as one pickled buffer, unpickled by _unpack
+    return pickle.dumps(_decode_chunk(kind, output, blob, offsets),
+                        pickle.HIGHEST_PROTOCOL)
+
+
+def _unpack(data):
+    # Unpickling allocates many objects and nothing to collect, so the
+    # collector is paused instead of running many times over them
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.loads(data)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _pack(payloads):
+    ends = array.array('Q')
+    size = 0
+    for payload in payloads:
+        size += len(payload)
+        ends.append(size)
+    return b''.join(payloads), ends.tobytes()
+
+
+class BulkDecoder(object):
+    """
+    Decodes many raw API responses, given as ``bytes`` or ``str``, on a
+    pool of processes and yields results in input order. Inputs are
+    consumed lazily and at most two chunks per worker are in flight,
+    so huge dumps are never held in memory at once.
+
+    Results of a chunk are sent back as one pickled buffer and rebuilt
+    in the calling process with the garbage collector paused, which
+    takes about half as long as decoding objects there. Workers pickle
+    what they decode, so they only pay off with spare CPUs
+
+    :param workers: Number of processes, defaults to the CPU count, or
+        0 on a single CPU. 0 decodes in the calling process
+    :type workers: int
+
+    :param chunk_bytes: Approximate size of chunks of payloads sent to
+        a worker at once
+    :type chunk_bytes: int
+    """
+
+    def __init__(self, workers: int = None, chunk_bytes: int = 1 << 20):
+        if workers is None:
+            workers = os.cpu_count() or 1
+            if workers == 1:
+                workers = 0
+        if workers < 0:
+            raise ValueError('workers must not be negative')
+        self.workers = workers
+        self.chunk_bytes = chunk_bytes
+        self._executor = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _chunks(self, payloads):
+        chunk = []
+        size = 0
+        for payload in payloads:
+            if isinstance(payload, str):
+                payload = payload.encode('utf-8')
+            chunk.append(payload)
+            size += len(payload)
+            if size >= self.chunk_bytes:
+                yield _pack(chunk)
+                chunk = []
+                size = 0
+        if chunk:
+            yield _pack(chunk)
+
+    def decode(self, payloads, kind: str = 'feed',
+               output: str = 'objects'):
+        """
+        Yields decoded payloads in input order, see :func:`decode_payload`
+
+        :param payloads: Raw API responses
+        :type payloads: iterable of bytes or str
+
+        :param kind: ``'feed'``, ``'post'`` or ``'account'``
+        :type kind: str
+
+        :param output: ``'objects'`` or ``'tuples'``
+        :type output: str
+        """
+        if kind not in KINDS:
+            raise ValueError('unknown kind {!r}'.format(kind))
+        if output not in OUTPUTS:
+            raise ValueError('unknown output {!r}'.format(output))
+        chunks = self._chunks(payloads)
+        if not self.workers:
+            for blob, offsets in chunks:
+                yield from _decode_chunk(kind, output, blob, offsets)
+            return
+        executor = self.executor
+        limit = self.workers * 2
+        pending = collections.deque()
+        try:
+            for blob, offsets in chunks:
+                pending.append(executor.submit(_decode_packed, kind, output,
+                                               blob, offsets))
+                if len(pending) >= limit:
+                    yield from _unpack(pending.popleft().result())
+            while pending:
+                yield from _unpack(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def posts(self, payloads, output: str = 'objects'):
+        """
+        Yields posts of raw feed responses in input order
+        """
+        for result in self.decode(payloads, 'feed', output):
+            if output == 'objects':
+                yield from result.data.posts
+            else:
+                yield from result[1]
+
+
+def decode_many(payloads, kind: str = 'feed', output: str = 'objects',
+                workers: int = None, chunk_bytes: int = 1 << 20) -> list:
+    """
+    Decodes raw API responses on a temporary :class:`BulkDecoder`
+
+    :rtype: list
+    """
+    with BulkDecoder(workers, chunk_bytes) as decoder:
+        return list(decoder.decode(payloads, kind, output))
@@ -0,0 +1,315 @@
+import threading
+import time
+
+from .api import AuthError
+from .bulk import BulkOperation
+from .client import Client
+from .feed import FeedPaginator
+from .ratelimit import RateLimiter, RateLimitError
+from .types import Response
+
+
+class PoolMember(object):
+    """
+    Client of one token of a :class:`ClientPool` and its health
+    """
+
+    __slots__ = ('token', 'client', 'limiter', 'in_flight', 'requests',
+                 'errors', 'throttled', 'evicted', 'evicted_until',
+                 'last_error')
+
+    def __init__(self, token: str, client: Client, limiter: RateLimiter):
+        self.token = token
+        self.client = client
+        self.limiter = limiter
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.evicted = False
+        self.evicted_until = 0.0
+        self.last_error = None
+
+    def available(self, now: float) -> bool:
+        return not self.evicted and self.evicted_until <= now
+
+    @property
+    def health(self) -> dict:
+        return {
+            'available': self.available(time.monotonic()),
+            'evicted': self.evicted,
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'errors': self.errors,
+            'throttled': self.throttled,
+            'last_error': self.last_error
+        }
+
+
+class ClientPool(object):
+    """
+    Clients of many tokens sharing read traffic. Every token has its own
+    :class:`RateLimiter` budget, and reads of public data (profiles,
+    user posts and category feeds) go to the available token that could
+    send soonest, then to the one with the fewest requests in flight and
+    the fewest requests sent.
+
+    A token is evicted for good once the API rejects it with an empty
+    response (:class:`AuthError`), and for ``cooldown`` seconds, or the
+    ``Retry-After`` of the API, once it is throttled; the read is then
+    sent again with another token.
+
+    Writes and reads of the token's own account act as that account, so
+    they never move between tokens: they are sent with the first token
+    through attribute access, e.g. ``pool.like(id)``, or with a given
+    token through :meth:`client`
+
+    :param tokens: Authorization tokens
+    :type tokens: list of str
+
+    :param rate: Allowed requests per second of every token
+    :type rate: float
+
+    :param burst: Maximum burst of requests of every token
+    :type burst: float
+
+    :param cooldown: Seconds a throttled token is evicted for when the
+        API does not send ``Retry-After``
+    :type cooldown: float
+
+    :param throttle_retries: 429 responses a read waits out with the same
+        token before moving on
+    :type throttle_retries: int
+
+    :param options: Options of every :class:`Client`
+    """
+
+    def __init__(self, tokens, rate: float = 10, burst: float = None,
+                 cooldown: float = 60, throttle_retries: int = 0,
+                 **options):
+        tokens = list(tokens)
+        if not tokens:
+            raise ValueError('at least one token is required')
+        if 'rate_limiter' in options:
+            raise ValueError('rate limiters are created for every token')
+        self.cooldown = cooldown
+        self.members = []
+        for token in tokens:
+            limiter = RateLimiter(rate, burst)
+            client = Client(token, rate_limiter=limiter, **options)
+            client.api.throttle_retries = throttle_retries
+            self.members.append(PoolMember(token, client, limiter))
+        self._by_token = {member.token: member for member in self.members}
+        self._lock = threading.Lock()
+
+    def close(self):
+        for member in self.members:
+            member.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def client(self, token: str = None) -> Client:
+        """
+        Client of a token, the first one by default, for writes and
+        reads of the token's own account
+
+        :raises AuthError: If the token was evicted for an auth error
+        """
+        member = self.members[0] if token is None else self._by_token[token]
+        if member.evicted:
+            raise AuthError('token was rejected by the API')
+        return member.client
+
+    def __getattr__(self, name):
+        # Only reached for attributes missing on the pool, which are
+        # the pinned calls of the first token
+        if name.startswith('_') or 'members' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.client(), name)
+
+    def _acquire(self, path, tried):
+        with self._lock:
+            now = time.monotonic()
+            candidates = [
+                member for member in self.members
+                if member not in tried and member.available(now)
+            ]
+            if not candidates:
+                waiting = [member.evicted_until - now
+                           for member in self.members if not member.evicted]
+                if waiting:
+                    raise RateLimitError('every token is throttled',
+                                         max(0.0, min(waiting)))
+                raise AuthError('every token was rejected by the API')
+            # Ties go to the member with the fewest requests so far, so
+            # reads below saturation rotate over the tokens
+            member = min(candidates, key=lambda member: (
+                member.limiter.delay(path), member.in_flight, member.requests
+            ))
+            member.in_flight += 1
+            member.requests += 1
+            return member
+
+    def _release(self, member, error=None, retry_after=None):
+        with self._lock:
+            member.in_flight -= 1
+            if error is None:
+                return
+            member.errors += 1
+            member.last_error = error
+            if isinstance(error, AuthError):
+                member.evicted = True
+            elif isinstance(error, RateLimitError):
+                member.throttled += 1
+                if retry_after is None:
+                    retry_after = self.cooldown
+                member.evicted_until = time.monotonic() + retry_after
+
+    def _read(self, path, call):
+        """
+        Calls ``call`` with the client of an available token, moving to
+        another token while tokens are evicted by the call
+        """
+        tried = set()
+        while True:
+            member = self._acquire(path, tried)
+            try:
+                result = call(member.client)
+            except RateLimitError as e:
+                self._release(member, e, e.retry_after)
+            except AuthError as e:
+                self._release(member, e)
+            except Exception as e:
+                self._release(member, e)
+                raise
+            else:
+                self._release(member)
+                return result
+            tried.add(member)
+
+    def get_user(self, id: str) -> Response:
+        """
+        Gets a user profile with any available token
+
+        :param id: User id
+        :type id: str
+
+
+        :rtype: :class:`Response`, :class:`Account`
+        """
+        return self._read('account/id/{}'.format(id),
+                          lambda client: client.get_user(id))
+
+    def get_user_posts(self, id: str, cursor: str = None) -> Response:
+        """
+        Gets a page of user posts with any available token
+
+        :param id: User id
+        :type id: str
+
+        :param cursor: Cursor of the page, None for the first one
+        :type cursor: str
+
+
+        :rtype: :class:`Response`, :class:`Feed`
+        """
+        return self._read('account/id/{}/posts'.format(id),
+                          lambda client: client.get_user_posts(id, cursor))
+
+    def get_category(self, name: str, cursor: str = None) -> Response:
+        """
+        Gets a page of a category feed with any available token
+
+        :param name: Category name
+        :type name: str
+
+        :param cursor: Cursor of the page, None for the first one
+        :type cursor: str
+
+
+        :rtype: :class:`Response`, :class:`Feed`
+        """
+        return self._read('categories/{}/feed'.format(name),
+                          lambda client: client.get_category(name, cursor))
+
+    def _paginate(self, get_page, cursor, prefetch, max_pages):
+        def fetch(cursor):
+            response = get_page(cursor)
+            if response.error is not None:
+                raise ValueError(response.error.message)
+            return response.data
+        return FeedPaginator(fetch, cursor=cursor, prefetch=prefetch,
+                             max_pages=max_pages)
+
+    def iter_user_posts(self, id: str, cursor: str = None,
+                        prefetch: bool = True,
+                        max_pages: int = None) -> FeedPaginator:
+        """
+        Iterates over user posts, each page fetched with any available
+        token
+
+        :rtype: :class:`FeedPaginator` of :class:`Post`
+        """
+        return self._paginate(
+            lambda cursor: self.get_user_posts(id, cursor),
+            cursor, prefetch, max_pages
+        )
+
+    def iter_category(self, name: str, cursor: str = None,
+                      prefetch: bool = True,
+                      max_pages: int = None) -> FeedPaginator:
+        """
+        Iterates over category feed posts, each page fetched with any
+        available token
+
+        :rtype: :class:`FeedPaginator` of :class:`Post`
+        """
+        return self._paginate(
+            lambda cursor: self.get_category(name, cursor),
+            cursor, prefetch, max_pages
+        )
+
+    def get_users(self, ids, workers: int = None,
+                  ordered: bool = False) -> BulkOperation:
+        """
+        Gets many user profiles concurrently, spread over the tokens
+
+        :param ids: User ids
+        :type ids: iterable of str
+
+        :param workers: Number of concurrent calls, defaults to the sum
+            of connection pool sizes
+        :type workers: int
+
+        :param ordered: Yield results in input order instead of
+            completion order
+        :type ordered: bool
+
+
+        :rtype: :class:`BulkOperation` of :class:`BulkResult`
+        """
+        if workers is None:
+            workers = sum(member.client.api.pool_maxsize
+                          for member in self.members)
+        return BulkOperation(self.get_user, ids, workers=workers,
+                             ordered=ordered)
+
+    @property
+    def available(self) -> int:
+        """
+        Number of tokens reads can be sent with now
+        """
+        now = time.monotonic()
+        return sum(member.available(now) for member in self.members)
+
+    @property
+    def health(self) -> list:
+        """
+        Health of every token, in the order tokens were given
+        """
+        with self._lock:
+            return [member.health for member in self.members]
@@ -0,0 +1,196 @@
+import threading
+import time
+
+from .cache import compile_path
+
+
+class RateLimitError(ValueError):
+    """
+    Raised when the API keeps answering 429 Too Many Requests
+
+    :param retry_after: Seconds the API asked to wait, if it did
+    :type retry_after: float
+    """
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: str) -> float:
+    """
+    Parses a ``Retry-After`` header given either in seconds or as
+    an HTTP date, returns None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    import email.utils
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date is None:
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+class TokenBucket(object):
+    """
+    Token bucket refilled at ``rate`` tokens per second up to ``capacity``.
+    Reservations may overdraw the bucket, the caller then waits until
+    its tokens have been refilled, which keeps concurrent callers in order
+
+    :param rate: Tokens added per second
+    :type rate: float
+
+    :param capacity: Maximum burst, defaults to ``rate``
+    :type capacity: float
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError('rate must be a positive number')
+        self.rate = rate
+        self.capacity = max(1.0, capacity if capacity else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float, factor: float = 1.0) -> float:
+        """
+        Takes a token and returns seconds to wait before using it.
+        Not thread-safe by itself, :class:`RateLimiter` locks around it
+        """
+        rate = self.rate * factor
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / rate
+
+    def peek(self, now: float, factor: float = 1.0) -> float:
+        """
+        Seconds a reservation made now would wait, without taking a token
+        """
+        rate = self.rate * factor
+        tokens = min(self.capacity,
+                     self.tokens + (now - self.updated) * rate) - 1
+        if tokens >= 0:
+            return 0.0
+        return -tokens / rate
+
+
+class RateLimiter(object):
+    """
+    Client-side rate limiter shared by every call of a client. One
+    instance may be shared by several clients, threads and asyncio tasks.
+    Each request takes a token from the global bucket and from the bucket
+    of its endpoint, if one is configured. 429 responses pause all calls
+    for ``Retry-After`` seconds and halve the allowed rate, which then
+    recovers gradually with successful calls
+
+    :param rate: Allowed requests per second
+    :type rate: float
+
+    :param burst: Maximum burst of requests, defaults to ``rate``
+    :type burst: float
+
+    :param endpoints: Budgets of endpoint templates as
+        ``{'post/id/{}/feedback/like': (rate, burst)}``, ``{}`` matches
+        one path segment
+    :type endpoints: dict
+
+    :param min_factor: Lowest fraction of the configured rates adaptive
+        backoff may go down to
+    :type min_factor: float
+
+    :param recovery: Fraction of the configured rates restored by every
+        successful call after a backoff
+    :type recovery: float
+    """
+
+    def __init__(self, rate: float = 10, burst: float = None,
+                 endpoints: dict = None, min_factor: float = 0.05,
+                 recovery: float = 0.02):
+        self.bucket = TokenBucket(rate, burst)
+        self.endpoints = [
+            (compile_path(template), TokenBucket(*budget))
+            for template, budget in (endpoints or {}).items()
+        ]
+        self.min_factor = min_factor
+        self.recovery = recovery
+        self.factor = 1.0
+        self.blocked_until = 0.0
+        self.throttled_count = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, path: str) -> float:
+        """
+        Takes tokens for a request to ``path`` and returns seconds to
+        wait before sending it
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = self.bucket.reserve(now, self.factor)
+            for pattern, bucket in self.endpoints:
+                if pattern.match(path):
+                    delay = max(delay, bucket.reserve(now, self.factor))
+                    break
+            return max(delay, self.blocked_until - now)
+
+    def delay(self, path: str) -> float:
+        """
+        Seconds a request to ``path`` sent now would wait, without
+        taking tokens
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = self.bucket.peek(now, self.factor)
+            for pattern, bucket in self.endpoints:
+                if pattern.match(path):
+                    delay = max(delay, bucket.peek(now, self.factor))
+                    break
+            return max(delay, self.blocked_until - now)
+
+    def acquire(self, path: str):
+        """
+        Blocks the current thread until a request to ``path`` is allowed
+        """
+        delay = self.reserve(path)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, path: str):
+        """
+        Suspends the current task until a request to ``path`` is allowed
+        """
+        delay = self.reserve(path)
+        if delay > 0:
+            import asyncio
+            await asyncio.sleep(delay)
+
+    def throttled(self, retry_after: float = None) -> float:
+        """
+        Records a 429 response and returns seconds all calls are paused
+        """
+        with self._lock:
+            self.throttled_count += 1
+            self.factor = max(self.min_factor, self.factor / 2)
+            if retry_after is None:
+                retry_after = 1 / (self.bucket.rate * self.factor)
+            self.blocked_until = max(self.blocked_until,
+                                     time.monotonic() + retry_after)
+            return retry_after
+
+    def succeeded(self):
+        """
+        Records a successful response, restoring the rate after a backoff
+        """
+        if self.factor < 1.0:
+            with self._lock:
+                self.factor = min(1.0, self.factor + self.recovery)
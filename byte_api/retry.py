@@ -0,0 +1,126 @@
+import collections
+import random
+import threading
+import time
+
+
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+
+
+class RetryPolicy(object):
+    """
+    Retries failed calls with exponential backoff and full jitter.
+    Connection errors and ``retry_statuses`` are retried for idempotent
+    calls only: GET, and the PUT/DELETE toggles like follow or like.
+    POSTs like comment or rebyte are retried only if they are marked
+    idempotent by the caller or ``retry_non_idempotent`` is set.
+    429 responses are always retried since the API did not process them
+
+    :param max_attempts: Maximum number of attempts including the first
+    :type max_attempts: int
+
+    :param backoff_factor: Delay before the first retry, doubled for
+        every next one
+    :type backoff_factor: float
+
+    :param max_backoff: Upper bound of a single delay
+    :type max_backoff: float
+
+    :param jitter: Randomize delays between 0 and the backoff value
+    :type jitter: bool
+
+    :param total_timeout: Time budget of a call with all its retries,
+        every attempt times out once it is used up. None for no budget
+    :type total_timeout: float
+
+    :param retry_statuses: Response statuses worth retrying
+    :type retry_statuses: iterable of int
+
+    :param retry_non_idempotent: Retry POSTs as well
+    :type retry_non_idempotent: bool
+    """
+
+    def __init__(self, max_attempts: int = 3, backoff_factor: float = 0.5,
+                 max_backoff: float = 30, jitter: bool = True,
+                 total_timeout: float = 60,
+                 retry_statuses=(429, 500, 502, 503, 504),
+                 retry_non_idempotent: bool = False):
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be a positive number')
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.total_timeout = total_timeout
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_non_idempotent = retry_non_idempotent
+        self.retries = 0
+        self.exhausted = 0
+        self.reasons = collections.Counter()
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Delay after the failed attempt number ``attempt``
+        """
+        delay = min(self.max_backoff,
+                    self.backoff_factor * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def is_idempotent(self, method: str, idempotent: bool = None) -> bool:
+        if idempotent is not None:
+            return idempotent or self.retry_non_idempotent
+        return method in IDEMPOTENT_METHODS or self.retry_non_idempotent
+
+    def delay(self, method: str, attempt: int, started: float,
+              idempotent: bool = None, status: int = None,
+              error: Exception = None, retry_after: float = None) -> float:
+        """
+        Returns seconds to wait before retrying a failed attempt,
+        or None if the failure has to be surfaced to the caller
+
+        :param method: HTTP method of the call
+        :param attempt: Number of the failed attempt, starting from 1
+        :param started: Monotonic time the call started at
+        :param idempotent: Overrides idempotency derived from the method
+        :param status: Response status, if a response was received
+        :param error: Exception raised instead of receiving a response
+        :param retry_after: Seconds the API asked to wait
+        """
+        if status is not None:
+            if status not in self.retry_statuses:
+                return None
+            reason = str(status)
+        else:
+            reason = type(error).__name__
+        if status != 429 and not self.is_idempotent(method, idempotent):
+            return None
+        delay = self.backoff(attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        elapsed = time.monotonic() - started
+        with self._lock:
+            if attempt >= self.max_attempts or (
+                    self.total_timeout is not None and
+                    elapsed + delay > self.total_timeout):
+                self.exhausted += 1
+                return None
+            self.retries += 1
+            self.reasons[reason] += 1
+        return delay
+
+    @property
+    def stats(self) -> dict:
+        """
+        Counters for monitoring: performed retries, calls that failed
+        after exhausting attempts or the time budget, and retries by
+        status code or exception name
+        """
+        with self._lock:
+            return {
+                'retries': self.retries,
+                'exhausted': self.exhausted,
+                'reasons': dict(self.reasons)
+            }
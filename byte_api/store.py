@@ -0,0 +1,395 @@
+import json
+import sqlite3
+import threading
+import time
+
+from .types import Account, Comment, Post
+
+
+# Seconds stored records stay fresh by kind, None keeps them forever
+DEFAULT_TTLS = {
+    'account': 300,
+    'post': 60,
+    'comment': 600
+}
+
+# Table, type and indexed columns with their JSON keys of every kind
+KINDS = {
+    'account': ('accounts', Account, (('username', 'username'),)),
+    'post': ('posts', Post, (('author_id', 'authorID'), ('date', 'date'))),
+    'comment': ('comments', Comment, (('post_id', 'postID'),
+                                      ('author_id', 'authorID'),
+                                      ('date', 'date')))
+}
+
+# Ids per query of bulk lookups, below the SQLite variable limit
+CHUNK_SIZE = 500
+
+
+def _kind(kind):
+    try:
+        return KINDS[kind]
+    except KeyError:
+        raise ValueError('unknown kind {!r}'.format(kind)) from None
+
+
+class RecordStore(object):
+    """
+    Persistent store of :class:`Account`, :class:`Post` and
+    :class:`Comment` records in an SQLite file, so known records
+    survive restarts. Records are kept as their JSON objects next to
+    indexed id, author, post and date columns and decoded on reads.
+    Writes are buffered and inserted in batches from a background thread
+    every ``interval`` seconds or as soon as ``batch_size`` records are
+    pending; reads see pending records too
+
+    :param path: Database file, ``':memory:'`` keeps it in memory
+    :type path: str
+
+    :param ttls: Seconds records stay fresh by kind, ``'account'``,
+        ``'post'`` or ``'comment'``; None keeps them fresh forever.
+        Defaults to :data:`DEFAULT_TTLS`
+    :type ttls: dict
+
+    :param write_behind: Buffer writes instead of inserting on every
+        :meth:`put`
+    :type write_behind: bool
+
+    :param interval: Seconds between flushes of buffered writes
+    :type interval: float
+
+    :param batch_size: Pending records triggering an early flush
+    :type batch_size: int
+    """
+
+    def __init__(self, path: str = ':memory:', ttls: dict = None,
+                 write_behind: bool = True, interval: float = 1.0,
+                 batch_size: int = 500):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.write_behind = write_behind
+        self.interval = interval
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+        self.flushes = 0
+        self._pending = {kind: {} for kind in KINDS}
+        self._flushing = None
+        self._size = 0
+        self._closed = False
+        self._db_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._create_tables()
+        self._thread = None
+        if write_behind:
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name='RecordStore')
+            self._thread.start()
+
+    def _create_tables(self):
+        with self._db_lock, self._db:
+            if self.path != ':memory:':
+                self._db.execute('PRAGMA journal_mode=WAL')
+                self._db.execute('PRAGMA synchronous=NORMAL')
+            for table, _, columns in KINDS.values():
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS {} (id TEXT PRIMARY KEY, '
+                    '{}, stored REAL NOT NULL, data TEXT NOT NULL)'.format(
+                        table, ', '.join(name for name, _ in columns)
+                    )
+                )
+                for name, _ in columns:
+                    self._db.execute(
+                        'CREATE INDEX IF NOT EXISTS {0}_{1} '
+                        'ON {0} ({1})'.format(table, name)
+                    )
+
+    def put(self, kind: str, records, stored: float = None):
+        """
+        Stores JSON objects of records, replacing stored records with
+        the same ids
+
+        :param kind: ``'account'``, ``'post'`` or ``'comment'``
+        :type kind: str
+
+        :param records: JSON objects as received from the API
+        :type records: dict or iterable of dict
+
+        :param stored: Unix time the records were received at,
+            defaults to now
+        :type stored: float
+        """
+        self.put_batch({kind: records}, stored)
+
+    def put_batch(self, records: dict, stored: float = None):
+        """
+        Stores records of several kinds together, in one transaction or
+        write-behind batch
+
+        :param records: JSON objects of records by kind, see :meth:`put`
+        :type records: dict
+
+        :param stored: Unix time the records were received at,
+            defaults to now
+        :type stored: float
+        """
+        if stored is None:
+            stored = time.time()
+        batch = {}
+        for kind, items in records.items():
+            _, _, columns = _kind(kind)
+            if isinstance(items, dict):
+                items = (items,)
+            rows = [
+                (record['id'],) +
+                tuple(record.get(key) for _, key in columns) +
+                (stored, json.dumps(record, separators=(',', ':')))
+                for record in items
+            ]
+            if rows:
+                batch[kind] = rows
+        if not batch:
+            return
+        if not self.write_behind:
+            self._write({kind: {row[0]: row for row in rows}
+                         for kind, rows in batch.items()})
+            return
+        with self._cond:
+            if self._closed:
+                raise ValueError('record store is closed')
+            for kind, rows in batch.items():
+                pending = self._pending[kind]
+                for row in rows:
+                    if row[0] not in pending:
+                        self._size += 1
+                    pending[row[0]] = row
+            if self._size >= self.batch_size:
+                self._cond.notify_all()
+
+    def _write(self, pending):
+        count = 0
+        with self._db_lock, self._db:
+            for kind, rows in pending.items():
+                if not rows:
+                    continue
+                table, _, columns = KINDS[kind]
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO {} VALUES ({})'.format(
+                        table, ', '.join('?' * (len(columns) + 3))
+                    ),
+                    rows.values()
+                )
+                count += len(rows)
+            self.written += count
+            self.flushes += 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.interval
+                while not self._closed and self._size < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def flush(self):
+        """
+        Writes all pending records
+        """
+        with self._flush_lock:
+            with self._cond:
+                if not self._size:
+                    return
+                pending = self._pending
+                self._pending = {kind: {} for kind in KINDS}
+                self._size = 0
+                # Reads check the flushed batch until it is written
+                self._flushing = pending
+            try:
+                self._write(pending)
+            finally:
+                with self._cond:
+                    self._flushing = None
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of records not written yet
+        """
+        return self._size
+
+    def _fresh_after(self, kind, max_age):
+        if max_age is None:
+            max_age = self.ttls.get(kind)
+        if max_age is None:
+            return None
+        return time.time() - max_age
+
+    def _buffered(self, kind, ids):
+        rows = {}
+        with self._cond:
+            for pending in (self._flushing, self._pending):
+                if not pending:
+                    continue
+                buffered = pending[kind]
+                for id in ids:
+                    row = buffered.get(id)
+                    if row is not None:
+                        rows[id] = row
+        return rows
+
+    def get_many(self, kind: str, ids, max_age: float = None,
+                 lazy: bool = False, account_map=None) -> dict:
+        """
+        Looks up fresh records by id
+
+        :param kind: ``'account'``, ``'post'`` or ``'comment'``
+        :type kind: str
+
+        :param ids: Record ids
+        :type ids: iterable of str
+
+        :param max_age: Maximum age in seconds, defaults to the TTL of
+            the kind
+        :type max_age: float
+
+        :param lazy: Decode records lazily
+        :type lazy: bool
+
+        :param account_map: :class:`AccountMap` deduplicating accounts
+
+
+        :return: Decoded records by id, missing and stale ones are left out
+        :rtype: dict
+        """
+        table, cls, _ = _kind(kind)
+        ids = list(dict.fromkeys(ids))
+        rows = self._buffered(kind, ids)
+        missing = [id for id in ids if id not in rows]
+        with self._db_lock:
+            for start in range(0, len(missing), CHUNK_SIZE):
+                chunk = missing[start:start + CHUNK_SIZE]
+                cursor = self._db.execute(
+                    'SELECT id, stored, data FROM {} WHERE id IN ({})'.format(
+                        table, ', '.join('?' * len(chunk))
+                    ),
+                    chunk
+                )
+                for id, stored, data in cursor:
+                    rows[id] = (stored, data)
+        fresh_after = self._fresh_after(kind, max_age)
+        records = {}
+        for id in ids:
+            row = rows.get(id)
+            if row is not None and (fresh_after is None or
+                                    row[-2] >= fresh_after):
+                records[id] = cls.de_json(row[-1], lazy, account_map)
+        with self._cond:
+            self.hits += len(records)
+            self.misses += len(ids) - len(records)
+        return records
+
+    def get(self, kind: str, id: str, max_age: float = None,
+            lazy: bool = False, account_map=None):
+        """
+        Looks up one fresh record, see :meth:`get_many`
+
+        :return: Decoded record or None
+        """
+        return self.get_many(kind, (id,), max_age, lazy,
+                             account_map).get(id)
+
+    def find(self, kind: str, column: str, value, max_age: float = None,
+             lazy: bool = False, account_map=None) -> list:
+        """
+        Fresh records with a value of an indexed column, e.g. posts of
+        an author with ``find('post', 'author_id', id)``, newest first
+        where records have dates
+
+        :rtype: list
+        """
+        table, cls, columns = _kind(kind)
+        if column not in dict(columns):
+            raise ValueError('{} is not an indexed column of {}'.format(
+                column, table
+            ))
+        self.flush()
+        fresh_after = self._fresh_after(kind, max_age)
+        query = 'SELECT data FROM {} WHERE {} = ?'.format(table, column)
+        params = [value]
+        if fresh_after is not None:
+            query += ' AND stored >= ?'
+            params.append(fresh_after)
+        if 'date' in dict(columns):
+            query += ' ORDER BY date DESC'
+        with self._db_lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [cls.de_json(data, lazy, account_map) for data, in rows]
+
+    def purge(self) -> int:
+        """
+        Deletes stale records
+
+        :return: Number of deleted records
+        :rtype: int
+        """
+        self.flush()
+        deleted = 0
+        with self._db_lock, self._db:
+            for kind, (table, _, _) in KINDS.items():
+                fresh_after = self._fresh_after(kind, None)
+                if fresh_after is None:
+                    continue
+                deleted += self._db.execute(
+                    'DELETE FROM {} WHERE stored < ?'.format(table),
+                    (fresh_after,)
+                ).rowcount
+        return deleted
+
+    def count(self, kind: str) -> int:
+        table, _, _ = _kind(kind)
+        self.flush()
+        with self._db_lock:
+            return self._db.execute(
+                'SELECT COUNT(*) FROM {}'.format(table)
+            ).fetchone()[0]
+
+    def close(self):
+        """
+        Writes pending records and closes the database
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'pending': self._size,
+            'written': self.written,
+            'flushes': self.flushes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
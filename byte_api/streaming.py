@@ -0,0 +1,217 @@
+import re
+
+from . import decoders
+from .types import Account, Error, Post
+
+
+# Characters that matter while walking JSON outside of strings
+_STRUCTURAL = re.compile(rb'["{}\[\]:,]')
+# Rest of a string after its opening quote, including the closing one
+_STRING_END = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_ELEMENT = re.compile(rb'["{}\[\]]')
+_SCALAR_END = re.compile(rb'[,\]]')
+# Rest of a string up to its closing quote, or up to the end of the
+# buffer without splitting an escape sequence
+_STRING_REST = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+
+class _ElementScanner(object):
+    """
+    Finds the end of the JSON value starting at ``start`` of a growing
+    buffer. Scanning stops at the end of the buffer and resumes there
+    once more data arrived, so every byte is scanned once however the
+    value is split into chunks
+    """
+
+    __slots__ = ('pos', 'depth', 'in_string', 'scalar')
+
+    def __init__(self, buffer, start):
+        self.pos = start
+        self.depth = 0
+        self.in_string = False
+        self.scalar = buffer[start] not in b'{['
+
+    def scan(self, buffer):
+        # Returns the end of the value or None if it is not complete yet
+        size = len(buffer)
+        if self.scalar:
+            match = _SCALAR_END.search(buffer, self.pos)
+            if match is None:
+                self.pos = size
+                return None
+            return match.start()
+        pos = self.pos
+        depth = self.depth
+        in_string = self.in_string
+        end = None
+        while True:
+            if in_string:
+                pos = _STRING_REST.match(buffer, pos).end()
+                # Anything but the closing quote is a trailing backslash
+                # whose escaped character has not arrived yet
+                if pos >= size or buffer[pos] != 0x22:
+                    break
+                pos += 1
+                in_string = False
+                continue
+            match = _ELEMENT.search(buffer, pos)
+            if match is None:
+                pos = size
+                break
+            char = buffer[match.start()]
+            pos = match.end()
+            if char == 0x22:  # "
+                in_string = True
+            elif char in b'{[':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    end = pos
+                    break
+        self.pos = pos
+        self.depth = depth
+        self.in_string = in_string
+        return end
+
+
+class FeedStream(object):
+    """
+    Parses a feed response incrementally while it is being received and
+    yields each :class:`Post` of ``data.posts`` as soon as its JSON is
+    complete. Only the post being parsed is buffered, the rest of the
+    response (cursor, accounts) is decoded once iteration is over
+
+    :param chunks: Iterable of ``bytes`` chunks of the response body
+    :param lazy: Decode posts lazily
+    :type lazy: bool
+
+    :param account_map: Identity map for decoded accounts
+    :type account_map: :class:`AccountMap`
+
+    :param loads: JSON decoder, defaults to :data:`decoders.loads`
+    """
+
+    def __init__(self, chunks, lazy: bool = False, account_map=None,
+                 loads=None):
+        self.chunks = chunks
+        self.lazy = lazy
+        self.account_map = account_map
+        self.loads = loads or decoders.loads
+        self.success = None
+        self.cursor = None
+        self.accounts = None
+        self.error = None
+        self.done = False
+
+    def __iter__(self):
+        chunks = iter(self.chunks)
+        buffer = bytearray()
+        # Prefix of the response up to the posts array, without its items
+        prefix = None
+        # Containers enclosing the current position, as [kind, last key]
+        stack = []
+        expect_key = False
+        key = None
+        pos = 0
+        exhausted = False
+
+        def read():
+            for chunk in chunks:
+                if chunk:
+                    buffer.extend(chunk)
+                    return True
+            return False
+
+        # Walks up to the opening bracket of data.posts
+        while prefix is None:
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                if not read():
+                    exhausted = True
+                    break
+                continue
+            char = buffer[match.start()]
+            pos = match.end()
+            if char == 0x22:  # "
+                end = _STRING_END.match(buffer, pos)
+                if end is None:
+                    pos = match.start()
+                    if not read():
+                        exhausted = True
+                        break
+                    continue
+                if expect_key:
+                    key = bytes(buffer[pos:end.end() - 1])
+                    expect_key = False
+                pos = end.end()
+            elif char == 0x3a:  # :
+                if stack and stack[-1][0] == b'{':
+                    stack[-1][1] = key
+            elif char == 0x2c:  # ,
+                expect_key = bool(stack) and stack[-1][0] == b'{'
+            elif char in b'{[':
+                if char == 0x5b and len(stack) == 2 and \
+                        stack[0] == [b'{', b'data'] and \
+                        stack[1] == [b'{', b'posts']:
+                    prefix = bytes(buffer[:match.start()])
+                    del buffer[:pos]
+                    pos = 0
+                    break
+                stack.append([bytes((char,)), None])
+                expect_key = char == 0x7b
+            else:
+                if stack:
+                    stack.pop()
+                expect_key = False
+
+        if prefix is not None:
+            # Yields items of the posts array one by one
+            while True:
+                while pos < len(buffer) and buffer[pos] in b', \t\r\n':
+                    pos += 1
+                if pos >= len(buffer):
+                    del buffer[:]
+                    pos = 0
+                    if not read():
+                        raise ValueError('truncated feed response')
+                    continue
+                if buffer[pos] == 0x5d:  # ]
+                    del buffer[:pos + 1]
+                    break
+                start = pos
+                scanner = _ElementScanner(buffer, start)
+                end = scanner.scan(buffer)
+                while end is None:
+                    if not read():
+                        raise ValueError('truncated feed response')
+                    end = scanner.scan(buffer)
+                post = self.loads(bytes(buffer[start:end]))
+                del buffer[:end]
+                pos = 0
+                yield Post.de_json(post, self.lazy, self.account_map)
+
+        if not exhausted:
+            while read():
+                pass
+        if prefix is None:
+            meta = self.loads(bytes(buffer))
+        else:
+            meta = self.loads(prefix + b'[]' + bytes(buffer))
+        self._finish(meta)
+
+    def _finish(self, meta):
+        self.done = True
+        self.success = meta.get('success')
+        if 'error' in meta:
+            self.error = Error.de_json(meta['error'])
+            raise ValueError(self.error.message)
+        data = meta.get('data') or {}
+        self.cursor = data.get('cursor')
+        if 'accounts' in data:
+            self.accounts = {
+                account: Account.de_json(data['accounts'][account],
+                                         self.lazy, self.account_map)
+                for account in data['accounts'].keys()
+            }
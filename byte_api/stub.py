@@ -0,0 +1,414 @@
+"""
+Local stand-in of the Byte API for load and integration testing.
+Implements the endpoints used by :class:`Client` with synthetic data and
+configurable latency, errors, throttling and payload sizes. Run it
+standalone with::
+
+    $ python -m byte_api.stub --port 8080 --latency 0.02 --error-rate 0.01
+
+and point a client at it with ``Client(token, base_url=server.url)``
+"""
+import argparse
+import collections
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlsplit
+
+
+# (method, path pattern, handler) tried in order, groups are passed to
+# the handler as arguments
+ROUTES = [
+    ('GET', r'account/me/colors', 'colors'),
+    ('PUT', r'account/me', 'set_info'),
+    ('GET', r'account/id/([^/]+)/posts', 'user_posts'),
+    ('GET', r'account/id/([^/]+)', 'account'),
+    ('PUT', r'account/id/([^/]+)/follow', 'ok'),
+    ('DELETE', r'account/id/([^/]+)/follow', 'ok'),
+    ('PUT', r'post/id/([^/]+)/feedback/like', 'ok'),
+    ('DELETE', r'post/id/([^/]+)/feedback/like', 'ok'),
+    ('POST', r'post/id/([^/]+)/feedback/comment', 'comment'),
+    ('POST', r'feedback/comment/id/([^/]+)', 'ok'),
+    ('POST', r'post/id/([^/]+)/loop', 'loop'),
+    ('POST', r'rebyte', 'rebyte'),
+    ('GET', r'timeline', 'timeline'),
+    ('GET', r'categories/([^/]+)/feed', 'category')
+]
+
+_ROUTES = [
+    (method, re.compile('^{}$'.format(pattern)), name)
+    for method, pattern, name in ROUTES
+]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, Nagle's algorithm would
+    # hold the body back until the delayed ACK of the client
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_request(self):
+        server = self.server
+        url = urlsplit(self.path)
+        path = url.path.strip('/')
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        for method, pattern, name in _ROUTES:
+            match = pattern.match(path)
+            if match is not None and method == self.command:
+                break
+        else:
+            name = None
+        server.count(self.command, name or 'unknown')
+        delay = server.latency
+        if server.jitter:
+            delay += server.random(0, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if server.token is not None and \
+                self.headers.get('Authorization') != server.token:
+            # The API answers bad tokens with an empty body
+            return self.reply(200)
+        if server.throttle_rate and \
+                server.random(0, 1) < server.throttle_rate:
+            return self.reply(429, encode(error(429, 'too many requests')),
+                              {'Retry-After': str(server.retry_after)})
+        if server.error_rate and server.random(0, 1) < server.error_rate:
+            return self.reply(503, encode(error(503, 'service unavailable')))
+        if name is None:
+            return self.reply(404, encode(error(404, 'not found')))
+        query = {
+            key: values[-1] for key, values in parse_qs(url.query).items()
+        }
+        data = getattr(server, 'do_' + name)(
+            *match.groups(), query=query, body=body
+        )
+        self.reply(200, encode(data))
+
+    do_GET = do_PUT = do_POST = do_DELETE = handle_request
+
+
+def encode(data) -> bytes:
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def error(code: int, message: str) -> dict:
+    return {'success': 0, 'error': {'code': code, 'message': message}}
+
+
+def success(data=None) -> dict:
+    if data is None:
+        return {'success': 1}
+    return {'data': data, 'success': 1}
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    """
+    Threaded HTTP server emulating the Byte API
+
+    :param host: Interface to listen on
+    :type host: str
+
+    :param port: Port to listen on, 0 picks a free one
+    :type port: int
+
+    :param latency: Seconds added to every response
+    :type latency: float
+
+    :param jitter: Upper bound of random seconds added on top of
+        ``latency``
+    :type jitter: float
+
+    :param error_rate: Fraction of requests answered with 503
+    :type error_rate: float
+
+    :param throttle_rate: Fraction of requests answered with 429
+    :type throttle_rate: float
+
+    :param retry_after: ``Retry-After`` seconds of 429 responses
+    :type retry_after: float
+
+    :param page_size: Posts per feed page
+    :type page_size: int
+
+    :param pages: Pages of every feed, the last one has no cursor
+    :type pages: int
+
+    :param comments: Comments embedded in every post
+    :type comments: int
+
+    :param caption_size: Length of post captions, comment bodies and bios
+    :type caption_size: int
+
+    :param token: Accepted Authorization token, None accepts any
+    :type token: str
+
+    :param seed: Seed of random errors, throttling and jitter
+    :type seed: int
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0, jitter: float = 0,
+                 error_rate: float = 0, throttle_rate: float = 0,
+                 retry_after: float = 1, page_size: int = 20,
+                 pages: int = 5, comments: int = 2, caption_size: int = 40,
+                 token: str = None, seed: int = None,
+                 verbose: bool = False):
+        super().__init__((host, port), StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.page_size = page_size
+        self.pages = pages
+        self.comments = comments
+        self.caption_size = caption_size
+        self.token = token
+        self.verbose = verbose
+        self.requests = collections.Counter()
+        self.loops = collections.Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return 'http://{}:{}/'.format(host, port)
+
+    def random(self, low: float, high: float) -> float:
+        with self._lock:
+            return self._random.uniform(low, high)
+
+    def count(self, method: str, name: str):
+        with self._lock:
+            self.requests[method, name] += 1
+
+    def start(self):
+        """
+        Serves requests on a background thread
+        """
+        self._thread = threading.Thread(target=self.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    # Synthetic data
+
+    def text(self, seed: str) -> str:
+        text = (seed + ' ') * (self.caption_size // (len(seed) + 1) + 1)
+        return text[:self.caption_size]
+
+    def make_account(self, id: str) -> dict:
+        number = sum(map(ord, id))
+        return {
+            'avatarURL': 'https://e.byte.co/avatar/{}.jpg'.format(id),
+            'backgroundColor': '#000000',
+            'bio': self.text('bio of ' + id),
+            'displayName': 'User ' + id,
+            'followerCount': number * 7,
+            'followingCount': number * 3,
+            'foregroundColor': '#CCD6E9',
+            'id': id,
+            'isChannel': False,
+            'isFollowing': False,
+            'isFollowed': False,
+            'loopCount': number * 1000,
+            'loopsConsumedCount': number * 10,
+            'registrationDate': 1580228662 + number,
+            'username': 'user_' + id
+        }
+
+    def make_mention(self, id: str) -> dict:
+        return {
+            'accountID': id,
+            'username': 'user_' + id,
+            'text': '@user_' + id,
+            'range': {'start': 0, 'stop': len(id) + 6},
+            'byteRange': {'start': 0, 'stop': len(id) + 6}
+        }
+
+    def make_comment(self, post_id: str, number: int, author_id: str,
+                     body: str = None) -> dict:
+        return {
+            'id': '{}-{}'.format(post_id, number),
+            'postID': post_id,
+            'authorID': author_id,
+            'body': body if body is not None else
+            self.text('comment {} on {}'.format(number, post_id)),
+            'mentions': [self.make_mention(author_id)],
+            'date': 1580089742 + number,
+            'accounts': {author_id: self.make_account(author_id)}
+        }
+
+    def make_post(self, id: str, author_id: str) -> dict:
+        number = sum(map(ord, id))
+        with self._lock:
+            loops = self.loops[id]
+        return {
+            'id': id,
+            'type': 0,
+            'authorID': author_id,
+            'caption': self.text('caption of ' + id),
+            'allowCuration': True,
+            'allowRemix': number % 3 == 0,
+            'category': 'comedy',
+            'mentions': [self.make_mention(author_id)],
+            'date': 1580089743 + number,
+            'videoSrc': 'https://e.byte.co/video/{}.mp4'.format(id),
+            'thumbSrc': 'https://e.byte.co/thumb/{}.jpg'.format(id),
+            'commentCount': self.comments,
+            'comments': [
+                self.make_comment(id, i, 'commenter{}'.format(i))
+                for i in range(self.comments)
+            ],
+            'likeCount': number * 13 % 1000,
+            'likedByMe': False,
+            'loopCount': number * 101 % 100000 + loops,
+            'rebytedByMe': False
+        }
+
+    def make_feed(self, name: str, query: dict, author_id: str = None):
+        try:
+            page = int(query.get('cursor') or 0)
+        except ValueError:
+            page = 0
+        posts = []
+        authors = set()
+        for i in range(self.page_size):
+            id = '{}-{}-{}'.format(name, page, i)
+            author = author_id or 'author{}'.format(i % 10)
+            authors.add(author)
+            posts.append(self.make_post(id, author))
+        data = {
+            'posts': posts,
+            'accounts': {
+                author: self.make_account(author) for author in authors
+            }
+        }
+        if page + 1 < self.pages:
+            data['cursor'] = str(page + 1)
+        return success(data)
+
+    # Endpoints
+
+    def do_ok(self, *args, query, body):
+        return success()
+
+    def do_account(self, id, query, body):
+        return success(self.make_account(id))
+
+    def do_set_info(self, query, body):
+        return success(self.make_account('me'))
+
+    def do_colors(self, query, body):
+        return success({'colors': [
+            {'id': i, 'background': '#00000{}'.format(i),
+             'foreground': '#FFFFF{}'.format(i)}
+            for i in range(1, 6)
+        ]})
+
+    def do_comment(self, id, query, body):
+        text = None
+        if body:
+            text = json.loads(body.decode('utf-8')).get('body')
+        with self._lock:
+            number = self.requests['POST', 'comment']
+        return success(self.make_comment(id, number, 'me', text))
+
+    def do_loop(self, id, query, body):
+        with self._lock:
+            self.loops[id] += 1
+            count = self.loops[id]
+        return success({'postID': id, 'loopCount': count})
+
+    def do_rebyte(self, query, body):
+        id = json.loads(body.decode('utf-8'))['postID'] if body else 'post'
+        post = self.make_post(id, 'author0')
+        return success({
+            'accounts': {
+                'me': self.make_account('me'),
+                'author0': self.make_account('author0')
+            },
+            'authorID': 'me',
+            'date': 1580089743,
+            'id': 'rebyte-' + id,
+            'post': post
+        })
+
+    def do_timeline(self, query, body):
+        return self.make_feed('timeline', query)
+
+    def do_user_posts(self, id, query, body):
+        return self.make_feed('user-' + id, query, id)
+
+    def do_category(self, name, query, body):
+        return self.make_feed('category-' + name, query)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m byte_api.stub',
+        description='Local stand-in of the Byte API'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--jitter', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--throttle-rate', type=float, default=0)
+    parser.add_argument('--retry-after', type=float, default=1)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--comments', type=int, default=2)
+    parser.add_argument('--caption-size', type=int, default=40)
+    parser.add_argument('--token')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--verbose', action='store_true')
+    args = vars(parser.parse_args())
+    server = StubServer(**args)
+    print('Serving the Byte API stub on {}'.format(server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
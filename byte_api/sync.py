@@ -0,0 +1,342 @@
+import array
+import hashlib
+import json
+import math
+import os
+import struct
+import sys
+import zlib
+
+
+MAGIC = b'BYTESYN2'
+# Size of the JSON state following the magic
+HEADER = struct.Struct('<I')
+
+# Post attributes whose changes make a seen post changed. Loop counts
+# change on every view, so they are left out by default
+FINGERPRINT_FIELDS = ('caption', 'category', 'comment_count', 'like_count')
+
+
+class BloomFilter(object):
+    """
+    Compact set of strings answering membership with no false negatives
+    and about ``error_rate`` false positives while it holds at most
+    ``capacity`` items
+
+    :param capacity: Expected number of items
+    :type capacity: int
+
+    :param error_rate: False positive probability at capacity
+    :type error_rate: float
+
+    :param bits: Saved bits of a filter of the same capacity and
+        error rate
+    :type bits: bytes
+
+    :param count: Number of items added to the saved bits
+    :type count: int
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001,
+                 bits: bytes = None, count: int = 0):
+        if capacity < 1:
+            raise ValueError('capacity must be a positive number')
+        if not 0 < error_rate < 1:
+            raise ValueError('error_rate must be between 0 and 1')
+        self.capacity = capacity
+        self.error_rate = error_rate
+        size = int(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.size = max(8, size + -size % 8)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        if bits is None:
+            self.bits = bytearray(self.size // 8)
+        elif len(bits) != self.size // 8:
+            raise ValueError('bits do not match capacity and error_rate')
+        else:
+            self.bits = bytearray(bits)
+        self.count = count
+
+    def _positions(self, item):
+        digest = hashlib.sha1(item.encode('utf-8')).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:16], 'little') | 1
+        size = self.size
+        return [(first + i * second) % size for i in range(self.hashes)]
+
+    def add(self, item: str) -> bool:
+        """
+        Adds an item
+
+        :return: False if the item was probably there already
+        :rtype: bool
+        """
+        bits = self.bits
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[position >> 3] & 1 << (position & 7)
+                   for position in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter(object):
+    """
+    Bloom filter growing with its items: once the newest
+    :class:`BloomFilter` is full, another one of twice the capacity and
+    half the error rate is added, so the false positive rate stays below
+    twice ``error_rate`` however many items are added
+
+    :param capacity: Expected number of items of the first filter
+    :type capacity: int
+
+    :param error_rate: False positive probability of the first filter
+    :type error_rate: float
+
+    :param filters: Saved filters, oldest first
+    :type filters: list of :class:`BloomFilter`
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001,
+                 filters: list = None):
+        if filters:
+            self.filters = list(filters)
+        else:
+            self.filters = [BloomFilter(capacity, error_rate)]
+
+    def add(self, item: str) -> bool:
+        """
+        Adds an item
+
+        :return: False if the item was probably there already
+        :rtype: bool
+        """
+        if item in self:
+            return False
+        current = self.filters[-1]
+        if current.full:
+            current = BloomFilter(current.capacity * 2,
+                                  current.error_rate / 2)
+            self.filters.append(current)
+        return current.add(item)
+
+    def __contains__(self, item):
+        return any(item in bloom for bloom in self.filters)
+
+    def __len__(self):
+        return sum(bloom.count for bloom in self.filters)
+
+    @property
+    def capacity(self) -> int:
+        return sum(bloom.capacity for bloom in self.filters)
+
+
+def fingerprint(post, fields=FINGERPRINT_FIELDS) -> str:
+    """
+    Checksum of post attributes, see :data:`FINGERPRINT_FIELDS`
+    """
+    values = json.dumps([getattr(post, name, None) for name in fields])
+    return '{:08x}'.format(zlib.crc32(values.encode('utf-8')))
+
+
+class FeedSync(object):
+    """
+    Incremental sync of a feed. Every run walks the feed from the top
+    and yields only posts that are new or whose fingerprint changed
+    since they were seen, and stops early after ``stop_after`` posts in
+    a row that were seen before, changed or not.
+
+    Seen post ids are kept in a :class:`ScalableBloomFilter`, so a few
+    new posts may be skipped as false positives, and the filter grows
+    instead of filling up. Fingerprints of seen posts are kept in a
+    table of ``capacity`` slots addressed by post id; posts sharing a
+    slot may be yielded as changed although they are not.
+
+    With ``path`` the state and the cursor of an unfinished run are
+    saved after every consumed page, and a sync created after a crash
+    resumes the run from that cursor. Posts of a page are marked seen
+    only once the caller moved past them, so a post may be yielded
+    again after a crash but is never lost
+
+    :param fetch: Callable taking a cursor (None for the first page)
+        and returning a :class:`Feed`
+    :param path: File the state is saved to and loaded from
+    :type path: str
+
+    :param capacity: Expected number of seen posts
+    :type capacity: int
+
+    :param error_rate: False positive rate of the seen set
+    :type error_rate: float
+
+    :param stop_after: Seen posts in a row ending a run
+    :type stop_after: int
+
+    :param max_pages: Stop a run after this many pages
+    :type max_pages: int
+
+    :param fingerprint: Callable returning a fingerprint of a post,
+        defaults to :func:`fingerprint`
+    """
+
+    def __init__(self, fetch, path: str = None, capacity: int = 100000,
+                 error_rate: float = 0.001, stop_after: int = 20,
+                 max_pages: int = None, fingerprint=fingerprint):
+        if stop_after < 1:
+            raise ValueError('stop_after must be a positive number')
+        self.fetch = fetch
+        self.path = path
+        self.stop_after = stop_after
+        self.max_pages = max_pages
+        self.fingerprint = fingerprint
+        self.cursor = None
+        self.runs = 0
+        self.pages_fetched = 0
+        self.yielded = 0
+        self.changed = 0
+        self.skipped = 0
+        if path is not None and os.path.exists(path):
+            self._load(path)
+        else:
+            self.seen = ScalableBloomFilter(capacity, error_rate)
+            self.versions = array.array('I', bytes(4 * capacity))
+
+    def _load(self, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('{} is not a sync state'.format(path))
+        size, = HEADER.unpack_from(data, len(MAGIC))
+        start = len(MAGIC) + HEADER.size
+        state = json.loads(data[start:start + size].decode('utf-8'))
+        start += size
+        filters = []
+        for capacity, error_rate, count in state['filters']:
+            size = len(BloomFilter(capacity, error_rate).bits)
+            filters.append(BloomFilter(capacity, error_rate,
+                                       data[start:start + size], count))
+            start += size
+        self.seen = ScalableBloomFilter(filters=filters)
+        self.versions = array.array('I', data[start:])
+        if sys.byteorder == 'big':
+            self.versions.byteswap()
+        self.cursor = state['cursor']
+        self.runs = state['runs']
+
+    def save(self):
+        """
+        Writes the state to ``path``, replacing the file atomically
+        """
+        if self.path is None:
+            return
+        state = json.dumps({
+            'cursor': self.cursor,
+            'runs': self.runs,
+            'filters': [[bloom.capacity, bloom.error_rate, bloom.count]
+                        for bloom in self.seen.filters]
+        }).encode('utf-8')
+        versions = self.versions
+        if sys.byteorder == 'big':
+            versions = array.array('I', versions)
+            versions.byteswap()
+        temp = self.path + '.tmp'
+        with open(temp, 'wb') as file:
+            file.write(MAGIC)
+            file.write(HEADER.pack(len(state)))
+            file.write(state)
+            for bloom in self.seen.filters:
+                file.write(bloom.bits)
+            file.write(versions.tobytes())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp, self.path)
+
+    @property
+    def resuming(self) -> bool:
+        """
+        The last run did not finish and the next one continues it
+        """
+        return self.cursor is not None
+
+    def _version(self, post):
+        # Slot of the post in the fingerprint table and the checksum of
+        # its fingerprint stored there
+        slot = zlib.crc32(post.id.encode('utf-8')) % len(self.versions)
+        return slot, zlib.crc32(self.fingerprint(post).encode('utf-8'))
+
+    def run(self):
+        """
+        Yields new and changed posts of one run
+
+        :rtype: generator of :class:`Post`
+        """
+        cursor = self.cursor
+        versions = self.versions
+        known = 0
+        pages = 0
+        while True:
+            feed = self.fetch(cursor)
+            pages += 1
+            self.pages_fetched += 1
+            consumed = []
+            for post in feed.posts:
+                slot, version = self._version(post)
+                if post.id in self.seen:
+                    known += 1
+                    if versions[slot] == version:
+                        self.skipped += 1
+                    else:
+                        consumed.append((post.id, slot, version))
+                        self.yielded += 1
+                        self.changed += 1
+                        yield post
+                    if known >= self.stop_after:
+                        break
+                    continue
+                known = 0
+                consumed.append((post.id, slot, version))
+                self.yielded += 1
+                yield post
+            for id, slot, version in consumed:
+                self.seen.add(id)
+                versions[slot] = version
+            done = known >= self.stop_after or not feed.posts or \
+                not feed.cursor or feed.cursor == cursor or \
+                (self.max_pages is not None and pages >= self.max_pages)
+            if done:
+                self.cursor = None
+                self.runs += 1
+            else:
+                cursor = self.cursor = feed.cursor
+            self.save()
+            if done:
+                return
+
+    def __iter__(self):
+        return self.run()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'runs': self.runs,
+            'pages': self.pages_fetched,
+            'yielded': self.yielded,
+            'changed': self.changed,
+            'skipped': self.skipped,
+            'seen': len(self.seen),
+            'filters': len(self.seen.filters)
+        }
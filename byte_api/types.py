@@ -1,24 +1,65 @@
-import json
+import threading
+import weakref
+
+from . import decoders
+from .schema import (compile_schemas, compile_state, dict_of, field,
+                     list_of, nested)
 
 
 class JsonDeserializable(object):
+    __slots__ = ()
+
+    # Fields decoded from JSON, see byte_api.schema. Decoders generated
+    # from them are installed by compile_schemas at the end of the module
+    _schema = ()
+    # Whether de_json takes the lazy flag and an account map
+    _context = False
+    # Attributes a lazy instance decodes on first access, mapped to
+    # (json key, decoder taking the raw value and the account map,
+    # whether the key is optional); generated from _schema
+    _lazy_fields = {}
+
     @staticmethod
     def check_json(json_type):
         if type(json_type) == dict:
             return json_type
-        elif type(json_type) == str:
-            return json.loads(json_type)
+        elif type(json_type) in (str, bytes, bytearray):
+            return decoders.loads(json_type)
         else:
             raise ValueError('json_type must be a json dict or string.')
 
+    def __getattr__(self, name):
+        # Only reached when regular lookup fails: either the attribute
+        # does not exist or a lazy instance has not decoded it yet.
+        # Every class with lazy fields has a _json slot, which eager
+        # instances set to None. Special names are looked up often, e.g.
+        # by pickle, and are never lazy
+        if name[:2] == '__':
+            raise AttributeError(name)
+        field = self._lazy_fields.get(name)
+        raw = self._json if field is not None else None
+        if raw is None:
+            raise AttributeError("'{}' object has no attribute '{}'".format(
+                type(self).__name__, name
+            ))
+        key, decode, optional = field
+        if optional and key not in raw:
+            value = None
+        else:
+            value = raw[key]
+            if decode is not None:
+                value = decode(value, self._account_map)
+        setattr(self, name, value)
+        return value
+
 
 class Error(JsonDeserializable):
-    @classmethod
-    def de_json(cls, json_type: dict):
-        obj = cls.check_json(json_type)
-        code = obj['code']
-        message = obj['message']
-        return cls(code, message)
+    __slots__ = ('code', 'message')
+
+    _schema = (
+        field('code', 'code'),
+        field('message', 'message')
+    )
 
     def __init__(self, code: int, message: str):
         self.code = code
@@ -26,33 +67,33 @@ class Error(JsonDeserializable):
 
 
 class Response(JsonDeserializable):
+    __slots__ = ('data', 'error', 'success')
+
     @classmethod
     def de_json(cls, json_type: dict):
         obj = cls.check_json(json_type)
         error = None
         data = None
         if 'error' in obj:
-            error = Error.de_json(obj['error'])
+            error = Error._decode(obj['error'])
         if 'data' in obj:
             data = obj['data']
         success = obj['success']
         return cls(success, data=data, error=error)
 
     def __init__(self, success: int, data=None, error=None):
-        if data:
-            self.data = data
-        if error:
-            self.error = error
+        self.data = data if data else None
+        self.error = error if error else None
         self.success = success
 
 
 class Range(JsonDeserializable):
-    @classmethod
-    def de_json(cls, json_type: dict):
-        obj = cls.check_json(json_type)
-        start = obj['start']
-        stop = obj['stop']
-        return cls(start, stop)
+    __slots__ = ('start', 'stop')
+
+    _schema = (
+        field('start', 'start'),
+        field('stop', 'stop')
+    )
 
     def __init__(self, start: int, stop: int):
         self.start = start
@@ -60,15 +101,15 @@ class Range(JsonDeserializable):
 
 
 class Mention(JsonDeserializable):
-    @classmethod
-    def de_json(cls, json_type: dict):
-        obj = cls.check_json(json_type)
-        account_id = obj['accountID']
-        username = obj['username']
-        text = obj['text']
-        range = Range.de_json(obj['range'])
-        byte_range = Range.de_json(obj['byteRange'])
-        return cls(account_id, username, text, range, byte_range)
+    __slots__ = ('account_id', 'username', 'text', 'range', 'byte_range')
+
+    _schema = (
+        field('account_id', 'accountID'),
+        field('username', 'username'),
+        field('text', 'text'),
+        nested('range', 'range', 'Range'),
+        nested('byte_range', 'byteRange', 'Range')
+    )
 
     def __init__(self, account_id: str, username: str,
                  text: str, range: Range, byte_range: Range):
@@ -80,24 +121,19 @@ class Mention(JsonDeserializable):
 
 
 class Comment(JsonDeserializable):
-    @classmethod
-    def de_json(cls, json_type: dict):
-        obj = cls.check_json(json_type)
-        id = obj['id']
-        post_id = obj['postID']
-        author_id = obj['authorID']
-        body = obj['body']
-        mentions = [
-            Mention.de_json(mention) for mention in obj['mentions']
-        ]
-        date = obj['date']
-        options = {}
-        if 'accounts' in obj:
-            options['accounts'] = {
-                account: Account.de_json(obj['accounts'][account])
-                for account in obj['accounts'].keys()
-            }
-        return cls(id, post_id, author_id, body, mentions, date, options)
+    __slots__ = ('id', 'post_id', 'author_id', 'body', 'mentions', 'date',
+                 'accounts', '_json', '_account_map')
+
+    _schema = (
+        field('id', 'id'),
+        field('post_id', 'postID'),
+        field('author_id', 'authorID'),
+        field('body', 'body'),
+        list_of('mentions', 'mentions', 'Mention'),
+        field('date', 'date'),
+        dict_of('accounts', 'accounts', 'Account', optional=True)
+    )
+    _context = True
 
     def __init__(self, id: str, post_id: str, author_id: str,
                  body: str, mentions: list, date: int, options: dict):
@@ -107,43 +143,40 @@ class Comment(JsonDeserializable):
         self.body = body
         self.mentions = mentions
         self.date = date
+        self.accounts = None
+        self._json = None
+        self._account_map = None
         for key in options:
             setattr(self, key, options[key])
 
 
 class Post(JsonDeserializable):
-    @classmethod
-    def de_json(cls, json_type: dict):
-        obj = cls.check_json(json_type)
-        id = obj['id']
-        type = obj['type']
-        author_id = obj['authorID']
-        caption = obj['caption']
-        allow_curation = obj['allowCuration']
-        allow_remix = obj['allowRemix']
-        mentions = [
-            Mention.de_json(mention) for mention in obj['mentions']
-        ]
-        date = obj['date']
-        video_src = obj['videoSrc']
-        thumb_src = obj['thumbSrc']
-        comment_count = obj['commentCount']
-        like_count = obj['likeCount']
-        liked_by_me = obj['likedByMe']
-        loop_count = obj['loopCount']
-        rebyted_by_me = obj['rebytedByMe']
-        options = {}
-        if 'category' in obj:
-            options['category'] = obj['category']
-        if 'comments' in obj:
-            options['comments'] = [
-                Comment.de_json(comment) for comment in obj['comments']
-            ]
-        return cls(id, type, author_id, caption,
-                   allow_curation, allow_remix,
-                   mentions, date, video_src, thumb_src,
-                   comment_count, like_count, liked_by_me,
-                   loop_count, rebyted_by_me, options)
+    __slots__ = ('id', 'type', 'author_id', 'caption', 'allow_curation',
+                 'allow_remix', 'mentions', 'date', 'video_src', 'thumb_src',
+                 'comment_count', 'like_count', 'liked_by_me', 'loop_count',
+                 'rebyted_by_me', 'category', 'comments', '_json',
+                 '_account_map')
+
+    _schema = (
+        field('id', 'id'),
+        field('type', 'type'),
+        field('author_id', 'authorID'),
+        field('caption', 'caption'),
+        field('allow_curation', 'allowCuration'),
+        field('allow_remix', 'allowRemix'),
+        list_of('mentions', 'mentions', 'Mention'),
+        field('date', 'date'),
+        field('video_src', 'videoSrc'),
+        field('thumb_src', 'thumbSrc'),
+        field('comment_count', 'commentCount'),
+        field('like_count', 'likeCount'),
+        field('liked_by_me', 'likedByMe'),
+        field('loop_count', 'loopCount'),
+        field('rebyted_by_me', 'rebytedByMe'),
+        field('category', 'category', optional=True),
+        list_of('comments', 'comments', 'Comment', optional=True)
+    )
+    _context = True
 
     def __init__(self, id: str, type: int, author_id: str, caption: str,
                  allow_curation: bool, allow_remix: bool,
@@ -165,42 +198,48 @@ class Post(JsonDeserializable):
         self.liked_by_me = liked_by_me
         self.loop_count = loop_count
         self.rebyted_by_me = rebyted_by_me
+        self.category = None
+        self.comments = None
+        self._json = None
+        self._account_map = None
         for key in options:
             setattr(self, key, options[key])
 
 
 class Feed(JsonDeserializable):
+    __slots__ = ('posts', 'cursor', 'accounts')
+
+    # Fields of the data object of a feed response
+    _schema = (
+        list_of('posts', 'posts', 'Post'),
+        field('cursor', 'cursor', optional=True),
+        dict_of('accounts', 'accounts', 'Account', optional=True)
+    )
+    _context = True
+
     @classmethod
-    def de_json(cls, json_type: dict):
+    def de_json(cls, json_type: dict, lazy: bool = False,
+                account_map=None):
         obj = cls.check_json(json_type)
-        posts = [
-            Post.de_json(post) for post in obj['data']['posts']
-        ]
-        success = obj['success']
-        options = {}
-        if 'cursor' in obj['data']:
-            options['cursor'] = obj['data']['cursor']
-        if 'accounts' in obj['data']:
-            options['accounts'] = {
-                account: Account.de_json(obj['data']['accounts'][account])
-                for account in obj['data']['accounts'].keys()
-            }
-        return Response(success, cls(posts, options))
+        feed = cls._decode(obj['data'], lazy, account_map, cls)
+        return Response(obj['success'], feed)
 
     def __init__(self, posts: list, options: dict):
         self.posts = posts
+        self.cursor = None
+        self.accounts = None
         for key in options:
             setattr(self, key, options[key])
 
 
 class Color(JsonDeserializable):
-    @classmethod
-    def de_json(cls, json_type: dict):
-        obj = cls.check_json(json_type)
-        background = obj['background']
-        foreground = obj['foreground']
-        id = obj['id']
-        return cls(background, foreground, id)
+    __slots__ = ('background', 'foreground', 'id')
+
+    _schema = (
+        field('background', 'background'),
+        field('foreground', 'foreground'),
+        field('id', 'id')
+    )
 
     def __init__(self, background: str, foreground: str, id: int):
         self.background = background
@@ -209,56 +248,49 @@ class Color(JsonDeserializable):
 
 
 class Colors(JsonDeserializable):
-    @classmethod
-    def de_json(cls, json_type: dict):
-        obj = cls.check_json(json_type)
-        colors = [
-            Color.de_json(color) for color in obj['colors']
-        ]
-        return cls(colors)
+    __slots__ = ('colors',)
+
+    _schema = (
+        list_of('colors', 'colors', 'Color'),
+    )
 
     def __init__(self, colors: list):
         self.colors = colors
 
 
 class Account(JsonDeserializable):
-    @classmethod
-    def de_json(cls, json_type: dict):
-        obj = cls.check_json(json_type)
-        background_color = obj['backgroundColor']
-        follower_count = obj['followerCount']
-        following_count = obj['followingCount']
-        foreground_color = obj['foregroundColor']
-        id = obj['id']
-        is_channel = obj['isChannel']
-        loop_count = obj['loopCount']
-        loops_consumed_count = obj['loopsConsumedCount']
-        registration_date = obj['registrationDate']
-        username = obj['username']
-        options = {}
-        if 'avatarURL' in obj:
-            options['avatar_url'] = obj['avatarURL']
-        if 'isDeactivated' in obj:
-            options['is_deactivated'] = obj['isDeactivated']
-        if 'isRegistered' in obj:
-            options['is_registered'] = obj['isRegistered']
-        if 'isBlocked' in obj:
-            options['is_blocked'] = obj['isBlocked']
-        if 'bio' in obj:
-            options['bio'] = obj['bio']
-        if 'isFollowing' in obj:
-            options['is_following'] = obj['isFollowing']
-        if 'isFollowed' in obj:
-            options['is_followed'] = obj['isFollowed']
-        if 'isSuspended' in obj:
-            options['is_suspended'] = obj['isSuspended']
-        if 'displayName' in obj:
-            options['display_name'] = obj['displayName']
-        return cls(background_color,
-                   follower_count, following_count,
-                   foreground_color, id, is_channel,
-                   loop_count, loops_consumed_count,
-                   registration_date, username, options)
+    __slots__ = ('background_color', 'follower_count', 'following_count',
+                 'foreground_color', 'id', 'is_channel', 'loop_count',
+                 'loops_consumed_count', 'registration_date', 'username',
+                 'avatar_url', 'is_deactivated', 'is_registered',
+                 'is_blocked', 'bio', 'is_following', 'is_followed',
+                 'is_suspended', 'display_name', '_json', '_account_map',
+                 '__weakref__')
+
+    _schema = (
+        field('background_color', 'backgroundColor'),
+        field('follower_count', 'followerCount'),
+        field('following_count', 'followingCount'),
+        field('foreground_color', 'foregroundColor'),
+        field('id', 'id'),
+        field('is_channel', 'isChannel'),
+        field('loop_count', 'loopCount'),
+        field('loops_consumed_count', 'loopsConsumedCount'),
+        field('registration_date', 'registrationDate'),
+        field('username', 'username'),
+        field('avatar_url', 'avatarURL', optional=True),
+        field('is_deactivated', 'isDeactivated', optional=True),
+        field('is_registered', 'isRegistered', optional=True),
+        field('is_blocked', 'isBlocked', optional=True),
+        field('bio', 'bio', optional=True),
+        field('is_following', 'isFollowing', optional=True),
+        field('is_followed', 'isFollowed', optional=True),
+        field('is_suspended', 'isSuspended', optional=True),
+        field('display_name', 'displayName', optional=True)
+    )
+    _context = True
+    # Decoded accounts are resolved through the account map
+    _identity = True
 
     def __init__(self, background_color: str,
                  follower_count: int, following_count: int,
@@ -275,17 +307,43 @@ class Account(JsonDeserializable):
         self.loops_consumed_count = loops_consumed_count
         self.registration_date = registration_date
         self.username = username
+        self.avatar_url = None
+        self.is_deactivated = None
+        self.is_registered = None
+        self.is_blocked = None
+        self.bio = None
+        self.is_following = None
+        self.is_followed = None
+        self.is_suspended = None
+        self.display_name = None
+        self._json = None
+        self._account_map = None
         for key in options:
             setattr(self, key, options[key])
 
+    def _update(self, other):
+        # Takes over every field of a newer snapshot of the same account.
+        # Fields a lazy snapshot has not decoded yet are dropped, so they
+        # are decoded from its payload on next access
+        for name in self.__slots__:
+            if name == '__weakref__':
+                continue
+            try:
+                setattr(self, name, object.__getattribute__(other, name))
+            except AttributeError:
+                try:
+                    delattr(self, name)
+                except AttributeError:
+                    pass
+
 
 class LoopCounter(JsonDeserializable):
-    @classmethod
-    def de_json(cls, json_type: dict):
-        obj = cls.check_json(json_type)
-        id = obj['postID']
-        loop_count = obj['loopCount']
-        return cls(id, loop_count)
+    __slots__ = ('id', 'loop_count')
+
+    _schema = (
+        field('id', 'postID'),
+        field('loop_count', 'loopCount')
+    )
 
     def __init__(self, id: str, loop_count: int):
         self.id = id
@@ -293,18 +351,16 @@ class LoopCounter(JsonDeserializable):
 
 
 class Rebyte(JsonDeserializable):
-    @classmethod
-    def de_json(cls, json_type: dict):
-        obj = cls.check_json(json_type)
-        accounts = {
-            account: Account.de_json(obj['accounts'][account])
-            for account in obj['accounts'].keys()
-        }
-        author_id = obj['authorID']
-        date = obj['date']
-        id = obj['id']
-        post = Post.de_json(obj['post'])
-        return cls(accounts, author_id, date, id, post)
+    __slots__ = ('accounts', 'author_id', 'date', 'id', 'post')
+
+    _schema = (
+        dict_of('accounts', 'accounts', 'Account'),
+        field('author_id', 'authorID'),
+        field('date', 'date'),
+        field('id', 'id'),
+        nested('post', 'post', 'Post')
+    )
+    _context = True
 
     def __init__(self, accounts: dict, author_id: str,
                  date: int, id: str, post: Post):
@@ -313,3 +369,58 @@ class Rebyte(JsonDeserializable):
         self.date = date
         self.id = id
         self.post = post
+
+
+class AccountMap(object):
+    """
+    Identity map resolving every account id to a single shared
+    :class:`Account`. A newer snapshot of a known account updates the
+    shared instance in place instead of creating a duplicate
+
+    :param weak: Drop accounts nobody references anymore
+    :type weak: bool
+    """
+
+    def __init__(self, weak: bool = True):
+        if weak:
+            self._accounts = weakref.WeakValueDictionary()
+        else:
+            self._accounts = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, account: Account) -> Account:
+        """
+        Returns the shared instance for the id of ``account``,
+        registering ``account`` itself if the id is new
+
+        :rtype: :class:`Account`
+        """
+        id = account.id
+        with self._lock:
+            existing = self._accounts.get(id)
+            if existing is None:
+                self._accounts[id] = account
+                return account
+            if existing is not account:
+                existing._update(account)
+        return existing
+
+    def get(self, id: str) -> Account:
+        return self._accounts.get(id)
+
+    def clear(self):
+        with self._lock:
+            self._accounts.clear()
+
+    def __contains__(self, id):
+        return id in self._accounts
+
+    def __len__(self):
+        return len(self._accounts)
+
+
+compile_schemas((Error, Range, Mention, Comment, Post, Feed, Color, Colors,
+                 Account, LoopCounter, Rebyte),
+                JsonDeserializable.check_json)
+compile_state((Error, Response, Range, Mention, Comment, Post, Feed, Color,
+               Colors, Account, LoopCounter, Rebyte))
@@ -25,5 +25,10 @@ setup(
     license='MIT',
 
     packages=find_packages(),
-    install_requires=['requests']
+    install_requires=['requests'],
+    extras_require={
+        'async': ['aiohttp'],
+        'speedups': ['orjson'],
+        'numpy': ['numpy']
+    }
 )
@@ -0,0 +1,495 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import pytest
+from byte_api.api import Api, AuthError
+from byte_api.bulk import BulkOperation
+from byte_api.cache import MemoryCache
+from byte_api.client import Client
+from byte_api.coalesce import SingleFlight
+from byte_api.decoders import get_decoder, stdlib_loads
+from byte_api.loops import LoopAggregator
+from byte_api.hooks import endpoint_of
+from byte_api.metrics import Histogram
+from byte_api.ratelimit import *
+from byte_api.retry import RetryPolicy
+from byte_api.types import LoopCounter, Response
+
+
+ACCOUNT = {
+    'backgroundColor': '#000000',
+    'followerCount': 0,
+    'followingCount': 0,
+    'foregroundColor': '#CCD6E9',
+    'id': 'test_id',
+    'isChannel': False,
+    'loopCount': 0,
+    'loopsConsumedCount': 0,
+    'registrationDate': 1580228662,
+    'username': 'bixnel'
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body=None, headers=None):
+        self.server.requests.append((self.command, self.path, self.headers))
+        payload = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        time.sleep(self.server.delay)
+        if self.server.throttle:
+            self.server.throttle -= 1
+            return self.reply(429, headers={'Retry-After': '0'})
+        if self.path == '/empty':
+            return self.reply(200)
+        if self.path.startswith('/account/id/'):
+            if self.headers.get('If-None-Match') == '"v1"':
+                return self.reply(304, headers={'ETag': '"v1"'})
+            return self.reply(200, {'data': ACCOUNT, 'success': 1},
+                              {'ETag': '"v1"'})
+        self.reply(404, {'success': 0})
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.server.errors:
+            self.server.errors -= 1
+            return self.reply(503, {'success': 0})
+        if self.path.endswith('/loop'):
+            id = self.path.split('/')[3]
+            self.server.loops[id] = self.server.loops.get(id, 0) + 1
+            return self.reply(200, {
+                'data': {'postID': id, 'loopCount': self.server.loops[id]},
+                'success': 1
+            })
+        if self.path.endswith('/account/me'):
+            return self.reply(200, {
+                'data': dict(ACCOUNT, id='my_id'),
+                'success': 1
+            })
+        self.reply(200, {'success': 1})
+
+    do_DELETE = do_POST = do_PUT
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def server():
+    server = Server(('127.0.0.1', 0), Handler)
+    server.requests = []
+    server.throttle = 0
+    server.errors = 0
+    server.delay = 0
+    server.loops = {}
+    server.url = 'http://127.0.0.1:{}/'.format(server.server_port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_pool():
+    api = Api('token', pool_connections=2, pool_maxsize=4, pool_block=True)
+    session = api.session
+    assert api.session is session
+    adapter = session.get_adapter(api.API_URL)
+    assert adapter._pool_connections == 2
+    assert adapter._pool_maxsize == 4
+    assert adapter._pool_block is True
+    assert session.headers['Authorization'] == 'token'
+    api.close()
+    assert api.session is not session
+
+
+def test_headers():
+    api = Api('token', {'User-Agent': 'test'}, keep_alive=False)
+    assert api.headers['User-Agent'] == 'test'
+    assert api.headers['Authorization'] == 'token'
+    assert api.headers['Connection'] == 'close'
+
+
+def test_client_context_manager():
+    with Client('token', pool_maxsize=4) as client:
+        session = client.api.session
+        assert client.api.pool_maxsize == 4
+    assert client.api._session is None
+    assert session is not client.api.session
+
+
+def test_bulk_operation():
+    def call(id):
+        if id % 5 == 0:
+            raise ValueError(id)
+        return id * 2
+
+    operation = BulkOperation(call, range(100), workers=4, ordered=True)
+    results = operation.results()
+    assert [result.id for result in results] == list(range(100))
+    assert all(result.response == result.id * 2
+               for result in results if result.ok)
+    assert operation.stats.failed == 20
+    assert operation.stats.succeeded == 80
+    assert operation.stats.throughput > 0
+
+    operation = BulkOperation(call, iter(range(100)), workers=4)
+    assert sorted(result.id for result in operation) == list(range(100))
+    assert operation.stats.total == 100
+
+
+def test_memory_cache():
+    cache = MemoryCache(maxsize=2, ttls={'a/{}': 60, 'b': 0.01})
+    assert cache.ttl_for('a/1') == 60
+    assert cache.ttl_for('a/1/c') == 0
+    for path in ('a/1', 'a/2', 'b'):
+        key, entry = cache.lookup(path)
+        assert entry is None
+        cache.store(key, path, path)
+    assert len(cache) == 2
+    assert cache.lookup('a/1') == (('a/1', ()), None)
+    time.sleep(0.02)
+    assert not cache.lookup('b')[1].fresh
+    assert cache.lookup('a/2')[1].data == 'a/2'
+    cache.invalidate_write('a/2/follow')
+    assert cache.lookup('a/2')[1] is None
+    assert cache.stats['hits'] == 1
+    assert cache.stats['evictions'] == 1
+
+
+def test_memory_cache_profile_write():
+    cache = MemoryCache()
+    for id in ('1', '2'):
+        key, _ = cache.lookup('account/id/' + id)
+        cache.store(key, 'account/id/' + id, id)
+    cache.invalidate_write('account/me', {'data': {'id': '1'},
+                                          'success': 1})
+    assert cache.lookup('account/id/1')[1] is None
+    assert cache.lookup('account/id/2')[1].data == '2'
+    # Without the id of the caller any cached profile may be theirs
+    cache.invalidate_write('account/me', {'success': 1})
+    assert len(cache) == 0
+
+
+def test_client_cache(server):
+    cache = MemoryCache(ttls={'account/id/{}': 0.05})
+    with Client('token', cache=cache) as client:
+        client.api.API_URL = server.url
+        for _ in range(3):
+            assert client.get_user('test_id').data.id == 'test_id'
+        assert len(server.requests) == 1
+        time.sleep(0.06)
+        assert client.get_user('test_id').data.id == 'test_id'
+        assert server.requests[-1][2]['If-None-Match'] == '"v1"'
+        assert cache.revalidations == 1
+        client.follow('test_id')
+        client.get_user('test_id')
+        assert 'If-None-Match' not in server.requests[-1][2]
+    assert cache.stats['hits'] == 2
+    assert len(server.requests) == 4
+
+
+def test_client_cache_profile_write(server):
+    cache = MemoryCache()
+    with Client('token', cache=cache) as client:
+        client.api.API_URL = server.url
+        client.get_user('my_id')
+        client.get_user('test_id')
+        client.get_user('test_id')
+        assert len(server.requests) == 2
+        client.set_info(bio='bio')
+        assert server.requests[-1][:2] == ('PUT', '/account/me')
+        client.get_user('test_id')
+        assert len(server.requests) == 3
+        client.get_user('my_id')
+        assert server.requests[-1][:2] == ('GET', '/account/id/my_id')
+        assert 'If-None-Match' not in server.requests[-1][2]
+    assert len(server.requests) == 4
+
+
+def test_rate_limiter():
+    assert parse_retry_after('2') == 2
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+    assert parse_retry_after('soon') is None
+    limiter = RateLimiter(rate=100, burst=2,
+                          endpoints={'post/id/{}/feedback/like': (10, 1)})
+    assert limiter.reserve('timeline') == 0
+    assert limiter.reserve('post/id/1/feedback/like') == 0
+    assert limiter.reserve('timeline') > 0
+    assert 0.05 < limiter.reserve('post/id/2/feedback/like') <= 0.1
+    limiter.throttled(0.5)
+    assert limiter.factor == 0.5
+    assert limiter.reserve('timeline') >= 0.45
+    limiter.succeeded()
+    assert limiter.factor == 0.52
+
+
+def test_client_rate_limit(server):
+    with Client('token', rate_limiter=1000) as client:
+        client.api.API_URL = server.url
+        server.throttle = 2
+        assert client.get_user('test_id').data.id == 'test_id'
+        assert client.api.rate_limiter.throttled_count == 2
+        server.throttle = 10
+        with pytest.raises(RateLimitError):
+            client.get_user('test_id')
+    assert len(server.requests) == 7
+
+
+def test_retry_policy():
+    policy = RetryPolicy(max_attempts=3, backoff_factor=1, jitter=False,
+                         total_timeout=5)
+    started = time.monotonic()
+    assert policy.delay('GET', 1, started, status=503) == 1
+    assert policy.delay('PUT', 2, started, error=ConnectionError()) == 2
+    assert policy.delay('GET', 3, started, status=503) is None
+    assert policy.delay('GET', 1, started, status=404) is None
+    assert policy.delay('POST', 1, started, status=503) is None
+    assert policy.delay('POST', 1, started, True, status=503) == 1
+    assert policy.delay('POST', 1, started, status=429, retry_after=3) == 3
+    assert policy.delay('GET', 1, started - 4.5, status=503) is None
+    assert policy.stats == {
+        'retries': 4,
+        'exhausted': 2,
+        'reasons': {'503': 2, 'ConnectionError': 1, '429': 1}
+    }
+
+
+def test_client_retry(server):
+    policy = RetryPolicy(backoff_factor=0.01)
+    with Client('token', retry_policy=policy) as client:
+        client.api.API_URL = server.url
+        server.errors = 2
+        assert client.follow('test_id').success == 1
+        assert policy.retries == 2
+        server.errors = 1
+        assert client.comment('test_id', 'test').success == 0
+        assert policy.retries == 2
+
+
+def test_retry_closes_responses(server):
+    api = Api('token', rate_limiter=RateLimiter(1000),
+              retry_policy=RetryPolicy(backoff_factor=0.01))
+    api.API_URL = server.url
+    fetch = api._fetch
+    responses = []
+
+    def tracked(method, url, kwargs):
+        responses.append(fetch(method, url, kwargs))
+        return responses[-1]
+
+    api._fetch = tracked
+    server.throttle = 2
+    assert b''.join(api.stream('account/id/test_id'))
+    assert len(responses) == 3
+    assert all(response.raw.closed for response in responses)
+    api.close()
+
+
+def test_retry_total_timeout(server):
+    import requests
+    policy = RetryPolicy(backoff_factor=0.01, total_timeout=0.2)
+    with Client('token', retry_policy=policy) as client:
+        client.api.API_URL = server.url
+        server.delay = 1
+        started = time.monotonic()
+        with pytest.raises(requests.Timeout):
+            client.get_user('test_id')
+        assert time.monotonic() - started < 0.6
+
+
+def test_single_flight():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def call(value):
+        started.set()
+        release.wait()
+        if value is None:
+            raise ValueError('test')
+        return value
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do('a', call,
+                                                                 1)))
+        for _ in range(5)
+    ]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    while flight.coalesced < 4:
+        time.sleep(0.001)
+    assert flight.do('b', lambda: 2) == 2
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [1] * 5
+    assert flight.stats == {'calls': 2, 'coalesced': 4, 'in_flight': 0}
+    with pytest.raises(ValueError):
+        flight.do('a', call, None)
+
+
+def test_client_coalesce(server):
+    server.delay = 0.1
+    with Client('token') as client:
+        client.api.API_URL = server.url
+        responses = []
+        threads = [
+            threading.Thread(
+                target=lambda: responses.append(client.get_user('test_id'))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(response.data.id == 'test_id' for response in responses)
+        assert client.api.single_flight.coalesced == 7
+    assert len(server.requests) == 1
+    with Client('token', coalesce=False) as client:
+        assert client.api.single_flight is None
+
+
+def test_loop_aggregator(server):
+    flushed = []
+    with Client('token') as client:
+        client.api.API_URL = server.url
+        aggregator = client.loop_aggregator(interval=60, batch_size=5,
+                                            max_posts=2,
+                                            on_flush=flushed.append)
+        for id in ('a', 'a', 'b', 'a', 'b'):
+            aggregator.add(id)
+        while aggregator.flushes < 1:
+            time.sleep(0.001)
+        assert server.loops == {'a': 3, 'b': 2}
+        assert all(type(counter) == LoopCounter for counter in flushed)
+        assert aggregator.counters['a'].loop_count == 3
+        aggregator.add('c')
+        aggregator.add('d')
+        aggregator.add('e')
+        assert aggregator.pending <= 2
+    assert aggregator.stats == {
+        'pending': 0, 'sent': 8, 'failed': 0, 'flushes': 3
+    }
+    assert server.loops == {'a': 3, 'b': 2, 'c': 1, 'd': 1, 'e': 1}
+    assert len(aggregator.counters) == 2
+    assert list(aggregator.counters)[-1] == 'e'
+    with pytest.raises(ValueError):
+        aggregator.add('a')
+
+
+def test_loop_aggregator_errors():
+    calls = []
+
+    def loop(id):
+        calls.append(id)
+        if id == 'bad' and calls.count(id) == 3:
+            raise ValueError('test')
+        return Response(1, LoopCounter(id, calls.count(id)))
+
+    def on_flush(counter):
+        raise RuntimeError('callback')
+
+    aggregator = LoopAggregator(loop, interval=0.01, batch_size=1,
+                                max_posts=1, on_flush=on_flush)
+    aggregator.add('bad', 4)
+    while aggregator.flushes < 1:
+        time.sleep(0.001)
+    assert aggregator.sent == 2 and aggregator.failed == 2
+    # The failing callback does not stop the background thread
+    for id in ('a', 'b', 'c'):
+        aggregator.add(id)
+    aggregator.close()
+    assert isinstance(aggregator.last_error, RuntimeError)
+    assert aggregator.stats['pending'] == 0
+    assert aggregator.stats['sent'] == 5
+    assert aggregator.counters['c'].loop_count == 1
+
+
+def test_histogram():
+    histogram = Histogram((0.1, 1))
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.observe(value)
+    assert histogram.cumulative() == [(0.1, 2), (1, 3), (float('inf'), 4)]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1
+    assert histogram.sum == 2.65
+    assert endpoint_of('account/id/1/follow') == 'account/id/{}/follow'
+    assert endpoint_of('account/id/1') == 'account/id/{}'
+    assert endpoint_of('unknown') == 'other'
+
+
+def test_client_metrics(server):
+    events = []
+    hooks = {
+        'before_request': lambda event: events.append(('before', event)),
+        'after_response': lambda event: events.append(('after', event)),
+        'on_error': [lambda event: events.append(('error', event))]
+    }
+    policy = RetryPolicy(backoff_factor=0.01)
+    with Client('token', base_url=server.url, retry_policy=policy,
+                hooks=hooks, metrics=True) as client:
+        server.errors = 1
+        assert client.follow('test_id').success == 1
+        assert client.get_user('test_id').data.id == 'test_id'
+        with pytest.raises(ValueError):
+            client.api.get('empty')
+        metrics = client.metrics
+    assert [name for name, _ in events] == [
+        'before', 'after', 'before', 'after', 'before', 'after',
+        'before', 'error'
+    ]
+    retried = events[1][1]
+    assert retried.retry and retried.status == 503
+    assert retried.endpoint == 'account/id/{}/follow'
+    user = events[5][1]
+    assert user.network_time > 0 and user.decode_time > 0
+    assert user.response_bytes == len(json.dumps(
+        {'data': ACCOUNT, 'success': 1}
+    ))
+    assert type(events[7][1].error) == AuthError
+    summary = metrics.summary()
+    assert summary['PUT account/id/{}/follow']['statuses'] == {
+        503: 1, 200: 1
+    }
+    assert summary['PUT account/id/{}/follow']['retries'] == 1
+    assert summary['GET account/id/{}']['decode_time'] > 0
+    assert summary['GET other']['errors'] == {'AuthError': 1}
+    text = metrics.to_prometheus()
+    assert '# TYPE byte_api_request_duration_seconds histogram' in text
+    assert 'byte_api_responses_total{endpoint="account/id/{}/follow",' \
+           'method="PUT",status="503"} 1' in text
+    assert 'byte_api_decode_duration_seconds_count{' \
+           'endpoint="account/id/{}",method="GET"} 1' in text
+    assert 'byte_api_request_duration_seconds_bucket{' \
+           'endpoint="account/id/{}",method="GET",le="+Inf"} 1' in text
+
+
+def test_decoders():
+    assert get_decoder('json') is stdlib_loads
+    assert stdlib_loads(b'{"a": "\xd0\xb1"}') == {'a': '\u0431'}
+    assert get_decoder()(b'[1]') == [1]
+    assert get_decoder(len) is len
+    with pytest.raises(ValueError):
+        get_decoder('yaml')
+    api = Api('token', decoder='json')
+    assert api.loads is stdlib_loads
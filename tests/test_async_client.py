@@ -0,0 +1,233 @@
+import asyncio
+
+import pytest
+from byte_api.api import AuthError
+from byte_api.async_client import AsyncClient
+from byte_api.cache import MemoryCache
+from byte_api.coalesce import AsyncSingleFlight
+from byte_api.ratelimit import RateLimiter, RateLimitError
+from byte_api.retry import RetryPolicy
+from byte_api.stub import StubServer
+from byte_api.types import *
+
+web = pytest.importorskip('aiohttp.web')
+
+
+ACCOUNT = {
+    'backgroundColor': '#000000',
+    'followerCount': 0,
+    'followingCount': 0,
+    'foregroundColor': '#CCD6E9',
+    'id': 'test_id',
+    'isChannel': False,
+    'loopCount': 0,
+    'loopsConsumedCount': 0,
+    'registrationDate': 1580228662,
+    'username': 'bixnel'
+}
+
+
+async def get_account(request):
+    assert request.headers['Authorization'] == 'token'
+    return web.json_response({'data': ACCOUNT, 'success': 1})
+
+
+async def follow(request):
+    return web.json_response({'success': 1})
+
+
+async def start_app(app):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, 'http://127.0.0.1:{}/'.format(port)
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_async_client():
+    async def main():
+        app = web.Application()
+        app.router.add_get('/account/id/{id}', get_account)
+        app.router.add_put('/account/id/{id}/follow', follow)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with AsyncClient('token') as client:
+                client.api.API_URL = 'http://127.0.0.1:{}/'.format(port)
+                responses = await asyncio.gather(*[
+                    client.get_user('test_id') for _ in range(10)
+                ])
+                followed = await client.follow('test_id')
+                assert client.api.single_flight.stats == {
+                    'calls': 1, 'coalesced': 9, 'in_flight': 0
+                }
+        finally:
+            await runner.cleanup()
+        return responses, followed
+
+    responses, followed = run(main())
+    assert all(type(response.data) == Account for response in responses)
+    assert all(response.data.id == 'test_id' for response in responses)
+    assert followed.success == 1
+
+
+def test_async_single_flight_cancel():
+    async def main():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await release.wait()
+            return 'done'
+
+        leader = asyncio.ensure_future(flight.do('a', call))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do('a', call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await waiter == 'done'
+        assert leader.cancelled() and calls == [1]
+        assert flight.stats == {'calls': 1, 'coalesced': 1, 'in_flight': 0}
+
+        # The call itself is cancelled once no caller is left
+        release.clear()
+        task = asyncio.ensure_future(flight.do('b', call))
+        await asyncio.sleep(0)
+        task.cancel()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert task.cancelled() and flight.stats['in_flight'] == 0
+
+    run(main())
+
+
+def test_async_client_stub():
+    async def main(url):
+        async with AsyncClient('token', base_url=url) as client:
+            comment = (await client.comment('POST', 'test')).data
+            assert type(comment) == Comment and comment.body == 'test'
+            assert (await client.delete_comment(comment.id)).success == 1
+            assert (await client.loop('POST')).data.loop_count == 1
+            rebyte = (await client.rebyte('POST')).data
+            assert rebyte.post.id == 'POST'
+            colors = (await client.get_colors()).data.colors
+            assert [color.id for color in colors] == [1, 2, 3, 4, 5]
+            assert (await client.set_info(bio='bio')).success == 1
+            assert (await client.set_username('name')).success == 1
+            for call in (client.like, client.dislike, client.unfollow):
+                assert (await call('test_id')).success == 1
+            page = (await client.get_timeline()).data
+            assert len(page.posts) == 2 and page.cursor
+            assert len((await client.get_user_posts('test_id')).data
+                       .posts) == 2
+            counts = []
+            for paginator in (client.iter_timeline(),
+                              client.iter_user_posts('test_id'),
+                              client.iter_category('comedy', max_pages=2)):
+                counts.append(len([post async for post in paginator]))
+            assert counts == [6, 6, 4]
+
+    with StubServer(page_size=2, pages=3, comments=1) as stub:
+        run(main(stub.url))
+    assert stub.loops['POST'] == 1
+    assert stub.requests['GET', 'timeline'] == 4
+    assert stub.requests['PUT', 'set_info'] == 2
+
+
+def test_async_client_auth_error():
+    async def main(url):
+        async with AsyncClient('bad', base_url=url) as client:
+            with pytest.raises(AuthError):
+                await client.get_user('test_id')
+        async with AsyncClient('good', base_url=url) as client:
+            assert (await client.get_user('test_id')).data.id == 'test_id'
+
+    with StubServer(token='good') as stub:
+        run(main(stub.url))
+
+
+def test_async_client_retry():
+    policy = RetryPolicy(backoff_factor=0.01)
+
+    async def main(url):
+        async with AsyncClient('token', base_url=url,
+                               retry_policy=policy) as client:
+            # The first answer is a 503, the second one succeeds
+            assert (await client.follow('test_id')).success == 1
+
+    with StubServer(error_rate=0.5, seed=1) as stub:
+        run(main(stub.url))
+    assert policy.retries == 1
+    assert stub.requests['PUT', 'ok'] == 2
+
+
+def test_async_client_rate_limit():
+    limiter = RateLimiter(1000)
+
+    async def main(url):
+        async with AsyncClient('token', base_url=url,
+                               rate_limiter=limiter) as client:
+            client.api.throttle_retries = 2
+            with pytest.raises(RateLimitError) as info:
+                await client.get_user('test_id')
+            assert info.value.retry_after == 0
+
+    with StubServer(throttle_rate=1, retry_after=0) as stub:
+        run(main(stub.url))
+    assert stub.requests['GET', 'account'] == 3
+
+
+def test_async_client_cache():
+    cache = MemoryCache(ttls={'account/id/{}': 0.05})
+
+    requests = []
+
+    async def get_account_etag(request):
+        requests.append(dict(request.headers))
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304, headers={'ETag': '"v1"'})
+        return web.json_response({'data': ACCOUNT, 'success': 1},
+                                 headers={'ETag': '"v1"'})
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/account/id/{id}', get_account_etag)
+        app.router.add_put('/account/id/{id}/follow', follow)
+        runner, url = await start_app(app)
+        try:
+            async with AsyncClient('token', base_url=url,
+                                   cache=cache) as client:
+                for _ in range(3):
+                    assert (await client.get_user('test_id')).data.id == \
+                        'test_id'
+                assert len(requests) == 1
+                await asyncio.sleep(0.06)
+                assert (await client.get_user('test_id')).data.id == \
+                    'test_id'
+                assert requests[-1]['If-None-Match'] == '"v1"'
+                await client.follow('test_id')
+                await client.get_user('test_id')
+                assert 'If-None-Match' not in requests[-1]
+                return len(requests)
+        finally:
+            await runner.cleanup()
+
+    assert run(main()) == 3
+    assert cache.revalidations == 1
+    assert cache.stats['hits'] == 2
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+from byte_api.cassette import *
+from byte_api.client import Client
+from byte_api.stub import StubServer
+
+
+def record(path, **kwargs):
+    with StubServer(page_size=2, pages=2, comments=1, latency=0.02) as stub:
+        with Client('token', base_url=stub.url,
+                    cassette=CassetteRecorder(path, **kwargs)) as client:
+            user = client.get_user('test_id').data
+            loops = [client.loop('POST').data.loop_count for _ in range(3)]
+            posts = [post.id for post in client.iter_timeline()]
+            client.api.cassette.close()
+    return user, loops, posts
+
+
+def test_cassette(tmpdir):
+    path = str(tmpdir.join('session.cassette'))
+    user, loops, posts = record(path)
+    assert loops == [1, 2, 3]
+    with CassettePlayer(path) as player:
+        assert len(player) == 6
+        with Client('token', base_url='http://127.0.0.1:1/',
+                    cassette=player) as client:
+            assert client.get_user('test_id').data.username == user.username
+            assert [client.loop('POST').data.loop_count
+                    for _ in range(4)] == [1, 2, 3, 1]
+            assert [post.id for post in client.iter_timeline()] == posts
+            assert [post.id for post in client.stream_timeline()] == \
+                posts[:2]
+            with pytest.raises(CassetteError):
+                client.get_user('unknown')
+        assert player.played == 8
+
+
+def test_cassette_timing(tmpdir):
+    path = str(tmpdir.join('session.cassette'))
+    record(path, compress=False)
+    with CassettePlayer(path, timing=True, cycle=False) as player:
+        with Client('token', cassette=player) as client:
+            started = time.monotonic()
+            client.get_user('test_id')
+            assert time.monotonic() - started >= 0.02
+            assert [client.loop('POST').data.loop_count
+                    for _ in range(4)] == [1, 2, 3, 3]
+
+
+def test_cassette_recovery(tmpdir):
+    path = str(tmpdir.join('session.cassette'))
+    recorder = CassetteRecorder(path)
+    for i in range(3):
+        recorder.record('GET', 'timeline', {'cursor': i}, 200,
+                        {'ETag': '"{}"'.format(i)}, b'{"success": 1}', 0.1)
+    recorder._file.flush()
+    with open(path, 'ab') as file:
+        file.write(b'\x00' * 5)
+    with CassettePlayer(path) as player:
+        assert len(player) == 3
+        response, delay = player.play('GET', 'timeline', {'cursor': 1})
+        assert response.headers == {'ETag': '"1"'}
+        assert response.content == b'{"success": 1}'
+        assert delay == 0
+    recorder.close()
+    with pytest.raises(CassetteError):
+        CassettePlayer(__file__)
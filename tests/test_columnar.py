@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from byte_api.client import Client
+from byte_api.columnar import FeedColumns
+from byte_api.stub import StubServer
+
+
+def make_page(start, count, cursor=None):
+    posts = [{
+        'id': 'post{}'.format(i),
+        'authorID': 'author{}'.format(i % 3),
+        'likeCount': i * 2,
+        'loopCount': (i * 37) % 101,
+        'commentCount': i % 4,
+        'date': 1580000000 + i
+    } for i in range(start, start + count)]
+    data = {'posts': posts}
+    if cursor is not None:
+        data['cursor'] = cursor
+    return {'data': data, 'success': 1}
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_feed_columns(use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    columns = FeedColumns(use_numpy=use_numpy)
+    assert columns.top() == []
+    assert columns.append(make_page(0, 10, 'next')) == 10
+    assert columns.append(json.dumps(make_page(10, 10))) == 10
+    assert len(columns) == 20 and columns.pages == 2
+    assert columns.cursor is None
+    assert columns.authors == ['author0', 'author1', 'author2']
+
+    loops = {'post{}'.format(i): (i * 37) % 101 for i in range(20)}
+    expected = sorted(loops.items(), key=lambda item: -item[1])[:5]
+    assert columns.top(5) == expected
+    assert columns.top(50, by='like_count')[0] == ('post19', 38)
+
+    sums = columns.sum_by_author()
+    assert sums == {
+        'author{}'.format(author): sum(
+            (i * 37) % 101 for i in range(author, 20, 3)
+        )
+        for author in range(3)
+    }
+    assert sum(columns.sum_by_author('comment_count').values()) == \
+        sum(i % 4 for i in range(20))
+
+    exported = columns.columns()
+    assert list(exported['author_id'][:4]) == \
+        ['author0', 'author1', 'author2', 'author0']
+    assert list(exported['date'][-1:]) == [1580000019]
+    assert len(exported['like_count']) == 20
+
+    with pytest.raises(KeyError):
+        columns.append({'data': {'posts': [{'id': 'broken'}]}})
+    assert len(columns) == 20
+    assert all(len(column) == 20 for column in columns.counters.values())
+    with pytest.raises(ValueError):
+        columns.append({'error': {'message': 'bad cursor'}, 'success': 0})
+    with pytest.raises(ValueError):
+        columns.top(by='caption')
+
+
+def test_feed_columns_numpy():
+    numpy = pytest.importorskip('numpy')
+    columns = FeedColumns()
+    columns.append(make_page(0, 5))
+    exported = columns.to_numpy()
+    assert exported['loop_count'].dtype == numpy.int64
+    columns.append(make_page(5, 5))
+    assert len(exported['loop_count']) == 5
+    assert columns.to_numpy()['loop_count'].sum() == \
+        sum((i * 37) % 101 for i in range(10))
+
+
+def test_client_columns():
+    with StubServer(page_size=4, pages=3) as stub:
+        with Client('token', base_url=stub.url) as client:
+            posts = list(client.iter_timeline())
+            columns = client.timeline_columns()
+            assert columns.ids == [post.id for post in posts]
+            assert list(columns.counters['loop_count']) == \
+                [post.loop_count for post in posts]
+            assert len(client.timeline_columns(max_pages=2)) == 8
+            columns = client.category_columns('comedy', max_pages=1)
+            client.category_columns('comedy', columns.cursor,
+                                    columns=columns)
+            assert columns.pages == 3 and len(columns) == 12
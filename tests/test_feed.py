@@ -0,0 +1,256 @@
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+from byte_api.feed import AsyncFeedPaginator, FeedPaginator
+from byte_api.streaming import FeedStream
+from byte_api.sync import BloomFilter, FeedSync, ScalableBloomFilter
+from byte_api.types import *
+
+
+def make_pages(count, size=3):
+    pages = {}
+    for page in range(count):
+        cursor = str(page) if page else None
+        options = {}
+        if page < count - 1:
+            options['cursor'] = str(page + 1)
+        pages[cursor] = Feed(
+            ['{}-{}'.format(page, i) for i in range(size)], options
+        )
+    return pages
+
+
+def test_feed_paginator():
+    pages = make_pages(5)
+    threads = set()
+
+    def fetch(cursor):
+        threads.add(threading.current_thread())
+        return pages[cursor]
+
+    paginator = FeedPaginator(fetch)
+    posts = list(paginator)
+    assert len(posts) == 15
+    assert posts[0] == '0-0' and posts[-1] == '4-2'
+    assert paginator.pages_fetched == 5
+    assert threading.current_thread() in threads
+    assert len(threads) == 2
+
+    paginator = FeedPaginator(pages.get, prefetch=False, max_pages=2)
+    assert len(list(paginator)) == 6
+    assert paginator.cursor == '1'
+
+    paginator = FeedPaginator(pages.get, cursor='3')
+    assert [feed.posts[0] for feed in paginator.pages()] == ['3-0', '4-0']
+
+
+def test_async_feed_paginator():
+    pages = make_pages(4)
+
+    async def fetch(cursor):
+        await asyncio.sleep(0)
+        return pages[cursor]
+
+    async def collect(paginator):
+        return [post async for post in paginator]
+
+    loop = asyncio.new_event_loop()
+    try:
+        posts = loop.run_until_complete(collect(AsyncFeedPaginator(fetch)))
+        limited = loop.run_until_complete(
+            collect(AsyncFeedPaginator(fetch, max_pages=3))
+        )
+    finally:
+        loop.close()
+    assert len(posts) == 12
+    assert posts[-1] == '3-2'
+    assert len(limited) == 9
+
+
+POST = {
+    'id': 'TEST',
+    'type': 0,
+    'authorID': 'test_id',
+    'caption': 'tricky "] } [ { \\ caption',
+    'allowCuration': True,
+    'allowRemix': False,
+    'mentions': [],
+    'date': 1580089743,
+    'videoSrc': 'TEST_VIDEO',
+    'thumbSrc': 'TEST_THUMB',
+    'commentCount': 0,
+    'likeCount': 0,
+    'likedByMe': False,
+    'loopCount': 0,
+    'rebytedByMe': False
+}
+
+ACCOUNT = {
+    'backgroundColor': '#000000',
+    'followerCount': 0,
+    'followingCount': 0,
+    'foregroundColor': '#CCD6E9',
+    'id': 'test_id',
+    'isChannel': False,
+    'loopCount': 0,
+    'loopsConsumedCount': 0,
+    'registrationDate': 1580228662,
+    'username': 'bixnel'
+}
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_feed_stream():
+    feed = {
+        'data': {
+            'accounts': {'test_id': ACCOUNT},
+            'posts': [dict(POST, id=str(i)) for i in range(5)],
+            'cursor': 'NEXT'
+        },
+        'success': 1
+    }
+    payload = json.dumps(feed, indent=1).encode()
+    for size in (1, 3, 64, len(payload)):
+        consumed = []
+
+        def chunks():
+            for chunk in chunked(payload, size):
+                consumed.append(len(chunk))
+                yield chunk
+
+        stream = FeedStream(chunks())
+        posts = iter(stream)
+        first = next(posts)
+        assert first.id == '0'
+        assert first.caption == POST['caption']
+        if size < len(payload):
+            assert sum(consumed) < len(payload)
+        assert stream.cursor is None
+        assert [post.id for post in posts] == ['1', '2', '3', '4']
+        assert stream.cursor == 'NEXT'
+        assert stream.success == 1
+        assert stream.accounts['test_id'].username == 'bixnel'
+
+
+def test_feed_stream_errors():
+    error = b'{"success": 0, "error": {"code": 1, "message": "test"}}'
+    stream = FeedStream(chunked(error, 5))
+    with pytest.raises(ValueError):
+        list(stream)
+    assert stream.error.code == 1
+    truncated = json.dumps({'data': {'posts': [POST]}}).encode()[:-20]
+    with pytest.raises(ValueError):
+        list(FeedStream([truncated]))
+
+
+def test_feed_stream_split_escapes():
+    caption = 'say "hi" \\ [not] {nested} \\"' * 20
+    feed = {
+        'data': {'posts': [dict(POST, id=str(i), caption=caption)
+                           for i in range(3)]},
+        'success': 1
+    }
+    payload = json.dumps(feed).encode()
+    for size in (1, 2, 7):
+        posts = list(FeedStream(chunked(payload, size)))
+        assert [post.caption for post in posts] == [caption] * 3
+
+
+def test_bloom_filter():
+    seen = BloomFilter(1000, 0.01)
+    assert sum(seen.add('item{}'.format(i)) for i in range(1000)) > 980
+    assert all('item{}'.format(i) in seen for i in range(1000))
+    false_positives = sum('other{}'.format(i) in seen for i in range(10000))
+    assert false_positives < 300
+    assert not seen.add('item0')
+    assert len(seen) > 980 and not seen.full
+    copy = BloomFilter(1000, 0.01, bytes(seen.bits), seen.count)
+    assert 'item999' in copy
+    with pytest.raises(ValueError):
+        BloomFilter(10, 0.01, bytes(seen.bits))
+
+
+def test_scalable_bloom_filter():
+    seen = ScalableBloomFilter(10, 0.01)
+    assert sum(seen.add('item{}'.format(i)) for i in range(100)) > 95
+    assert all('item{}'.format(i) in seen for i in range(100))
+    assert len(seen.filters) == 4 and seen.capacity == 150
+    assert seen.filters[-1].error_rate == 0.00125
+    assert sum('other{}'.format(i) in seen for i in range(1000)) < 50
+
+
+def test_feed_sync(tmpdir):
+    path = str(tmpdir.join('timeline.sync'))
+    posts = [SimpleNamespace(id='post{}'.format(i), caption='caption',
+                             like_count=0) for i in range(20, 0, -1)]
+    fetched = []
+
+    def fetch(cursor):
+        fetched.append(cursor)
+        start = int(cursor or 0)
+        options = {}
+        if start + 4 < len(posts):
+            options['cursor'] = str(start + 4)
+        return Feed(posts[start:start + 4], options)
+
+    sync = FeedSync(fetch, path, stop_after=3)
+    run = sync.run()
+    assert [next(run).id for _ in range(6)] == \
+        ['post{}'.format(i) for i in range(20, 14, -1)]
+    # Crashes while processing the second page
+    del run, sync
+
+    sync = FeedSync(fetch, path, stop_after=3)
+    assert sync.resuming and sync.cursor == '4'
+    assert [post.id for post in sync][0] == 'post16'
+    assert fetched[-1] == '16' and not sync.resuming
+    assert sync.stats['yielded'] == 16
+
+    posts[:0] = [SimpleNamespace(id='post22', caption='new', like_count=0),
+                 SimpleNamespace(id='post21', caption='new', like_count=0)]
+    posts[4].like_count = 1
+    del fetched[:]
+    assert [post.id for post in FeedSync(fetch, path, stop_after=3)] == \
+        ['post22', 'post21', 'post18']
+    assert fetched == [None, '4']
+    assert list(FeedSync(fetch, path, stop_after=3)) == []
+
+
+def test_feed_sync_changes(tmpdir):
+    path = str(tmpdir.join('timeline.sync'))
+    posts = [SimpleNamespace(id='post{}'.format(i), caption='caption',
+                             like_count=0) for i in range(40, 0, -1)]
+    fetched = []
+
+    def fetch(cursor):
+        fetched.append(cursor)
+        start = int(cursor or 0)
+        options = {}
+        if start + 4 < len(posts):
+            options['cursor'] = str(start + 4)
+        return Feed(posts[start:start + 4], options)
+
+    sync = FeedSync(fetch, path, capacity=16, stop_after=6)
+    assert len(list(sync)) == 40
+    assert sync.stats['filters'] > 1
+    # Counters of every post change, the run still stops early
+    for post in posts:
+        post.like_count += 1
+    del fetched[:]
+    sync = FeedSync(fetch, path, capacity=16, stop_after=6)
+    assert [post.id for post in sync] == \
+        ['post{}'.format(i) for i in range(40, 34, -1)]
+    assert fetched == [None, '4']
+    assert sync.stats['changed'] == 6
+    posts.insert(0, SimpleNamespace(id='post41', caption='new',
+                                    like_count=0))
+    del fetched[:]
+    assert [post.id for post in FeedSync(fetch, path, stop_after=6)] == \
+        ['post41']
+    assert fetched == [None, '4']
@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def imported_after(code):
+    output = subprocess.check_output([
+        sys.executable, '-c',
+        code + '\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))'
+    ], cwd=ROOT)
+    return set(json.loads(output.decode('utf-8')))
+
+
+def test_lazy_imports():
+    modules = imported_after('import byte_api\nbyte_api.Account')
+    assert 'requests' not in modules
+    assert 'byte_api.client' not in modules
+    modules = imported_after('from byte_api import Client\n'
+                             'Client("token", cache=True, rate_limiter=True)')
+    for module in ('requests', 'asyncio', 'sqlite3', 'concurrent.futures',
+                   'byte_api.store', 'byte_api.sync'):
+        assert module not in modules
+    modules = imported_after('from byte_api import *')
+    for module in ('requests', 'aiohttp', 'asyncio', 'concurrent.futures'):
+        assert module not in modules
+    modules = imported_after('import byte_api\n'
+                             'byte_api.Client("token").api.session')
+    assert 'requests' in modules
+
+
+def test_lazy_attributes():
+    import byte_api
+    from byte_api.async_client import AsyncClient
+    from byte_api.client import Client
+    assert byte_api.Client is Client
+    assert byte_api.AsyncClient is AsyncClient
+    assert 'Client' in dir(byte_api) and 'Client' in byte_api.__all__
+    assert 'Post' in byte_api.__all__
+    namespace = {}
+    exec('from byte_api import *', namespace)
+    assert namespace['AsyncClient'] is AsyncClient
+    assert namespace['AccountMap'] is byte_api.AccountMap
+    for name in ('threading', 'weakref', 'decoders', 'field', 'nested',
+                 'list_of', 'dict_of', 'compile_schemas', 'compile_state'):
+        assert name not in namespace
+    with pytest.raises(AttributeError):
+        byte_api.Missing
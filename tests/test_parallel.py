@@ -0,0 +1,60 @@
+import json
+import pickle
+
+import pytest
+from byte_api.parallel import *
+from byte_api.stub import StubServer
+from byte_api.types import *
+
+
+@pytest.fixture(scope='module')
+def payloads():
+    stub = StubServer(page_size=3, pages=4, comments=1)
+    stub.server_close()
+    return [json.dumps(stub.make_feed('timeline', {'cursor': str(page)}))
+            for page in range(4)] * 5
+
+
+def test_bulk_decoder(payloads):
+    expected = [Feed.de_json(payload) for payload in payloads]
+    with BulkDecoder(workers=2, chunk_bytes=4096) as decoder:
+        feeds = list(decoder.decode(payloads))
+        assert [[post.id for post in feed.data.posts] for feed in feeds] == \
+            [[post.id for post in feed.data.posts] for feed in expected]
+        assert feeds[0].data.posts[0].comments[0].body == \
+            expected[0].data.posts[0].comments[0].body
+        rows = list(decoder.posts(payloads, 'tuples'))
+        assert len(rows) == 60
+        post = expected[1].data.posts[2]
+        assert rows[5] == tuple(getattr(post, name) for name in POST_FIELDS)
+        assert list(decoder.decode(payloads[:4], output='tuples'))[3][0] \
+            is None
+    assert decode_many(payloads, output='tuples', workers=0) == \
+        decode_many(payloads, output='tuples', workers=1)
+
+
+def test_decode_payload():
+    stub = StubServer()
+    stub.server_close()
+    account = stub.make_account('test_id')
+    response = json.dumps({'data': account, 'success': 1})
+    assert decode_payload(response, 'account').username == 'user_test_id'
+    assert decode_payload(json.dumps(account), 'account', 'tuples')[:2] == \
+        ('test_id', 'user_test_id')
+    post = json.dumps(stub.make_post('POST', 'test_id'))
+    assert decode_payload(post, 'post').id == 'POST'
+    assert decode_payload(post.encode(), 'post', 'tuples')[-1] == 'comedy'
+    with pytest.raises(ValueError):
+        list(BulkDecoder(0).decode([post], 'comment'))
+    with pytest.raises(KeyError):
+        decode_payload('{"data": {}}', 'feed', 'tuples')
+
+
+def test_pickle(payloads):
+    feed = Feed.de_json(payloads[0], lazy=True, account_map=AccountMap())
+    copy = pickle.loads(pickle.dumps(feed))
+    post = copy.data.posts[0]
+    assert post.comments[0].body == feed.data.posts[0].comments[0].body
+    assert post._json is None and post._account_map is None
+    assert sorted(copy.data.accounts) == sorted(feed.data.accounts)
+    assert len(post.mentions) == len(feed.data.posts[0].mentions)
@@ -0,0 +1,59 @@
+import pytest
+from byte_api.api import AuthError
+from byte_api.pool import ClientPool
+from byte_api.ratelimit import RateLimitError
+from byte_api.stub import StubServer
+
+
+def test_client_pool():
+    with StubServer(token='good', page_size=2, pages=3) as stub:
+        with ClientPool(['bad', 'good', 'other'], base_url=stub.url,
+                        rate=1000) as pool:
+            assert pool.get_user('test_id').data.id == 'test_id'
+            assert pool.available == 2
+            users = list(pool.get_users(['user{}'.format(i)
+                                         for i in range(20)], ordered=True))
+            assert all(result.ok for result in users)
+            health = pool.health
+            assert health[0]['evicted'] and not health[1]['evicted']
+            assert health[2]['evicted']
+            assert pool.available == 1
+            assert health[1]['requests'] >= 20
+            assert len(list(pool.iter_category('comedy'))) == 6
+            # Writes stay with the owner of the action
+            assert pool.client('good').loop('POST').data.loop_count == 1
+            with pytest.raises(AuthError):
+                pool.loop('POST')
+            with pytest.raises(AuthError):
+                pool.client('other')
+        assert stub.loops['POST'] == 1
+
+        with ClientPool(['bad', 'other'], base_url=stub.url) as pool:
+            with pytest.raises(AuthError):
+                pool.get_user('test_id')
+            assert pool.available == 0
+
+
+def test_client_pool_spreads_reads():
+    with StubServer() as stub:
+        with ClientPool(['first', 'second', 'third'], base_url=stub.url,
+                        rate=1000) as pool:
+            for i in range(9):
+                assert pool.get_user('user{}'.format(i)).data.id == \
+                    'user{}'.format(i)
+            assert [member['requests'] for member in pool.health] == \
+                [3, 3, 3]
+
+
+def test_client_pool_throttling():
+    with StubServer(throttle_rate=1, retry_after=30) as stub:
+        with ClientPool(['first', 'second'], base_url=stub.url) as pool:
+            with pytest.raises(RateLimitError) as info:
+                pool.get_category('comedy')
+            assert info.value.retry_after > 25
+            assert [member['throttled'] for member in pool.health] == \
+                [1, 1]
+            assert pool.available == 0
+        assert stub.requests['GET', 'category'] == 2
+    with pytest.raises(ValueError):
+        ClientPool([])
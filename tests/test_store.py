@@ -0,0 +1,97 @@
+import time
+
+import pytest
+from byte_api.client import Client
+from byte_api.store import RecordStore
+from byte_api.stub import StubServer
+from byte_api.types import *
+
+
+def make_accounts(count):
+    stub = StubServer()
+    try:
+        return [stub.make_account('user{}'.format(i)) for i in range(count)]
+    finally:
+        stub.server_close()
+
+
+def test_record_store(tmpdir):
+    path = str(tmpdir.join('records.sqlite3'))
+    accounts = make_accounts(1200)
+    with RecordStore(path, interval=60, batch_size=10000) as store:
+        store.put('account', accounts)
+        assert store.pending == 1200
+        account = store.get('account', 'user7')
+        assert type(account) == Account
+        assert account.username == 'user_user7'
+        store.flush()
+        assert store.pending == 0 and store.count('account') == 1200
+        ids = ['user{}'.format(i) for i in range(0, 1300, 2)]
+        found = store.get_many('account', ids)
+        assert len(found) == 600
+        assert found['user1198'].id == 'user1198'
+        assert store.get('account', 'user5', max_age=-1) is None
+        with pytest.raises(ValueError):
+            store.get('rebyte', 'user5')
+
+    with RecordStore(path, ttls={'account': 60, 'post': None},
+                     write_behind=False) as store:
+        assert store.get('account', 'user5').id == 'user5'
+        store.put('account', accounts[:3], stored=time.time() - 120)
+        assert store.get('account', 'user0') is None
+        assert store.purge() == 3
+        assert store.count('account') == 1197
+        stub = StubServer()
+        posts = [stub.make_post('post{}'.format(i), 'author{}'.format(i % 2))
+                 for i in range(6)]
+        stub.server_close()
+        store.put('post', posts, stored=0)
+        found = store.find('post', 'author_id', 'author1', lazy=True)
+        assert [post.id for post in found] == \
+            [post['id'] for post in sorted(posts[1::2],
+                                           key=lambda post: -post['date'])]
+        assert found[0].caption == posts[5]['caption']
+        with pytest.raises(ValueError):
+            store.find('post', 'caption', 'test')
+
+
+def test_write_behind():
+    store = RecordStore(interval=0.01, batch_size=2)
+    store.put('comment', {'id': 'post-1', 'postID': 'post',
+                          'authorID': 'author', 'body': 'test',
+                          'mentions': [], 'date': 1})
+    deadline = time.monotonic() + 5
+    while store.stats['written'] < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.stats['written'] == 1
+    assert store.find('comment', 'post_id', 'post')[0].body == 'test'
+    store.close()
+    with pytest.raises(ValueError):
+        store.put('comment', {'id': 'post-2'})
+
+
+def test_client_store(tmpdir):
+    path = str(tmpdir.join('records.sqlite3'))
+    with StubServer(page_size=2, pages=1, comments=2) as stub:
+        with Client('token', base_url=stub.url, store=path) as client:
+            assert client.get_user('test_id').data.username == \
+                'user_test_id'
+            assert client.get_user('test_id').data.id == 'test_id'
+            posts = client.get_timeline().data.posts
+            client.comment('POST', 'test')
+        assert stub.requests['GET', 'account'] == 1
+
+        with Client('token', base_url=stub.url, store=path) as client:
+            assert client.get_user('test_id').data.id == 'test_id'
+            results = list(client.get_users(['test_id', 'other_id'],
+                                            ordered=True))
+            assert [result.response.data.id for result in results] == \
+                ['test_id', 'other_id']
+            store = client.store
+            assert store.count('post') == 2
+            assert store.count('comment') == 5
+            assert store.get('post', posts[0].id).caption == \
+                posts[0].caption
+            assert client.get_user(posts[0].author_id).data.username == \
+                'user_' + posts[0].author_id
+        assert stub.requests['GET', 'account'] == 2
@@ -0,0 +1,72 @@
+import pytest
+from byte_api.client import Client
+from byte_api.retry import RetryPolicy
+from byte_api.stub import StubServer
+from byte_api.types import *
+
+
+@pytest.fixture
+def stub():
+    with StubServer(page_size=3, pages=2, comments=1, seed=0) as server:
+        yield server
+
+
+def test_stub_endpoints(stub):
+    with Client('token', base_url=stub.url.rstrip('/')) as client:
+        assert client.api.API_URL == stub.url
+        assert client.get_user('test_id').data.username == 'user_test_id'
+        assert client.follow('test_id').success == 1
+        assert client.unfollow('test_id').success == 1
+        assert client.like('POST').success == 1
+        assert client.dislike('POST').success == 1
+        comment = client.comment('POST', 'test').data
+        assert type(comment) == Comment
+        assert comment.body == 'test'
+        assert client.delete_comment(comment.id).success == 1
+        assert client.loop('POST').data.loop_count == 1
+        assert client.loop('POST').data.loop_count == 2
+        rebyte = client.rebyte('POST').data
+        assert rebyte.post.id == 'POST'
+        assert len(client.get_colors().data.colors) == 5
+        assert client.set_bio('test').success == 1
+        posts = [post.id for post in client.iter_timeline()]
+        assert posts == ['timeline-0-0', 'timeline-0-1', 'timeline-0-2',
+                         'timeline-1-0', 'timeline-1-1', 'timeline-1-2']
+        feed = client.get_user_posts('test_id', '1').data
+        assert feed.cursor is None
+        assert all(post.author_id == 'test_id' for post in feed.posts)
+        stream = client.stream_category('comedy')
+        assert len(list(stream)) == 3
+        assert stream.cursor == '1'
+    assert stub.requests['GET', 'timeline'] == 2
+    assert stub.requests['POST', 'loop'] == 2
+
+
+def test_stub_faults():
+    with StubServer(throttle_rate=1, retry_after=0,
+                    token='token') as stub:
+        with Client('token', base_url=stub.url, rate_limiter=1000,
+                    retry_policy=False) as client:
+            with pytest.raises(ValueError):
+                client.get_user('test_id')
+        with Client('wrong', base_url=stub.url) as client:
+            with pytest.raises(ValueError):
+                client.get_user('test_id')
+    with StubServer(error_rate=1) as stub:
+        policy = RetryPolicy(max_attempts=2, backoff_factor=0.01)
+        with Client('token', base_url=stub.url,
+                    retry_policy=policy) as client:
+            response = client.get_user('test_id')
+        assert response.error.code == 503
+        assert policy.retries == 1
+
+
+def test_stub_sync(stub, tmpdir):
+    path = str(tmpdir.join('comedy.sync'))
+    with Client('token', base_url=stub.url) as client:
+        posts = [post.id for post in client.sync_category('comedy', path)]
+        assert len(posts) == 6
+        sync = client.sync_category('comedy', path, stop_after=2)
+        assert list(sync) == []
+        assert sync.stats['pages'] == 1
+    assert stub.requests['GET', 'category'] == 3
@@ -1,4 +1,5 @@
 import pytest
+from byte_api.schema import generate_source
 from byte_api.types import *
 
 
@@ -9,6 +10,8 @@ def test_json():
     assert JsonDeserializable.check_json(json_type_dict) == json_type_dict
     json_type_str = '{"test": 123}'
     assert JsonDeserializable.check_json(json_type_str) == json_type_dict
+    json_type_bytes = b'{"test": 123}'
+    assert JsonDeserializable.check_json(json_type_bytes) == json_type_dict
     with pytest.raises(ValueError):
         json_type_int = 123
         JsonDeserializable.check_json(json_type_int)
@@ -371,3 +374,184 @@ def test_rebyte():
     assert rebyte.date == data['date']
     assert rebyte.id == data['id']
     assert type(rebyte.post) == Post
+
+
+def test_lazy():
+    data = {
+        'id': 'TEST',
+        'type': 0,
+        'authorID': 'TETS_AUTHOR',
+        'caption': '',
+        'allowCuration': True,
+        'allowRemix': False,
+        'mentions': [
+            {
+                'accountID': 'TEST',
+                'username': 'bixnel',
+                'text': '@bixnel',
+                'range': {
+                    'start': 61,
+                    'stop': 75
+                },
+                'byteRange': {
+                    'start': 67,
+                    'stop': 81
+                }
+            }
+        ],
+        'date': 1580089743,
+        'videoSrc': 'TEST_VIDEO',
+        'thumbSrc': 'TEST_THUMB',
+        'commentCount': 0,
+        'comments': [
+            {
+                'id': 'TEST_ID',
+                'postID': 'TEST_POST',
+                'authorID': 'TEST_AUTHOR',
+                'body': 'test test',
+                'mentions': [],
+                'date': 1580089742
+            }
+        ],
+        'likeCount': 3,
+        'likedByMe': False,
+        'loopCount': 0,
+        'rebytedByMe': False
+    }
+    post = Post.de_json(data, lazy=True)
+    eager = Post.de_json(data)
+    assert type(post) == Post
+    for name in Post._lazy_fields:
+        if name not in ('mentions', 'comments', 'category'):
+            assert getattr(post, name) == getattr(eager, name)
+    data['likeCount'] = 4
+    assert post.like_count == 3
+    assert all(type(mention) == Mention for mention in post.mentions)
+    assert type(post.mentions[0].range) == Range
+    assert post.comments[0].body == 'test test'
+    assert post.category is None
+    assert post.comments[0].accounts is None
+    with pytest.raises(AttributeError):
+        post.unknown
+
+
+def test_slots():
+    data = {
+        'backgroundColor': '#000000',
+        'followerCount': 0,
+        'followingCount': 0,
+        'foregroundColor': '#CCD6E9',
+        'id': 'test_id',
+        'isChannel': False,
+        'loopCount': 0,
+        'loopsConsumedCount': 0,
+        'registrationDate': 1580228662,
+        'username': 'bixnel'
+    }
+    for account in (Account.de_json(data), Account.de_json(data, True)):
+        assert not hasattr(account, '__dict__')
+        assert account.username == data['username']
+        assert account.avatar_url is None
+        assert account.bio is None
+        with pytest.raises(AttributeError):
+            account.unknown = True
+    feed = Feed([], {})
+    assert feed.cursor is None
+    assert feed.accounts is None
+    response = Response(1)
+    assert response.data is None
+    assert response.error is None
+
+
+def test_account_map():
+    account = {
+        'backgroundColor': '#000000',
+        'followerCount': 0,
+        'followingCount': 0,
+        'foregroundColor': '#CCD6E9',
+        'id': 'test_id',
+        'isChannel': False,
+        'loopCount': 0,
+        'loopsConsumedCount': 0,
+        'registrationDate': 1580228662,
+        'username': 'bixnel'
+    }
+    comment = {
+        'id': 'TEST_ID',
+        'postID': 'TEST_POST',
+        'authorID': 'test_id',
+        'body': 'test test',
+        'mentions': [],
+        'date': 1580089742,
+        'accounts': {
+            'test_id': account
+        }
+    }
+    account_map = AccountMap()
+    first = Account.de_json(account, account_map=account_map)
+    assert account_map.get('test_id') is first
+    updated = dict(account, followerCount=10, bio='test bio')
+    comments = [
+        Comment.de_json(dict(comment, accounts={'test_id': updated}),
+                        account_map=account_map),
+        Comment.de_json(comment, lazy=True, account_map=account_map)
+    ]
+    assert comments[0].accounts['test_id'] is first
+    assert first.follower_count == 10
+    assert first.bio == 'test bio'
+    assert comments[1].accounts['test_id'] is first
+    assert first.follower_count == 0
+    assert first.bio is None
+    assert len(account_map) == 1
+    assert Account.de_json(account) is not first
+
+
+def test_schema():
+    account = {
+        'backgroundColor': '#000000',
+        'followerCount': 0,
+        'followingCount': 0,
+        'foregroundColor': '#CCD6E9',
+        'id': 'test_id',
+        'isChannel': False,
+        'loopCount': 0,
+        'loopsConsumedCount': 0,
+        'registrationDate': 1580228662,
+        'username': 'bixnel'
+    }
+    comment = {
+        'id': 'TEST_ID',
+        'postID': 'TEST_POST',
+        'authorID': 'test_id',
+        'body': 'test test',
+        'mentions': [],
+        'date': 1580089742,
+        'accounts': {
+            'test_id': account
+        }
+    }
+    assert 'self.username = obj' in generate_source(Account)
+    assert [field.name for field in Account._schema] == \
+        list(Account._lazy_fields)
+    missing = dict(account)
+    del missing['username']
+    with pytest.raises(KeyError):
+        Account.de_json(missing)
+    with pytest.raises(KeyError):
+        Account.de_json(missing, lazy=True).username
+    for key, value in (('mentions', 'text'), ('mentions', {}),
+                       ('accounts', []), ('accounts', {'test_id': 'id'})):
+        with pytest.raises(ValueError):
+            Comment.de_json(dict(comment, **{key: value}))
+        with pytest.raises(ValueError):
+            getattr(Comment.de_json(dict(comment, **{key: value}), True),
+                    key)
+    with pytest.raises(ValueError):
+        Mention.de_json({'accountID': 'test_id', 'username': 'bixnel',
+                         'text': '@bixnel', 'range': '{}',
+                         'byteRange': {'start': 0, 'stop': 1}})
+    with pytest.raises(ValueError):
+        Feed.de_json({'data': {'posts': {}}, 'success': 1})
+    with pytest.raises(ValueError):
+        Colors.de_json({'colors': [1]})
+    assert Comment.de_json(comment).accounts['test_id'].username == 'bixnel'